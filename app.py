@@ -19,8 +19,8 @@ def main():
     print("Type 'quit' to exit.")
     print("Type 'contexts' to see all available contexts.")
     
-    # Initialize the emotion engine
-    engine = EmotionEngine().initialize()
+    # The model is loaded on the first detection, so 'contexts' stays fast
+    engine = EmotionEngine()
     
     while True:
         print("\nEnter text (or 'quit' to exit, 'contexts' to see available contexts):")
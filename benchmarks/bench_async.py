@@ -0,0 +1,93 @@
+"""
+Compare AsyncEmotionEngine micro-batching against one-request-per-call
+inference, with simulated concurrent clients.
+
+By default the model is replaced by the "stub" backend, made to sleep for
+a fixed per-call overhead plus a per-line cost, so the benchmark runs
+offline. Pass --real-model to load the Hugging Face model instead.
+
+Usage:
+    python benchmarks/bench_async.py [--clients 64] [--requests 20] [--max-wait-ms 5]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from emotion_engine import AsyncEmotionEngine, EmotionEngine  # noqa: E402
+
+LINES = [
+    "Get down!", "I can't believe you came back for me.", "We need to move, now!",
+    "Thank you, truly.", "Is anyone there?", "That was the best day of my life.",
+]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))]
+
+
+async def run_clients(detect, clients: int, requests: int) -> dict:
+    latencies = []
+
+    async def client(index):
+        for n in range(requests):
+            start = time.perf_counter()
+            await detect(LINES[(index + n) % len(LINES)], None, "battle_scene")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests_per_s": len(latencies) / elapsed,
+        "latency_ms_p50": statistics.median(latencies),
+        "latency_ms_p95": percentile(latencies, 95),
+        "latency_ms_p99": percentile(latencies, 99),
+    }
+
+
+async def bench(engine, args) -> dict:
+    loop = asyncio.get_running_loop()
+    # One inference thread, like the micro-batcher, since a real model saturates the CPU
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    async def unbatched(text, context, scene):
+        return await loop.run_in_executor(executor, engine.detect_emotion, text, context, scene)
+
+    report = {"unbatched": await run_clients(unbatched, args.clients, args.requests)}
+    executor.shutdown()
+    async with AsyncEmotionEngine(engine, max_batch_size=args.max_batch_size,
+                                  max_wait_ms=args.max_wait_ms) as async_engine:
+        report["micro_batched"] = await run_clients(async_engine.detect, args.clients, args.requests)
+        report["micro_batched"].update(async_engine.stats())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--call-ms", type=float, default=8.0, help="Simulated cost per model call")
+    parser.add_argument("--line-ms", type=float, default=0.5, help="Simulated cost per line")
+    parser.add_argument("--real-model", action="store_true")
+    args = parser.parse_args()
+
+    engine = EmotionEngine()
+    if args.real_model:
+        engine.initialize(backend="transformers")
+    else:
+        engine.initialize(backend="stub", call_ms=args.call_ms, line_ms=args.line_ms)
+    print(json.dumps(asyncio.run(bench(engine, args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
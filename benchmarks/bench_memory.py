@@ -0,0 +1,95 @@
+"""
+Measure per-worker memory with private, fork-shared and mmap-shared model weights.
+
+Starts several worker processes that each hold a loaded EmotionEngine,
+waits until all of them have classified a line, then reports every
+worker's RSS and PSS. PSS splits shared pages between the processes
+using them, so the PSS total is what the workers really cost the host.
+
+Modes:
+    private  each worker loads its own copy (the default engine behaviour)
+    fork     the parent loads once and forks the workers (copy-on-write)
+    mmap     each worker loads with mmap_weights=True (shared page cache)
+
+This needs the real model (or a local model directory via --model) and
+reports PSS on Linux only.
+
+Usage:
+    python benchmarks/bench_memory.py [--workers 4] [--modes private fork mmap] [--model PATH]
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from emotion_engine import EmotionEngine  # noqa: E402
+from emotion_engine.backends import DEFAULT_MODEL  # noqa: E402
+from emotion_engine.shared_weights import memory_usage, prepare_for_fork  # noqa: E402
+
+MB = 1024 * 1024
+
+# Engine loaded by the parent in "fork" mode and inherited by the workers
+_parent_engine = None
+
+
+def load_engine(model: str, db_path: str, mmap_weights: bool) -> EmotionEngine:
+    options = {"mmap_weights": True} if mmap_weights else {}
+    return EmotionEngine(db_path=db_path).initialize(model=model, **options)
+
+
+def worker(mode: str, model: str, db_path: str, loaded, measured, results) -> None:
+    import torch
+    torch.set_num_threads(1)
+    engine = _parent_engine if mode == "fork" else load_engine(model, db_path, mode == "mmap")
+    engine.detect_emotion("We made it out alive!", scene="battle_scene")
+    # Measure only once every worker holds its model, so sharing is visible in PSS
+    loaded.wait()
+    results.put(memory_usage())
+    measured.wait()
+
+
+def run_mode(mode: str, workers: int, model: str, db_path: str) -> dict:
+    global _parent_engine
+    context = multiprocessing.get_context("fork" if mode == "fork" else "spawn")
+    if mode == "fork":
+        _parent_engine = load_engine(model, db_path, mmap_weights=False)
+        prepare_for_fork()
+    loaded, measured = context.Barrier(workers), context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, model, db_path, loaded, measured, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    usage = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    _parent_engine = None
+    return {
+        "rss_mb_per_worker": [round(u["rss"] / MB, 1) for u in usage],
+        "pss_mb_per_worker": [round(u["pss"] / MB, 1) for u in usage],
+        "rss_mb_total": round(sum(u["rss"] for u in usage) / MB, 1),
+        "pss_mb_total": round(sum(u["pss"] for u in usage) / MB, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["private", "fork", "mmap"],
+                        choices=["private", "fork", "mmap"])
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model name or local directory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        EmotionEngine(db_path=db_path).get_available_contexts()
+        report = {mode: run_mode(mode, args.workers, args.model, db_path) for mode in args.modes}
+    print(json.dumps({"workers": args.workers, "model": args.model, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
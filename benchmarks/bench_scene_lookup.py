@@ -0,0 +1,65 @@
+"""
+Compare SceneManager.get_scene_context against the previous linear
+alias scan with difflib, for exact, alias, fuzzy and unknown scene names.
+
+Usage:
+    python benchmarks/bench_scene_lookup.py [--number 20000]
+"""
+import argparse
+import json
+import sys
+import timeit
+from difflib import get_close_matches
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from emotion_engine import SceneManager  # noqa: E402
+
+LOOKUPS = {
+    "exact": "battle_scene",
+    "alias": "spellcasting",
+    "fuzzy": "spellcastin",
+    "unknown": "underwater_base",
+}
+
+
+def legacy_get_scene_context(manager: SceneManager, scene_name: str) -> dict:
+    """The lookup as it was before the alias index: scan every scene on each call."""
+    if scene_name in manager.scene_definitions:
+        return manager.scene_definitions[scene_name]
+    for scene, definition in manager.scene_definitions.items():
+        aliases = definition.get("aliases", [])
+        if not aliases:
+            continue
+        if scene_name in aliases:
+            return definition
+        if get_close_matches(scene_name, aliases, n=1, cutoff=0.8):
+            return definition
+    return manager.scene_definitions[manager.default_scene]
+
+
+def bench_scene_lookups(number: int) -> dict:
+    """Mean microseconds per lookup for the legacy scan and the indexed lookup."""
+    manager = SceneManager()
+    report = {}
+    for kind, name in LOOKUPS.items():
+        legacy = timeit.timeit(lambda: legacy_get_scene_context(manager, name), number=number)
+        indexed = timeit.timeit(lambda: manager.get_scene_context(name), number=number)
+        report[kind] = {
+            "legacy_us": legacy / number * 1e6,
+            "indexed_us": indexed / number * 1e6,
+            "speedup": legacy / indexed if indexed else float("inf"),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="Lookups per measurement")
+    args = parser.parse_args()
+    print(json.dumps(bench_scene_lookups(args.number), indent=2))
+
+
+if __name__ == "__main__":
+    main()
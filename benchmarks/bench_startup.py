@@ -0,0 +1,66 @@
+"""
+Measure how long it takes to import emotion_engine and answer a scene or
+context lookup, in a fresh interpreter each run.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--budget-ms 250]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import emotion_engine
+imported = time.perf_counter()
+engine = emotion_engine.EmotionEngine()
+engine.get_mood_suggestion("joy")
+engine._scene_manager.get_scene_context("date")
+done = time.perf_counter()
+heavy = sorted(m for m in ("torch", "transformers") if m in sys.modules)
+print(f"{(imported - start) * 1000:.3f} {(done - start) * 1000:.3f} {','.join(heavy)}")
+"""
+
+
+def measure_startup(runs: int = 10) -> dict:
+    """Time the import and first lookup over several fresh interpreters."""
+    import_ms, lookup_ms, heavy = [], [], set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SNIPPET],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        import_ms.append(float(output[0]))
+        lookup_ms.append(float(output[1]))
+        if len(output) > 2:
+            heavy.update(output[2].split(","))
+    return {
+        "runs": runs,
+        "import_ms_median": statistics.median(import_ms),
+        "import_and_lookup_ms_median": statistics.median(lookup_ms),
+        "import_and_lookup_ms_max": max(lookup_ms),
+        "heavy_modules_imported": sorted(heavy)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=250.0,
+                        help="Fail if the median import + lookup time exceeds this")
+    args = parser.parse_args()
+
+    report = measure_startup(args.runs)
+    print(json.dumps(report, indent=2))
+    if report["heavy_modules_imported"] or report["import_and_lookup_ms_median"] > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
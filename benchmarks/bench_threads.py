@@ -0,0 +1,80 @@
+"""
+Measure one EmotionEngine shared by many request threads, running model
+calls directly on the request threads or on a bounded InferencePool.
+
+By default the model is replaced by the "stub" backend, made to sleep for
+a fixed per-call overhead plus a per-line cost, so the benchmark runs
+offline. Pass --real-model to load the Hugging Face model instead.
+
+Usage:
+    python benchmarks/bench_threads.py [--threads 16] [--requests 20] [--workers 4]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from emotion_engine import EmotionEngine  # noqa: E402
+from emotion_engine.concurrency import InferencePool  # noqa: E402
+
+LINES = [
+    "Get down!", "I can't believe you came back for me.", "We need to move, now!",
+    "Thank you, truly.", "Is anyone there?", "That was the best day of my life.",
+]
+
+
+def run_threads(engine, threads: int, requests: int) -> dict:
+    def client(index):
+        latencies = []
+        for n in range(requests):
+            start = time.perf_counter()
+            # Distinct text per request so the inference cache never answers
+            engine.detect_emotion(f"{LINES[(index + n) % len(LINES)]} ({index}.{n})", scene="battle_scene")
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    engine.detect_emotion("warm up")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        latencies = [value for values in executor.map(client, range(threads)) for value in values]
+    elapsed = time.perf_counter() - start
+    return {
+        "requests_per_s": len(latencies) / elapsed,
+        "latency_ms_p50": statistics.median(latencies),
+        "latency_ms_max": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per thread")
+    parser.add_argument("--workers", type=int, default=4, help="InferencePool size")
+    parser.add_argument("--intra-op-threads", type=int, default=None)
+    parser.add_argument("--call-ms", type=float, default=8.0, help="Simulated cost per model call")
+    parser.add_argument("--line-ms", type=float, default=0.5, help="Simulated cost per line")
+    parser.add_argument("--real-model", action="store_true")
+    args = parser.parse_args()
+
+    def engine(pool=None):
+        engine = EmotionEngine(inference_pool=pool)
+        if args.real_model:
+            return engine.initialize(backend="transformers")
+        return engine.initialize(backend="stub", call_ms=args.call_ms, line_ms=args.line_ms)
+
+    report = {"single_thread": run_threads(engine(), 1, args.requests * args.threads)}
+    report["shared_engine"] = run_threads(engine(), args.threads, args.requests)
+    pool = InferencePool(args.workers, intra_op_threads=args.intra_op_threads)
+    report["inference_pool"] = run_threads(engine(pool), args.threads, args.requests)
+    report["inference_pool"]["workers"] = args.workers
+    pool.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Reproducible benchmark suite for the emotion engine hot paths.
+
+Covers detect_emotion latency, detect_emotions throughput, scene lookups,
+EmotionDatabase lookups and package import time, and writes the results
+as JSON. Runs offline against the deterministic "stub" backend by default;
+pass --real-model to benchmark the Hugging Face model instead.
+
+Usage:
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --compare previous.json --tolerance 0.2
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_scene_lookup import LOOKUPS  # noqa: E402
+from bench_startup import measure_startup  # noqa: E402
+
+from emotion_engine import EmotionDatabase, EmotionEngine, SceneManager  # noqa: E402
+
+SEED = 1234
+WORDS = ("get", "down", "now", "I", "can't", "believe", "you", "came", "back", "for", "me",
+         "the", "ship", "is", "falling", "apart", "thank", "so", "much", "run")
+SCENES = ("battle_scene", "romantic_date", "funeral", "chase", "ceremony", None)
+CONTEXTS = ("flirty", "angry", "nonchalant", "dramatic", None)
+
+# Metrics where a larger value is better; everything else is a time
+HIGHER_IS_BETTER = ("lines_per_s",)
+
+
+def make_lines(count: int, seed: int = SEED) -> list:
+    """Build reproducible dialogue lines of 2 to 30 words."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 30))) for _ in range(count)]
+
+
+def percentiles(samples_ms: list) -> dict:
+    ordered = sorted(samples_ms)
+
+    def at(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {"p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99), "mean_ms": statistics.fmean(ordered)}
+
+
+def bench_detect_latency(engine: EmotionEngine, lines: list) -> dict:
+    rng = random.Random(SEED)
+    for line in lines[:10]:
+        engine.detect_emotion(line)
+    samples = []
+    for line in lines:
+        scene, context = rng.choice(SCENES), rng.choice(CONTEXTS)
+        start = time.perf_counter()
+        engine.detect_emotion(line, context=context, scene=scene)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def bench_batch_throughput(engine: EmotionEngine, lines: list, batch_sizes=(1, 8, 32, 128)) -> dict:
+    report = {}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        engine.detect_emotions(lines, scenes="battle_scene", batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        report[f"batch_{batch_size}"] = {"lines_per_s": len(lines) / elapsed}
+    return report
+
+
+def bench_scene_lookups(iterations: int) -> dict:
+    report = {}
+    for kind, name in LOOKUPS.items():
+        manager = SceneManager()
+        # The first fuzzy lookup pays for the match; later ones hit the memo
+        start = time.perf_counter()
+        manager.get_scene_context(name)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(iterations):
+            manager.get_scene_context(name)
+        report[kind] = {
+            "first_us": first * 1e6,
+            "mean_us": (time.perf_counter() - start) / iterations * 1e6,
+        }
+    return report
+
+
+def bench_rules(iterations: int) -> dict:
+    manager = SceneManager()
+    start = time.perf_counter()
+    rules = manager.compiled_rules()
+    compile_ms = (time.perf_counter() - start) * 1000
+    dialogue = {"scene": "battle", "context": "flirty", "detected_emotion": "anger"}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        manager.process_dialogue(dialogue)
+    process_us = (time.perf_counter() - start) / iterations * 1e6
+    ids = (rules.scene_id("battle"), rules.context_id("flirty"), rules.emotion_id("anger"))
+    start = time.perf_counter()
+    for _ in range(iterations):
+        rules.resolve(*ids)
+    resolve_us = (time.perf_counter() - start) / iterations * 1e6
+    return {"compile_ms": compile_ms, "process_dialogue_us": process_us, "resolve_ids_us": resolve_us}
+
+
+def bench_database(iterations: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        db = EmotionDatabase(str(Path(tmp) / "bench.db"))
+        open_ms = (time.perf_counter() - start) * 1000
+        keys = [("flirty", "fear"), ("battle", "joy"), ("calm", "joy")]
+        start = time.perf_counter()
+        for i in range(iterations):
+            db.get_emotion_mapping(*keys[i % len(keys)])
+        mapping_us = (time.perf_counter() - start) / iterations * 1e6
+        start = time.perf_counter()
+        for _ in range(iterations):
+            db.get_all_contexts()
+        contexts_us = (time.perf_counter() - start) / iterations * 1e6
+        db.close()
+    return {"open_ms": open_ms, "get_emotion_mapping_us": mapping_us, "get_all_contexts_us": contexts_us}
+
+
+def run_suite(real_model: bool = False, lines: int = 2000, iterations: int = 20000,
+              startup_runs: int = 5) -> dict:
+    """Run every benchmark and return the JSON-serialisable report."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = EmotionEngine(db_path=str(Path(tmp) / "bench.db"))
+        engine.initialize(backend="transformers" if real_model else "stub")
+        dialogue = make_lines(lines)
+        results = {
+            "detect_emotion": bench_detect_latency(engine, dialogue),
+            "detect_emotions": bench_batch_throughput(engine, dialogue),
+        }
+    results["scene_lookup"] = bench_scene_lookups(iterations)
+    results["rules"] = bench_rules(iterations)
+    results["database"] = bench_database(iterations)
+    results["startup"] = measure_startup(startup_runs)
+    return {
+        "meta": {
+            "classifier": "model" if real_model else "stub",
+            "lines": lines,
+            "iterations": iterations,
+            "seed": SEED,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def _flatten(tree: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in tree.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """List the metrics that got worse than the baseline by more than ``tolerance``."""
+    regressions = []
+    before = _flatten(baseline["results"])
+    for metric, value in _flatten(current["results"]).items():
+        if metric not in before or not before[metric] or metric.endswith(".runs"):
+            continue
+        change = (value - before[metric]) / before[metric]
+        if metric.endswith(HIGHER_IS_BETTER):
+            change = -change
+        if change > tolerance:
+            regressions.append({"metric": metric, "baseline": before[metric], "current": value,
+                                "change": round(change, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--real-model", action="store_true", help="Use the Hugging Face model")
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--startup-runs", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown before a metric counts as regressed")
+    args = parser.parse_args()
+
+    report = run_suite(args.real_model, args.lines, args.iterations, args.startup_runs)
+    if args.compare:
+        with open(args.compare) as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
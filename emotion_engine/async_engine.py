@@ -0,0 +1,58 @@
+import asyncio
+from typing import Dict, Optional
+
+from .batching import MicroBatcher
+from .engine import EmotionEngine
+
+
+class AsyncEmotionEngine:
+    """
+    Asyncio front end for EmotionEngine.
+
+    Requests are queued and coalesced into batches: a batch is sent to the
+    model as soon as ``max_batch_size`` requests are waiting, or once the
+    first request in it has waited ``max_wait_ms``. Batching and inference
+    run on a MicroBatcher's worker thread so the event loop is never
+    blocked. Raising ``max_wait_ms`` trades per-request latency for
+    throughput.
+    """
+
+    def __init__(self, engine: EmotionEngine = None, max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0):
+        self.engine = engine if engine is not None else EmotionEngine()
+        self.batcher = MicroBatcher(self.engine, max_batch_size, max_wait_ms)
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+    async def start(self) -> "AsyncEmotionEngine":
+        """Start the batching worker. Called automatically by ``detect``."""
+        self.batcher.start()
+        return self
+
+    async def detect(self, text: str, context: Optional[str] = None, scene: Optional[str] = None) -> Dict:
+        """
+        Detect emotion without blocking the event loop.
+
+        Args:
+            text (str): The dialogue text
+            context (str, optional): The context
+            scene (str, optional): The scene type
+
+        Returns:
+            dict: The same result as ``EmotionEngine.detect_emotion``
+        """
+        return await asyncio.wrap_future(self.batcher.submit(text, context, scene))
+
+    async def close(self) -> None:
+        """Finish queued requests, then stop the worker."""
+        await asyncio.get_running_loop().run_in_executor(None, self.batcher.close)
+
+    def stats(self) -> Dict:
+        """Get request and batch counters."""
+        return self.batcher.stats()
+
+    async def __aenter__(self) -> "AsyncEmotionEngine":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
@@ -0,0 +1,81 @@
+import os
+from pathlib import Path
+from typing import Callable, Dict
+
+DEFAULT_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+
+# Labels predicted by DEFAULT_MODEL, in its output order
+DEFAULT_LABELS = ("anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise")
+
+# Exported ONNX models are cached here, one directory per model
+DEFAULT_ONNX_CACHE = Path.home() / ".cache" / "emotion_engine" / "onnx"
+
+BACKENDS = ("transformers", "onnx", "stub")
+
+# Backend used when initialize() is not given one, e.g. "stub" for offline CI
+BACKEND_ENV_VAR = "EMOTION_ENGINE_BACKEND"
+
+# Backends added with register_backend: name -> factory(model, **options)
+_registered: Dict[str, Callable] = {}
+
+
+def register_backend(name: str, factory: Callable) -> None:
+    """
+    Make a custom classifier available as ``initialize(backend=name)``.
+
+    Args:
+        name (str): Backend name
+        factory (callable): ``factory(model, **options)`` returning a
+            classifier, see ``classifiers.EmotionClassifier``
+    """
+    _registered[name] = factory
+
+
+def default_backend() -> str:
+    """Get the backend named by the EMOTION_ENGINE_BACKEND variable, "transformers" if unset."""
+    return os.environ.get(BACKEND_ENV_VAR) or "transformers"
+
+
+def load_backend(backend="transformers", model: str = DEFAULT_MODEL, **options):
+    """
+    Load a text classifier that is called like a transformers pipeline.
+
+    Args:
+        backend (str or classifier): "transformers" for the PyTorch pipeline,
+            "onnx" for ONNX Runtime, "stub" for the deterministic offline
+            StubClassifier, a name added with ``register_backend``, or a
+            ready classifier instance, which is returned as is
+        model (str): Hugging Face model name or local path, ignored by "stub"
+        **options: Backend specific options. For "transformers",
+            ``mmap_weights=True`` backs the weights with the memory-mapped
+            checkpoint so worker processes share them (see shared_weights);
+            for "onnx" these are ``quantize``, ``cache_dir``, ``max_length``
+            and ``intra_op_threads``; "stub" takes the StubClassifier
+            arguments
+
+    Returns:
+        callable: ``classifier(texts, batch_size=...)`` returning one list of
+        label/score dicts per text
+    """
+    if not isinstance(backend, str):
+        return backend
+    if backend in _registered:
+        return _registered[backend](model, **options)
+    if backend == "transformers":
+        # Imported here so that importing the package stays cheap
+        from transformers import pipeline
+        mmap_weights = options.pop("mmap_weights", False)
+        # Truncate rather than fail on lines past the model's position limit
+        options.setdefault("truncation", True)
+        classifier = pipeline("text-classification", model=model, top_k=1, **options)
+        if mmap_weights:
+            from .shared_weights import attach_mmap_weights, find_safetensors
+            attach_mmap_weights(classifier.model, find_safetensors(model))
+        return classifier
+    if backend == "onnx":
+        from .onnx_backend import OnnxBackend
+        return OnnxBackend(model, **options)
+    if backend == "stub":
+        from .classifiers import StubClassifier
+        return StubClassifier(**options)
+    raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS + tuple(_registered)}")
@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+from .engine import EmotionEngine
+
+
+class MicroBatcher:
+    """
+    Thread-based request coalescer for EmotionEngine.
+
+    ``submit`` can be called from any number of threads. A single worker
+    thread sends queued requests to ``detect_emotions`` once
+    ``max_batch_size`` are waiting, or once the oldest has waited
+    ``max_wait_ms``, and resolves each request's future. Requests whose
+    future was cancelled while queued are dropped. AsyncEmotionEngine
+    runs on one of these too.
+    """
+
+    def __init__(self, engine: EmotionEngine, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive")
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "MicroBatcher":
+        """Start the worker thread. Called automatically by ``submit``."""
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="emotion-batcher", daemon=True)
+                self._worker.start()
+        return self
+
+    def submit(self, text: str, context: Optional[str] = None, scene: Optional[str] = None) -> Future:
+        """Queue one line; the returned future resolves to its detect_emotion result."""
+        if self._worker is None:
+            self.start()
+        future = Future()
+        self._queue.put((text, context, scene, future))
+        return future
+
+    def detect(self, text: str, context: Optional[str] = None, scene: Optional[str] = None,
+               timeout: Optional[float] = None) -> Dict:
+        """Queue one line and wait for its result."""
+        return self.submit(text, context, scene).result(timeout)
+
+    def close(self) -> None:
+        """Finish queued requests, then stop the worker."""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
+
+    def stats(self) -> Dict:
+        """Get request and batch counters."""
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait_ms / 1000.0
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._process(batch)
+
+    def _process(self, batch: list) -> None:
+        batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts, contexts, scenes, futures = zip(*batch)
+        self.batches += 1
+        self.requests += len(batch)
+        try:
+            results = self.engine.detect_emotions(list(texts), list(contexts), list(scenes),
+                                                  self.max_batch_size)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
@@ -0,0 +1,57 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def build_scene_priors(scene_definitions: Dict, labels: Sequence[str]) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Build a (scenes x emotions) prior matrix from each scene's default emotions.
+
+    Each row spreads its mass evenly over the scene's ``default_emotions``
+    that the model can predict. Scenes with none of them get a uniform row.
+
+    Args:
+        scene_definitions (dict): SceneManager.scene_definitions
+        labels (list): Emotion labels, in the column order of the matrix
+
+    Returns:
+        tuple: ({scene_name: row}, np.ndarray of shape (len(scenes), len(labels)))
+    """
+    columns = {label: i for i, label in enumerate(labels)}
+    scene_rows = {scene: row for row, scene in enumerate(scene_definitions)}
+    priors = np.full((len(scene_rows), len(labels)), 1.0 / len(labels))
+    for scene, row in scene_rows.items():
+        hits = [columns[e] for e in scene_definitions[scene].get("default_emotions", []) if e in columns]
+        if hits:
+            priors[row] = 0.0
+            priors[row, hits] = 1.0 / len(hits)
+    return scene_rows, priors
+
+
+def blend(probabilities: np.ndarray, priors: np.ndarray, scene_rows: np.ndarray,
+          weight: float) -> np.ndarray:
+    """
+    Mix model probabilities with per-line scene priors in one vectorized step.
+
+    Args:
+        probabilities (np.ndarray): Shape (lines, emotions)
+        priors (np.ndarray): Shape (scenes, emotions), from build_scene_priors
+        scene_rows (np.ndarray): Prior row for each line, shape (lines,)
+        weight (float): Share of the prior in the result, between 0 and 1
+
+    Returns:
+        np.ndarray: Shape (lines, emotions); rows still sum to 1
+    """
+    if weight <= 0:
+        return probabilities
+    return (1.0 - weight) * probabilities + weight * priors[scene_rows]
+
+
+def outputs_to_matrix(outputs: List[List[Dict]], labels: Sequence[str]) -> np.ndarray:
+    """Convert full (``top_k=None``) pipeline outputs to a (lines, emotions) matrix."""
+    columns = {label: i for i, label in enumerate(labels)}
+    matrix = np.zeros((len(outputs), len(labels)))
+    for row, output in enumerate(outputs):
+        for prediction in output:
+            matrix[row, columns[prediction["label"].lower()]] = prediction["score"]
+    return matrix
@@ -0,0 +1,168 @@
+"""
+Bulk processing of exported dialogue scripts across worker processes.
+
+Usage:
+    python -m emotion_engine.bulk script.jsonl results.jsonl --workers 4
+"""
+import argparse
+import csv
+import gc
+import json
+import multiprocessing
+import os
+from collections import deque
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .concurrency import configure_torch_threads
+from .engine import EmotionEngine
+
+# Engine owned by the current worker process, created once by _init_worker or
+# inherited from the parent when share_model forks the workers
+_worker_engine = None
+
+
+def read_dialogue(path: str) -> Iterator[Dict]:
+    """
+    Stream dialogue records from a JSONL or CSV file, one line at a time.
+
+    CSV files need a header row; ``text``, ``scene``, ``context`` and
+    ``speaker`` columns are used and empty cells are treated as missing.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield {key: value for key, value in row.items() if value not in (None, "")}
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def default_engine_factory(batch_size: int) -> EmotionEngine:
+    """Build and load the engine used by each worker process."""
+    return EmotionEngine(batch_size=batch_size).initialize()
+
+
+def _init_worker(engine_factory: Callable, batch_size: int, threads_per_worker: int) -> None:
+    global _worker_engine
+    configure_torch_threads(threads_per_worker, 1)
+    if _worker_engine is None:
+        _worker_engine = engine_factory(batch_size)
+
+
+def _process_chunk(records: List[Dict]) -> List[Dict]:
+    results = _worker_engine.detect_emotions(
+        [record.get("text") for record in records],
+        contexts=[record.get("context") for record in records],
+        scenes=[record.get("scene") for record in records]
+    )
+    return [dict(record, result=result) for record, result in zip(records, results)]
+
+
+def _chunked(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def process_dialogue_stream(input_path: str, output_path: str, workers: Optional[int] = None,
+                            threads_per_worker: int = 1, chunk_size: int = 256,
+                            batch_size: int = 32, engine_factory: Callable = default_engine_factory,
+                            start_method: Optional[str] = None, share_model: bool = False) -> int:
+    """
+    Detect emotions for every line of a dialogue file using a process pool.
+
+    Chunks of ``chunk_size`` lines are handed to the workers, and at most two
+    chunks per worker are in flight at once, so memory stays flat however
+    long the file is. Results are written to ``output_path`` as JSONL in
+    input order, each input record extended with a ``result`` dict.
+
+    Args:
+        input_path (str): JSONL or CSV file with text/scene/context/speaker
+        output_path (str): Destination JSONL file
+        workers (int, optional): Worker processes, defaults to the CPU count
+        threads_per_worker (int): Torch intra-op threads per worker
+        chunk_size (int): Lines sent to a worker per task
+        batch_size (int): Lines per forward pass inside a worker
+        engine_factory (callable): Picklable ``factory(batch_size)`` returning
+            a ready engine, called once in each worker
+        start_method (str, optional): multiprocessing start method
+        share_model (bool): Build the engine once in this process and fork the
+            workers from it, so they share the weights copy-on-write instead
+            of each loading a copy. Needs the "fork" start method; with
+            "spawn", have ``engine_factory`` initialize with
+            ``mmap_weights=True`` instead.
+
+    Returns:
+        int: Number of lines written
+    """
+    global _worker_engine
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    context = multiprocessing.get_context(start_method)
+    if share_model:
+        if context.get_start_method() != "fork":
+            raise ValueError("share_model needs the fork start method; use mmap_weights=True with spawn")
+        from .shared_weights import prepare_for_fork
+        _worker_engine = engine_factory(batch_size)
+        prepare_for_fork()
+    try:
+        return _run_pool(context, input_path, output_path, workers, max_in_flight,
+                         threads_per_worker, chunk_size, batch_size, engine_factory)
+    finally:
+        if share_model:
+            _worker_engine = None
+            gc.unfreeze()
+
+
+def _run_pool(context, input_path: str, output_path: str, workers: int, max_in_flight: int,
+              threads_per_worker: int, chunk_size: int, batch_size: int,
+              engine_factory: Callable) -> int:
+    written = 0
+    with context.Pool(workers, initializer=_init_worker,
+                      initargs=(engine_factory, batch_size, threads_per_worker)) as pool, \
+            open(output_path, "w", encoding="utf-8") as out:
+        pending = deque()
+
+        def write_next():
+            nonlocal written
+            for row in pending.popleft().get():
+                out.write(json.dumps(row) + "\n")
+                written += 1
+
+        for chunk in _chunked(read_dialogue(input_path), chunk_size):
+            pending.append(pool.apply_async(_process_chunk, (chunk,)))
+            if len(pending) >= max_in_flight:
+                write_next()
+        while pending:
+            write_next()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect emotions for a whole dialogue script.")
+    parser.add_argument("input", help="JSONL or CSV file with text/scene/context/speaker")
+    parser.add_argument("output", help="Destination JSONL file")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--share-model", action="store_true",
+                        help="Load the model once and fork the workers from it (POSIX only)")
+    args = parser.parse_args()
+
+    count = process_dialogue_stream(
+        args.input, args.output, workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        chunk_size=args.chunk_size, batch_size=args.batch_size,
+        start_method="fork" if args.share_model else None, share_model=args.share_model
+    )
+    print(f"Processed {count} lines into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
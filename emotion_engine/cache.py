@@ -0,0 +1,283 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+# Persistent caches still open, flushed when the interpreter exits
+_open_caches = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_caches() -> None:
+    for cache in list(_open_caches):
+        try:
+            cache.flush()
+        except sqlite3.Error:
+            pass
+
+
+class InferenceCache:
+    """
+    LRU cache of raw model predictions, keyed on normalized text.
+
+    Only the model's label and score are stored, so a single entry serves
+    every scene and context: remapping still runs after a cache hit.
+    Entries written with ``put_distributions`` also keep the full
+    probability vector, for callers that blend it with scene priors.
+    When ``db_path`` is given, entries are also written to a SQLite table
+    so a warm cache survives process restarts. Those writes are buffered
+    and flushed in batches, on ``flush()`` or ``close()``, and when the
+    interpreter exits; the table keeps the ``max_persisted`` most recently
+    used entries.
+
+    Args:
+        max_size (int): Entries kept in memory
+        db_path (str, optional): SQLite file to persist entries to
+        max_persisted (int, optional): Entries kept in the SQLite table,
+            defaults to ``max_size``
+        flush_every (int): Buffered writes that trigger a flush
+        flush_interval (float): Seconds after which a write flushes the
+            buffer, however few entries it holds
+    """
+
+    def __init__(self, max_size: int = 10000, db_path: Optional[str] = None,
+                 max_persisted: Optional[int] = None, flush_every: int = 256,
+                 flush_interval: float = 5.0):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.db_path = db_path
+        self.max_persisted = max_persisted or max_size
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Probability vectors of the entries that have one, evicted with them
+        self._distributions = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        # Writes and hits not yet flushed to SQLite
+        self._pending = {}
+        self._touched = set()
+        self._last_flush = time.monotonic()
+        self._persisted = 0
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS inference_cache (
+                    text_key TEXT PRIMARY KEY,
+                    label TEXT NOT NULL,
+                    score FLOAT NOT NULL,
+                    last_used FLOAT NOT NULL DEFAULT 0,
+                    distribution TEXT
+                )
+            ''')
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(inference_cache)')}
+            # Tables written by earlier versions
+            if "last_used" not in columns:
+                self._conn.execute('ALTER TABLE inference_cache ADD COLUMN last_used FLOAT NOT NULL DEFAULT 0')
+            if "distribution" not in columns:
+                self._conn.execute('ALTER TABLE inference_cache ADD COLUMN distribution TEXT')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS inference_cache_last_used ON inference_cache (last_used)')
+            self._conn.commit()
+            self._persisted = self._conn.execute('SELECT COUNT(*) FROM inference_cache').fetchone()[0]
+            _open_caches.add(self)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Collapse whitespace so trivially different lines share an entry."""
+        return " ".join(text.split())
+
+    def get(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Look up the cached prediction for a line.
+
+        Returns:
+            tuple: ``(label, score)``, or None on a miss
+        """
+        key = self.normalize(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if self._conn is not None:
+                    self._touched.add(key)
+                    if len(self._touched) >= self.max_size:
+                        self._flush()
+                return entry
+            if self._conn is not None:
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._conn.execute(
+                        'SELECT label, score, distribution FROM inference_cache WHERE text_key = ?', (key,)
+                    ).fetchone()
+                if pending is not None:
+                    label, score, distribution = pending
+                    self._remember(key, (label, score), distribution)
+                    self._touched.add(key)
+                    self.hits += 1
+                    return label, score
+            self.misses += 1
+            return None
+
+    def get_distribution(self, text: str) -> Optional[Tuple[float, ...]]:
+        """
+        Look up the probability vector cached for a line by ``put_distributions``.
+
+        Returns:
+            tuple: One probability per model label, or None on a miss
+        """
+        key = self.normalize(text)
+        with self._lock:
+            distribution = self._distributions.get(key)
+            if distribution is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if self._conn is not None:
+                    self._touched.add(key)
+                return distribution
+            if self._conn is not None:
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._conn.execute(
+                        'SELECT label, score, distribution FROM inference_cache WHERE text_key = ?', (key,)
+                    ).fetchone()
+                if pending is not None and pending[2] is not None:
+                    label, score, distribution = pending
+                    self._remember(key, (label, score), distribution)
+                    self._touched.add(key)
+                    self.hits += 1
+                    return self._distributions[key]
+            self.misses += 1
+            return None
+
+    def put(self, text: str, label: str, score: float) -> None:
+        """Store the prediction for a single line."""
+        self.put_many([(text, label, score)])
+
+    def put_many(self, predictions: Iterable[Tuple[str, str, float]]) -> None:
+        """Store several ``(text, label, score)`` predictions."""
+        self._store([(self.normalize(text), label, score, None) for text, label, score in predictions])
+
+    def put_distributions(self, predictions: Iterable[Tuple[str, str, float, Sequence[float]]]) -> None:
+        """Store several ``(text, label, score, probabilities)`` predictions."""
+        self._store([(self.normalize(text), label, score, tuple(float(p) for p in probabilities))
+                     for text, label, score, probabilities in predictions])
+
+    def _store(self, rows: list) -> None:
+        if not rows:
+            return
+        with self._lock:
+            for key, label, score, distribution in rows:
+                self._remember(key, (label, score), distribution)
+            if self._conn is not None:
+                for key, label, score, distribution in rows:
+                    if distribution is not None:
+                        distribution = json.dumps(distribution)
+                    elif key in self._pending:
+                        # Keep a vector written earlier in this batch
+                        distribution = self._pending[key][2]
+                    self._pending[key] = (label, score, distribution)
+                if (len(self._pending) >= self.flush_every
+                        or time.monotonic() - self._last_flush >= self.flush_interval):
+                    self._flush()
+
+    def flush(self) -> None:
+        """Write buffered entries to the persistent store, if any."""
+        with self._lock:
+            if self._conn is not None:
+                self._flush()
+
+    def _flush(self) -> None:
+        now = time.time()
+        conn = self._conn
+        if self._pending:
+            conn.executemany('''
+                INSERT INTO inference_cache (text_key, label, score, last_used, distribution)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(text_key) DO UPDATE SET
+                    label = excluded.label, score = excluded.score, last_used = excluded.last_used,
+                    distribution = COALESCE(excluded.distribution, distribution)
+            ''', [(key, label, score, now, distribution)
+                  for key, (label, score, distribution) in self._pending.items()])
+            # An upper bound: upserts of keys already stored add no rows
+            self._persisted += len(self._pending)
+        touched = self._touched.difference(self._pending)
+        if touched:
+            conn.executemany('UPDATE inference_cache SET last_used = ? WHERE text_key = ?',
+                             [(now, key) for key in touched])
+        if self._persisted > self.max_persisted:
+            self._persisted = conn.execute('SELECT COUNT(*) FROM inference_cache').fetchone()[0]
+        if self._persisted > self.max_persisted:
+            # Drop the least recently used rows beyond the cap
+            conn.execute('''
+                DELETE FROM inference_cache WHERE text_key IN (
+                    SELECT text_key FROM inference_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_persisted,))
+            self._persisted = self.max_persisted
+        conn.commit()
+        self._pending.clear()
+        self._touched.clear()
+        self._last_flush = time.monotonic()
+
+    def _remember(self, key: str, entry: Tuple[str, float], distribution=None) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if isinstance(distribution, str):
+            distribution = tuple(json.loads(distribution))
+        if distribution is not None:
+            self._distributions[key] = distribution
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._distributions.pop(evicted, None)
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size
+            }
+
+    def clear(self) -> None:
+        """Drop every entry, including the persistent ones, and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self._distributions.clear()
+            self._pending.clear()
+            self._touched.clear()
+            self.hits = 0
+            self.misses = 0
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM inference_cache')
+                self._conn.commit()
+                self._persisted = 0
+
+    def close(self) -> None:
+        """Flush buffered entries and close the persistent store, if any."""
+        with self._lock:
+            if self._conn is not None:
+                self._flush()
+                self._conn.close()
+                self._conn = None
+                _open_caches.discard(self)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,135 @@
+import re
+from typing import List, Optional
+
+# Sentence ends: terminal punctuation (plus closing quotes/brackets) followed by whitespace
+_SENTENCE_END = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"')\]”’]))\s+")
+
+# Words and single punctuation marks; subword tokenizers produce at least one token for each
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+MODES = ("sentence", "window")
+AGGREGATES = ("mean", "max", "last")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a passage into sentences on terminal punctuation."""
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+
+def split_windows(words: List[str], size: int, stride: int) -> List[str]:
+    """Join overlapping windows of ``size`` words, starting every ``stride`` words."""
+    if len(words) <= size:
+        return [" ".join(words)]
+    starts = list(range(0, len(words) - size, stride)) + [len(words) - size]
+    return [" ".join(words[start:start + size]) for start in starts]
+
+
+class LongInputPolicy:
+    """
+    How ``EmotionEngine.detect_emotion`` and ``detect_emotions`` handle passages longer than ``max_tokens``.
+
+    Long passages are split into sentence or word-window chunks, which are
+    classified in batches, and the chunk distributions are combined into one
+    result:
+
+    - ``"mean"``: average weighted by chunk length
+    - ``"max"``: per-emotion maximum, renormalised, so one strongly
+      emotional sentence is not averaged away
+    - ``"last"``: only the final chunk is classified (last sentence wins)
+
+    Args:
+        max_tokens (int): Passages estimated at or below this many tokens are
+            classified whole
+        mode (str): "sentence" or "window"
+        aggregate (str): "mean", "max" or "last"
+        window_words (int): Words per chunk in "window" mode, and the longest
+            sentence kept whole in "sentence" mode
+        stride_words (int): Step between window starts, defaults to three
+            quarters of ``window_words``
+        max_chunks (int): Chunks classified at most; longer passages are
+            sampled evenly, keeping the first and last chunk
+        max_latency_ms (float, optional): Stop starting new batches once this
+            much time has passed and aggregate the chunks done so far
+        batch_size (int): Chunks per forward pass
+    """
+
+    def __init__(self, max_tokens: int = 128, mode: str = "sentence", aggregate: str = "mean",
+                 window_words: int = 64, stride_words: int = None, max_chunks: int = 32,
+                 max_latency_ms: Optional[float] = None, batch_size: int = 16):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {aggregate!r}, expected one of {AGGREGATES}")
+        if max_chunks <= 0 or batch_size <= 0 or window_words <= 0:
+            raise ValueError("max_chunks, batch_size and window_words must be positive")
+        self.max_tokens = max_tokens
+        self.mode = mode
+        self.aggregate = aggregate
+        self.window_words = window_words
+        self.stride_words = stride_words or max(1, window_words * 3 // 4)
+        self.max_chunks = max_chunks
+        self.max_latency_ms = max_latency_ms
+        self.batch_size = batch_size
+
+    def is_long(self, text: str, tokenizer=None) -> bool:
+        """
+        Whether ``text`` is over ``max_tokens``.
+
+        Lines are screened with cheap character and word counts; only those
+        near the limit are counted with ``tokenizer``, when given.
+        """
+        # Every token covers at least one character, so short strings need no count
+        if len(text) <= self.max_tokens - 2:
+            return False
+        if tokenizer is None:
+            # Roughly four BPE tokens for every three English words
+            return len(text.split()) * 4 // 3 > self.max_tokens
+        pieces = len(_PIECES.findall(text))
+        # At least one token per piece plus the two special tokens, rarely more than two per piece
+        if pieces + 2 > self.max_tokens:
+            return True
+        if pieces * 2 + 2 <= self.max_tokens:
+            return False
+        return len(tokenizer(text, truncation=False)["input_ids"]) > self.max_tokens
+
+    def split(self, text: str) -> List[str]:
+        """Split a passage into the chunks to classify, in passage order."""
+        if self.mode == "window":
+            return split_windows(text.split(), self.window_words, self.stride_words)
+        chunks = []
+        for sentence in split_sentences(text):
+            words = sentence.split()
+            if len(words) > self.window_words:
+                chunks.extend(split_windows(words, self.window_words, self.stride_words))
+            else:
+                chunks.append(sentence)
+        return chunks
+
+    def select(self, chunks: List[str]) -> List[str]:
+        """Pick the chunks to classify within ``max_chunks``."""
+        if self.aggregate == "last":
+            return chunks[-1:]
+        if len(chunks) <= self.max_chunks:
+            return chunks
+        if self.max_chunks == 1:
+            return chunks[-1:]
+        step = (len(chunks) - 1) / (self.max_chunks - 1)
+        return [chunks[round(i * step)] for i in range(self.max_chunks)]
+
+    def combine(self, probabilities, weights):
+        """
+        Aggregate chunk distributions into one.
+
+        Args:
+            probabilities (np.ndarray): Shape (chunks, labels)
+            weights (np.ndarray): Chunk lengths, used by "mean"
+
+        Returns:
+            np.ndarray: One distribution over the labels
+        """
+        if self.aggregate == "last":
+            return probabilities[-1]
+        if self.aggregate == "max":
+            combined = probabilities.max(axis=0)
+            return combined / combined.sum()
+        return weights @ probabilities / weights.sum()
@@ -0,0 +1,108 @@
+import re
+import time
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+from .backends import DEFAULT_LABELS
+
+_UNSET = object()
+_WORD = re.compile(r"[a-z']+")
+
+
+class EmotionClassifier:
+    """
+    Base class for classifiers that EmotionEngine can run.
+
+    Subclasses set ``labels`` and implement ``predict_proba``; calling the
+    classifier then behaves like a transformers text-classification pipeline,
+    returning one list of ``{"label", "score"}`` dicts per text, best first.
+    Any object with that call signature works as a backend, see
+    ``EmotionEngine.initialize``; ``predict_proba`` and ``labels`` are
+    optional extras that let the engine skip the dict round trip.
+    """
+
+    labels: Sequence[str] = DEFAULT_LABELS
+    top_k: Optional[int] = 1
+
+    def predict_proba(self, texts: List[str]):
+        """
+        Get the probability of every label for a batch of texts.
+
+        Returns:
+            Rows of scores (np.ndarray or nested lists), shape
+            (len(texts), len(self.labels)), in ``self.labels`` order
+        """
+        raise NotImplementedError
+
+    def __call__(self, inputs, batch_size: Optional[int] = None, top_k=_UNSET, **kwargs) -> List:
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        top_k = self.top_k if top_k is _UNSET else top_k
+        batch_size = batch_size or len(texts) or 1
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            for row in self.predict_proba(texts[start:start + batch_size]):
+                outputs.append(self._format(row, top_k))
+        return outputs
+
+    def _format(self, row, top_k: Optional[int]) -> List[Dict]:
+        # sorted() is stable, so tied labels keep their label order
+        order = sorted(range(len(self.labels)), key=row.__getitem__, reverse=True)
+        if top_k is not None:
+            order = order[:top_k]
+        return [{"label": self.labels[i], "score": float(row[i])} for i in order]
+
+
+class StubClassifier(EmotionClassifier):
+    """
+    Fast, deterministic classifier that needs no model or network.
+
+    A line containing a lexicon word gets that word's emotion with
+    ``confidence``; any other line gets a label and a score between 0.35 and
+    0.65 derived from a CRC32 of its text, so the same line always gets the
+    same answer. The remaining probability is spread evenly over the other
+    labels. ``call_ms`` and ``line_ms`` make each batch sleep like a model
+    would, for load tests that need realistic timing.
+
+    Args:
+        labels (sequence): Labels to predict, defaults to DEFAULT_LABELS
+        confidence (float): Score given to lexicon matches
+        call_ms (float): Simulated fixed cost per batch
+        line_ms (float): Simulated cost per line
+        top_k (int, optional): Default number of labels returned per line
+    """
+
+    lexicon = {
+        "happy": "joy", "glad": "joy", "love": "joy", "great": "joy", "thanks": "joy", "yay": "joy",
+        "angry": "anger", "hate": "anger", "furious": "anger", "quit": "anger", "stop": "anger",
+        "scared": "fear", "afraid": "fear", "help": "fear", "danger": "fear", "run": "fear",
+        "sad": "sadness", "sorry": "sadness", "miss": "sadness", "cry": "sadness", "lost": "sadness",
+        "wow": "surprise", "whoa": "surprise", "really": "surprise", "suddenly": "surprise",
+        "gross": "disgust", "disgusting": "disgust", "eww": "disgust", "yuck": "disgust",
+    }
+
+    def __init__(self, labels: Sequence[str] = DEFAULT_LABELS, confidence: float = 0.9,
+                 call_ms: float = 0.0, line_ms: float = 0.0, top_k: Optional[int] = 1):
+        self.labels = tuple(labels)
+        self.confidence = confidence
+        self.call_ms = call_ms
+        self.line_ms = line_ms
+        self.top_k = top_k
+
+    def predict_proba(self, texts: List[str]) -> List[List[float]]:
+        if self.call_ms or self.line_ms:
+            time.sleep((self.call_ms + self.line_ms * len(texts)) / 1000.0)
+        return [self._scores(text) for text in texts]
+
+    def _scores(self, text: str) -> List[float]:
+        label, score = None, self.confidence
+        for word in _WORD.findall(text.lower()):
+            label = self.lexicon.get(word)
+            if label in self.labels:
+                break
+            label = None
+        if label is None:
+            digest = zlib.crc32(text.encode("utf-8"))
+            label = self.labels[digest % len(self.labels)]
+            score = 0.35 + (digest >> 8) % 300 / 1000.0
+        rest = (1.0 - score) / (len(self.labels) - 1) if len(self.labels) > 1 else 0.0
+        return [score if candidate == label else rest for candidate in self.labels]
@@ -0,0 +1,84 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+def configure_torch_threads(intra_op_threads: Optional[int] = None,
+                            inter_op_threads: Optional[int] = None) -> None:
+    """
+    Size torch's intra-op and inter-op thread pools for this process.
+
+    Both settings are process wide. The inter-op pool can only be sized
+    before torch first uses it, so later attempts are ignored, as is a
+    missing torch (ONNX and stub backends).
+    """
+    try:
+        import torch
+    except ImportError:
+        return
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError:
+            # The inter-op pool was already started
+            pass
+
+
+class InferencePool:
+    """
+    Bounded pool of threads that runs the model calls of a shared EmotionEngine.
+
+    Request threads hand their forward passes to the pool and wait for the
+    result, so however many requests arrive at once, at most ``workers``
+    forward passes run together, each on ``intra_op_threads`` torch threads,
+    instead of every request thread competing for the same cores. Scene,
+    context and cache work stays on the request threads.
+
+    Args:
+        workers (int): Forward passes allowed at once
+        intra_op_threads (int, optional): Torch threads per forward pass,
+            defaults to the CPU count divided by ``workers``
+        inter_op_threads (int, optional): Size of torch's inter-op pool
+    """
+
+    def __init__(self, workers: int = 1, intra_op_threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None):
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        self.workers = workers
+        self.intra_op_threads = intra_op_threads or max(1, (os.cpu_count() or 1) // workers)
+        self.inter_op_threads = inter_op_threads
+        self._executor = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def run(self, function: Callable, *args, **kwargs):
+        """Run ``function`` on a pool thread and return its result, re-raising its errors."""
+        if getattr(self._local, "in_pool", False):
+            # Already on a pool thread; queueing behind ourselves would deadlock
+            return function(*args, **kwargs)
+        return self._get_executor().submit(function, *args, **kwargs).result()
+
+    def shutdown(self) -> None:
+        """Stop the pool threads; the next run() starts new ones."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        executor = self._executor
+        if executor is None:
+            with self._lock:
+                if self._executor is None:
+                    configure_torch_threads(self.intra_op_threads, self.inter_op_threads)
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="emotion-inference",
+                                                        initializer=self._mark_pool_thread)
+                executor = self._executor
+        return executor
+
+    def _mark_pool_thread(self) -> None:
+        self._local.in_pool = True
@@ -1,201 +1,278 @@
+import csv
+import json
 import sqlite3
+import threading
+import weakref
 from pathlib import Path
 
+# Stored in PRAGMA user_version once the tables exist and the defaults are seeded
+SCHEMA_VERSION = 1
+
+# Columns of an exported CSV row: a context, plus one of its mappings when it has any
+CSV_FIELDS = ["context_type", "context_name", "description",
+              "original_emotion", "adjusted_emotion", "confidence_adjustment"]
+
+DEFAULT_CONTEXTS = [
+    # Basic Personality Contexts
+    ('personality', 'nonchalant', 'Character is laid-back and calm'),
+    ('personality', 'dramatic', 'Character is expressive and theatrical'),
+    ('personality', 'calm', 'Character is composed and peaceful'),
+    ('personality', 'sarcastic', 'Character is ironic and mocking'),
+    ('personality', 'professional', 'Character is formal and composed'),
+    ('personality', 'childlike', 'Character is innocent and playful'),
+    ('personality', 'flirty', 'Character is playful and romantic'),
+
+    # Emotional State Contexts
+    ('emotional', 'tired', 'Character is exhausted and sleepy'),
+    ('emotional', 'energetic', 'Character is excited and lively'),
+    ('emotional', 'nervous', 'Character is anxious and worried'),
+    ('emotional', 'confident', 'Character is assured and self-assured'),
+    ('emotional', 'mysterious', 'Character is enigmatic and secretive'),
+    ('emotional', 'angry', 'Character is irritated and frustrated'),
+
+    # Character Role Contexts
+    ('role', 'heroic', 'Character is brave and noble'),
+    ('role', 'villainous', 'Character is evil and malicious'),
+    ('role', 'mentor', 'Character is wise and guiding'),
+    ('role', 'sidekick', 'Character is loyal and supportive'),
+    ('role', 'rival', 'Character is competitive and challenging'),
+    ('role', 'neutral', 'Character is balanced and impartial'),
+
+    # Situational Contexts
+    ('situation', 'battle', 'Combat or fighting scenario'),
+    ('situation', 'stealth', 'Sneaky or quiet scenario'),
+    ('situation', 'social', 'Conversational and friendly scenario'),
+    ('situation', 'tense', 'Suspenseful and dramatic scenario'),
+    ('situation', 'relaxed', 'Casual and informal scenario'),
+    ('situation', 'formal', 'Official and ceremonial scenario'),
+    ('situation', 'romantic', 'Romantic or intimate scenario'),
+
+    # Relationship Contexts
+    ('relationship', 'friendly', 'Warm and kind interaction'),
+    ('relationship', 'hostile', 'Unfriendly and aggressive interaction'),
+    ('relationship', 'romantic', 'Loving and affectionate interaction'),
+    ('relationship', 'familial', 'Family-oriented and caring interaction'),
+    ('relationship', 'professional', 'Business-like and formal interaction'),
+    ('relationship', 'stranger', 'Distant and unfamiliar interaction'),
+]
+
+# Default (original, adjusted, confidence) mappings per context
+DEFAULT_MAPPINGS = {
+    'nonchalant': [
+        ('anger', 'neutral', 0.8),
+        ('fear', 'neutral', 0.8),
+        ('disgust', 'neutral', 0.8),
+        ('surprise', 'neutral', 0.8),
+        ('joy', 'neutral', 0.8),
+        ('sadness', 'neutral', 0.8)
+    ],
+    'dramatic': [
+        ('neutral', 'surprise', 0.9),
+        ('joy', 'surprise', 0.9),
+        ('sadness', 'surprise', 0.9),
+        ('anger', 'surprise', 0.9)
+    ],
+    'battle': [
+        ('neutral', 'anger', 0.7),
+        ('joy', 'anger', 0.7),
+        ('sadness', 'anger', 0.7)
+    ],
+    'flirty': [
+        ('anger', 'joy', 0.8),
+        ('neutral', 'joy', 0.8),
+        ('fear', 'excitement', 0.8),
+        ('sadness', 'hope', 0.8)
+    ],
+}
+
+class _Handles:
+    """One thread's connection and cursor, closed once the thread is gone."""
+
+    def __init__(self, conn, owned=True):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.owned = owned
+
+    def close(self):
+        if self.owned:
+            self.conn.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
 class EmotionDatabase:
+    """
+    Context and emotion mapping store backed by SQLite.
+
+    Safe to share between threads: every thread gets its own connection,
+    closed when the thread exits (an in-memory database, which cannot be
+    opened twice, shares one), writes are serialized, and lookups are served
+    from an in-memory index that is swapped in whole, so readers never see a
+    half-built one. File databases use write-ahead logging, so readers in
+    other threads and processes are not blocked by a large import.
+    """
+
     def __init__(self, db_path="emotion_contexts.db"):
         self.db_path = db_path
-        self.conn = None
-        self.cursor = None
+        # Bumped on every invalidation so callers can tell when rows changed
+        self.version = 0
+        self._lock = threading.RLock()
+        # Each thread's _Handles, and a weak set of them all so close() can reach them
+        self._local = threading.local()
+        self._handles = weakref.WeakSet()
+        self._shared_conn = None
+        # (mapping index, contexts) snapshot, None until loaded
+        self._index = None
         self.initialize_database()
 
+    @property
+    def conn(self):
+        """The calling thread's connection"""
+        return self.connect().conn
+
+    @property
+    def cursor(self):
+        """The calling thread's cursor"""
+        return self.connect().cursor
+
     def connect(self):
-        """Connect to the SQLite database"""
-        self.conn = sqlite3.connect(self.db_path)
-        self.cursor = self.conn.cursor()
+        """Open the calling thread's long-lived connection, if not already open"""
+        handles = getattr(self._local, "handles", None)
+        if handles is None:
+            with self._lock:
+                if self.db_path == ":memory:":
+                    if self._shared_conn is None:
+                        self._shared_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    handles = _Handles(self._shared_conn, owned=False)
+                else:
+                    handles = _Handles(self._open_connection())
+                self._handles.add(handles)
+                self._local.handles = handles
+        return handles
+
+    def _open_connection(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0)
+        # Write-ahead logging lets readers carry on while a (bulk) write is in progress
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
 
     def close(self):
-        """Close the database connection"""
-        if self.conn:
-            self.conn.close()
+        """Close every thread's database connection"""
+        with self._lock:
+            for handles in list(self._handles):
+                handles.close()
+            self._handles = weakref.WeakSet()
+            if self._shared_conn is not None:
+                self._shared_conn.close()
+                self._shared_conn = None
+            # Threads still holding closed handles reconnect on their next call
+            self._local = threading.local()
 
     def initialize_database(self):
-        """Create the database tables if they don't exist"""
-        self.connect()
-        
-        # Create contexts table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS contexts (
-                id INTEGER PRIMARY KEY,
-                context_type TEXT NOT NULL,
-                context_name TEXT NOT NULL,
-                description TEXT,
-                UNIQUE(context_type, context_name)
-            )
-        ''')
+        """Create the database tables and seed the default rows, unless already done"""
+        with self._lock:
+            self._create_tables()
+        self.invalidate()
+        self._load_index()
 
-        # Create emotion mappings table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS emotion_mappings (
-                id INTEGER PRIMARY KEY,
-                context_id INTEGER,
-                original_emotion TEXT NOT NULL,
-                adjusted_emotion TEXT NOT NULL,
-                confidence_adjustment FLOAT DEFAULT 1.0,
-                FOREIGN KEY (context_id) REFERENCES contexts(id),
-                UNIQUE(context_id, original_emotion)
-            )
-        ''')
+    def _create_tables(self):
+        conn = self.conn
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            # Tables exist and the defaults were seeded once; don't re-insert rows users deleted
+            return
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Create contexts table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS contexts (
+                    id INTEGER PRIMARY KEY,
+                    context_type TEXT NOT NULL,
+                    context_name TEXT NOT NULL,
+                    description TEXT,
+                    UNIQUE(context_type, context_name)
+                )
+            ''')
 
-        # Insert default contexts if they don't exist
-        self._insert_default_contexts()
-        
-        self.conn.commit()
-        self.close()
+            # Create emotion mappings table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS emotion_mappings (
+                    id INTEGER PRIMARY KEY,
+                    context_id INTEGER,
+                    original_emotion TEXT NOT NULL,
+                    adjusted_emotion TEXT NOT NULL,
+                    confidence_adjustment FLOAT DEFAULT 1.0,
+                    FOREIGN KEY (context_id) REFERENCES contexts(id),
+                    UNIQUE(context_id, original_emotion)
+                )
+            ''')
 
-    def _insert_default_contexts(self):
+            # Insert default contexts if they don't exist
+            self._insert_default_contexts(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _insert_default_contexts(self, conn):
         """Insert default contexts and their emotion mappings"""
-        # Basic Personality Contexts
-        personality_contexts = [
-            ('personality', 'nonchalant', 'Character is laid-back and calm'),
-            ('personality', 'dramatic', 'Character is expressive and theatrical'),
-            ('personality', 'calm', 'Character is composed and peaceful'),
-            ('personality', 'sarcastic', 'Character is ironic and mocking'),
-            ('personality', 'professional', 'Character is formal and composed'),
-            ('personality', 'childlike', 'Character is innocent and playful'),
-            ('personality', 'flirty', 'Character is playful and romantic')
-        ]
-
-        # Emotional State Contexts
-        emotional_contexts = [
-            ('emotional', 'tired', 'Character is exhausted and sleepy'),
-            ('emotional', 'energetic', 'Character is excited and lively'),
-            ('emotional', 'nervous', 'Character is anxious and worried'),
-            ('emotional', 'confident', 'Character is assured and self-assured'),
-            ('emotional', 'mysterious', 'Character is enigmatic and secretive'),
-            ('emotional', 'angry', 'Character is irritated and frustrated')
-        ]
-
-        # Character Role Contexts
-        role_contexts = [
-            ('role', 'heroic', 'Character is brave and noble'),
-            ('role', 'villainous', 'Character is evil and malicious'),
-            ('role', 'mentor', 'Character is wise and guiding'),
-            ('role', 'sidekick', 'Character is loyal and supportive'),
-            ('role', 'rival', 'Character is competitive and challenging'),
-            ('role', 'neutral', 'Character is balanced and impartial')
-        ]
-
-        # Situational Contexts
-        situation_contexts = [
-            ('situation', 'battle', 'Combat or fighting scenario'),
-            ('situation', 'stealth', 'Sneaky or quiet scenario'),
-            ('situation', 'social', 'Conversational and friendly scenario'),
-            ('situation', 'tense', 'Suspenseful and dramatic scenario'),
-            ('situation', 'relaxed', 'Casual and informal scenario'),
-            ('situation', 'formal', 'Official and ceremonial scenario'),
-            ('situation', 'romantic', 'Romantic or intimate scenario')
-        ]
-
-        # Relationship Contexts
-        relationship_contexts = [
-            ('relationship', 'friendly', 'Warm and kind interaction'),
-            ('relationship', 'hostile', 'Unfriendly and aggressive interaction'),
-            ('relationship', 'romantic', 'Loving and affectionate interaction'),
-            ('relationship', 'familial', 'Family-oriented and caring interaction'),
-            ('relationship', 'professional', 'Business-like and formal interaction'),
-            ('relationship', 'stranger', 'Distant and unfamiliar interaction')
-        ]
-
-        # Insert all contexts
-        all_contexts = (personality_contexts + emotional_contexts + 
-                       role_contexts + situation_contexts + relationship_contexts)
-        
-        for context_type, context_name, description in all_contexts:
-            try:
-                self.cursor.execute('''
-                    INSERT INTO contexts (context_type, context_name, description)
-                    VALUES (?, ?, ?)
-                ''', (context_type, context_name, description))
-            except sqlite3.IntegrityError:
-                # Context already exists, skip
-                pass
+        conn.executemany('''
+            INSERT OR IGNORE INTO contexts (context_type, context_name, description)
+            VALUES (?, ?, ?)
+        ''', DEFAULT_CONTEXTS)
 
         # Insert default emotion mappings for some contexts
-        self._insert_default_mappings()
+        self._insert_default_mappings(conn)
 
-    def _insert_default_mappings(self):
+    def _insert_default_mappings(self, conn):
         """Insert default emotion mappings for contexts"""
-        # Get context IDs
-        self.cursor.execute("SELECT id, context_name FROM contexts")
-        contexts = {name: id for id, name in self.cursor.fetchall()}
-
-        # Default mappings for nonchalant context
-        nonchalant_mappings = [
-            ('anger', 'neutral', 0.8),
-            ('fear', 'neutral', 0.8),
-            ('disgust', 'neutral', 0.8),
-            ('surprise', 'neutral', 0.8),
-            ('joy', 'neutral', 0.8),
-            ('sadness', 'neutral', 0.8)
-        ]
-
-        # Default mappings for dramatic context
-        dramatic_mappings = [
-            ('neutral', 'surprise', 0.9),
-            ('joy', 'surprise', 0.9),
-            ('sadness', 'surprise', 0.9),
-            ('anger', 'surprise', 0.9)
-        ]
-
-        # Default mappings for battle context
-        battle_mappings = [
-            ('neutral', 'anger', 0.7),
-            ('joy', 'anger', 0.7),
-            ('sadness', 'anger', 0.7)
-        ]
-
-        # Default mappings for flirty context
-        flirty_mappings = [
-            ('anger', 'joy', 0.8),
-            ('neutral', 'joy', 0.8),
-            ('fear', 'excitement', 0.8),
-            ('sadness', 'hope', 0.8)
-        ]
-
-        # Insert mappings
-        mappings = {
-            'nonchalant': nonchalant_mappings,
-            'dramatic': dramatic_mappings,
-            'battle': battle_mappings,
-            'flirty': flirty_mappings
-        }
-
-        for context_name, context_mappings in mappings.items():
-            if context_name in contexts:
-                for orig_emotion, adj_emotion, conf in context_mappings:
-                    try:
-                        self.cursor.execute('''
-                            INSERT INTO emotion_mappings 
-                            (context_id, original_emotion, adjusted_emotion, confidence_adjustment)
-                            VALUES (?, ?, ?, ?)
-                        ''', (contexts[context_name], orig_emotion, adj_emotion, conf))
-                    except sqlite3.IntegrityError:
-                        # Mapping already exists, skip
-                        pass
+        conn.executemany('''
+            INSERT OR IGNORE INTO emotion_mappings
+            (context_id, original_emotion, adjusted_emotion, confidence_adjustment)
+            SELECT id, ?, ?, ? FROM contexts WHERE context_name = ? ORDER BY id LIMIT 1
+        ''', [(original, adjusted, confidence, context_name)
+              for context_name, context_mappings in DEFAULT_MAPPINGS.items()
+              for original, adjusted, confidence in context_mappings])
+
+    def invalidate(self):
+        """Drop the in-memory lookup index; call after changing rows directly"""
+        with self._lock:
+            self._index = None
+            self.version += 1
+
+    def _load_index(self):
+        """
+        Load contexts and emotion mappings into memory for dictionary-speed lookups.
+
+        Returns:
+            tuple: The current (mapping index, contexts) snapshot
+        """
+        index = self._index
+        if index is not None:
+            return index
+        with self._lock:
+            if self._index is not None:
+                return self._index
+            cursor = self.cursor
+            cursor.execute('''
+                SELECT c.context_name, em.original_emotion, em.adjusted_emotion, em.confidence_adjustment
+                FROM emotion_mappings em
+                JOIN contexts c ON em.context_id = c.id
+                ORDER BY c.id
+            ''')
+            mappings = {}
+            for context_name, original, adjusted, confidence in cursor.fetchall():
+                # Context names can repeat across types; the first one defined wins
+                mappings.setdefault((context_name, original), (adjusted, confidence))
+            cursor.execute('SELECT context_type, context_name, description FROM contexts')
+            self._index = (mappings, cursor.fetchall())
+            return self._index
 
     def get_emotion_mapping(self, context_name, original_emotion):
         """Get the adjusted emotion and confidence for a given context and emotion"""
-        self.connect()
-        self.cursor.execute('''
-            SELECT em.adjusted_emotion, em.confidence_adjustment
-            FROM emotion_mappings em
-            JOIN contexts c ON em.context_id = c.id
-            WHERE c.context_name = ? AND em.original_emotion = ?
-        ''', (context_name, original_emotion))
-        
-        result = self.cursor.fetchone()
-        self.close()
-        
+        result = self._load_index()[0].get((context_name, original_emotion))
         if result:
             return {
                 'adjusted_emotion': result[0],
@@ -203,10 +280,176 @@ class EmotionDatabase:
             }
         return None
 
+    def get_all_mappings(self):
+        """Get every emotion mapping as {(context_name, original_emotion): (adjusted_emotion, confidence_adjustment)}"""
+        return dict(self._load_index()[0])
+
     def get_all_contexts(self):
         """Get all available contexts"""
-        self.connect()
-        self.cursor.execute('SELECT context_type, context_name, description FROM contexts')
-        contexts = self.cursor.fetchall()
-        self.close()
-        return contexts 
\ No newline at end of file
+        return list(self._load_index()[1])
+
+    def add_context(self, context_type, context_name, description=None):
+        """Add a context, or update its description if it already exists"""
+        with self._lock:
+            handles = self.connect()
+            conn, cursor = handles.conn, handles.cursor
+            cursor.execute('''
+                INSERT INTO contexts (context_type, context_name, description)
+                VALUES (?, ?, ?)
+                ON CONFLICT(context_type, context_name) DO UPDATE SET description = excluded.description
+            ''', (context_type, context_name, description))
+            conn.commit()
+        self.invalidate()
+
+    def add_emotion_mapping(self, context_name, original_emotion, adjusted_emotion,
+                            confidence_adjustment=1.0):
+        """Add or replace the emotion mapping for a context"""
+        with self._lock:
+            handles = self.connect()
+            conn, cursor = handles.conn, handles.cursor
+            cursor.execute('SELECT id FROM contexts WHERE context_name = ? ORDER BY id', (context_name,))
+            row = cursor.fetchone()
+            if row is None:
+                raise ValueError(f"Unknown context: {context_name}")
+            cursor.execute('''
+                INSERT OR REPLACE INTO emotion_mappings
+                (context_id, original_emotion, adjusted_emotion, confidence_adjustment)
+                VALUES (?, ?, ?, ?)
+            ''', (row[0], original_emotion, adjusted_emotion, confidence_adjustment))
+            conn.commit()
+        self.invalidate()
+
+    def import_rows(self, contexts=(), mappings=()):
+        """
+        Add or update many contexts and emotion mappings in one transaction.
+
+        Rows are written with ``executemany`` and committed together, so a
+        failed import leaves the database unchanged.
+
+        Args:
+            contexts (iterable): ``(context_type, context_name, description)``
+                tuples or dicts with those keys; existing contexts get the new
+                description
+            mappings (iterable): ``(context_name, original_emotion,
+                adjusted_emotion, confidence_adjustment)`` tuples or dicts
+                with those keys, plus an optional ``context_type`` to pick
+                between contexts sharing a name; existing mappings are replaced
+
+        Returns:
+            dict: Number of contexts and mappings written
+        """
+        context_rows = [self._context_row(row) for row in contexts]
+        mapping_rows = [self._mapping_row(row) for row in mappings]
+        with self._lock:
+            conn = self.conn
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany('''
+                    INSERT INTO contexts (context_type, context_name, description)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(context_type, context_name) DO UPDATE SET description = excluded.description
+                ''', context_rows)
+                if mapping_rows:
+                    ids = {}
+                    for context_id, context_type, context_name in conn.execute(
+                            'SELECT id, context_type, context_name FROM contexts ORDER BY id'):
+                        ids[(context_type, context_name)] = context_id
+                        # Like add_emotion_mapping, a bare name means its first context
+                        ids.setdefault((None, context_name), context_id)
+                    rows = []
+                    for context_type, context_name, original, adjusted, confidence in mapping_rows:
+                        context_id = ids.get((context_type, context_name))
+                        if context_id is None:
+                            raise ValueError(f"Unknown context: {context_name}")
+                        rows.append((context_id, original, adjusted, confidence))
+                    conn.executemany('''
+                        INSERT OR REPLACE INTO emotion_mappings
+                        (context_id, original_emotion, adjusted_emotion, confidence_adjustment)
+                        VALUES (?, ?, ?, ?)
+                    ''', rows)
+        self.invalidate()
+        return {"contexts": len(context_rows), "mappings": len(mapping_rows)}
+
+    def export_rows(self):
+        """
+        Get every context and emotion mapping, in the form import_rows takes.
+
+        Returns:
+            dict: ``{"contexts": [dict, ...], "mappings": [dict, ...]}``
+        """
+        cursor = self.cursor
+        cursor.execute('SELECT context_type, context_name, description FROM contexts ORDER BY id')
+        contexts = [dict(zip(CSV_FIELDS[:3], row)) for row in cursor.fetchall()]
+        cursor.execute('''
+            SELECT c.context_type, c.context_name, em.original_emotion, em.adjusted_emotion,
+                   em.confidence_adjustment
+            FROM emotion_mappings em
+            JOIN contexts c ON em.context_id = c.id
+            ORDER BY c.id, em.id
+        ''')
+        mappings = [dict(zip(("context_type", "context_name") + tuple(CSV_FIELDS[3:]), row))
+                    for row in cursor.fetchall()]
+        return {"contexts": contexts, "mappings": mappings}
+
+    def import_file(self, path):
+        """
+        Import contexts and mappings from a JSON or CSV file (see export_file).
+
+        Returns:
+            dict: Number of contexts and mappings written
+        """
+        path = Path(path)
+        if path.suffix.lower() == ".csv":
+            contexts, mappings = {}, []
+            with path.open(newline="", encoding="utf-8") as handle:
+                for row in csv.DictReader(handle):
+                    if row.get("context_type"):
+                        key = (row["context_type"], row["context_name"])
+                        contexts[key] = key + (row.get("description") or None,)
+                    if row.get("original_emotion"):
+                        mappings.append(row)
+            return self.import_rows(contexts.values(), mappings)
+        with path.open(encoding="utf-8") as handle:
+            data = json.load(handle)
+        return self.import_rows(data.get("contexts", ()), data.get("mappings", ()))
+
+    def export_file(self, path):
+        """
+        Export every context and mapping to a file, chosen by its suffix.
+
+        ``.json`` writes ``{"contexts": [...], "mappings": [...]}``. ``.csv``
+        writes one row per mapping, and one row for each context without
+        mappings, with the CSV_FIELDS columns.
+        """
+        path = Path(path)
+        data = self.export_rows()
+        if path.suffix.lower() != ".csv":
+            with path.open("w", encoding="utf-8") as handle:
+                json.dump(data, handle, indent=2)
+            return
+        mappings = {}
+        for row in data["mappings"]:
+            mappings.setdefault((row["context_type"], row["context_name"]), []).append(row)
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            # Rows follow context order, so importing the file recreates the contexts in the same order
+            for context in data["contexts"]:
+                rows = mappings.get((context["context_type"], context["context_name"]))
+                writer.writerows([dict(row, description=context["description"]) for row in rows] if rows else [context])
+
+    @staticmethod
+    def _context_row(row):
+        if isinstance(row, dict):
+            return row["context_type"], row["context_name"], row.get("description")
+        context_type, context_name, *rest = row
+        return context_type, context_name, rest[0] if rest else None
+
+    @staticmethod
+    def _mapping_row(row):
+        if isinstance(row, dict):
+            confidence = row.get("confidence_adjustment")
+            return (row.get("context_type") or None, row["context_name"], row["original_emotion"],
+                    row["adjusted_emotion"], 1.0 if confidence in (None, "") else float(confidence))
+        context_name, original, adjusted, *rest = row
+        return None, context_name, original, adjusted, float(rest[0]) if rest else 1.0
@@ -0,0 +1,941 @@
+import threading
+import time
+
+from .backends import DEFAULT_LABELS, DEFAULT_MODEL, default_backend, load_backend
+from .cache import InferenceCache
+from .chunking import LongInputPolicy
+from .database import EmotionDatabase
+from .scene_manager import SceneManager
+from .tokenization import TokenCache
+
+# Synthetic warm-up lines of roughly 4, 25 and 125 tokens
+_WARMUP_SENTENCE = "We have to keep moving before the storm reaches the valley tonight. "
+WARMUP_INPUTS = ("Keep moving!", _WARMUP_SENTENCE * 2, _WARMUP_SENTENCE * 10)
+
+class EmotionEngine:
+    def __init__(self, batch_size: int = 32, cache: InferenceCache = None,
+                 db_path: str = "emotion_contexts.db", scene_weight: float = 0.0,
+                 instrumentation=None, long_input: LongInputPolicy = None,
+                 semantic_cache=None, token_cache: TokenCache = None, inference_pool=None):
+        self._model = None
+        # Optional concurrency.InferencePool that bounds concurrent forward passes
+        self.inference_pool = inference_pool
+        # Guard the lazy model and database loads against concurrent first calls
+        self._init_lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self.batch_size = batch_size
+        # How detect_emotion chunks passages that are too long to classify whole
+        self.long_input = long_input
+        self._cache = cache
+        # Optional TokenCache the backend's tokenizer is routed through, see initialize
+        self.token_cache = token_cache
+        # Optional SemanticCache consulted by detect_emotion for near-duplicate lines
+        self.semantic_cache = semantic_cache
+        # Share of the scene prior mixed into full distributions, see predict_distribution
+        self.scene_weight = scene_weight
+        self._labels = None
+        self._scene_priors = None
+        self._emotion_to_mood = {
+            "joy": "Upbeat music, bright lighting",
+            "anger": "Intense music, red lighting",
+            "sadness": "Somber music, dim lighting",
+            "fear": "Tense music, flickering lights",
+            "surprise": "Sudden sound, quick lighting change",
+            "disgust": "Unsettling music, greenish lighting",
+            "neutral": "Ambient music, normal lighting",
+            "hope": "Uplifting music, soft golden lighting",
+            "excitement": "Energetic music, vibrant lighting",
+            "gratitude": "Warm music, gentle lighting",
+            "anxiety": "Unsettling music, shaky camera",
+            "disappointment": "Melancholic music, muted lighting",
+            "guilt": "Heavy music, shadowy lighting",
+            "jealousy": "Dark music, green-tinted lighting",
+            "confusion": "Disjointed music, distorted lighting",
+            "sympathy": "Soft music, warm lighting"
+        }
+        self._db_path = db_path
+        self._db = None
+        self._scene_manager = SceneManager()
+        # EmotionDatabase.version whose mappings are merged into the scene manager
+        self._overrides_version = None
+        # Set while initialize() warms the model up, see is_ready
+        self._warming = False
+        self._warmup_stats = {}
+        # Optional Instrumentation; every timing hook is skipped while this is None
+        self._instrumentation = None
+        self._model_instrumented = False
+        if instrumentation is not None:
+            self.enable_instrumentation(instrumentation)
+
+    def initialize(self, backend=None, model: str = DEFAULT_MODEL,
+                   warmup: bool = False, **backend_options):
+        """
+        Initialize the emotion detection model.
+
+        Args:
+            backend (str or classifier, optional): "transformers" (PyTorch),
+                "onnx" (ONNX Runtime), "stub" (deterministic, offline), a name
+                added with ``backends.register_backend``, or any classifier
+                instance called like a transformers pipeline (see
+                ``classifiers.EmotionClassifier``). Defaults to the
+                EMOTION_ENGINE_BACKEND environment variable, else "transformers"
+            model (str): Hugging Face model name or local path
+            warmup (bool): Run ``warm_up()`` with its defaults before
+                returning, even if the model is already loaded;
+                ``is_ready()`` stays False until it finishes
+            **backend_options: Passed to the backend, e.g. ``quantize=True``
+                for int8 ONNX inference
+        """
+        with self._init_lock:
+            if self._model is None:
+                warming, self._warming = self._warming, self._warming or warmup
+                try:
+                    model_instance = load_backend(backend or default_backend(), model, **backend_options)
+                    if self.token_cache is not None:
+                        from .tokenization import attach_token_cache
+                        attach_token_cache(model_instance, self.token_cache)
+                    # Published only once set up, so other threads never call a half-configured model
+                    self._model = model_instance
+                    if self._instrumentation is not None:
+                        self._instrument_model()
+                    if warmup:
+                        self.warm_up()
+                finally:
+                    self._warming = warming
+            elif warmup:
+                # Loaded earlier without a warm-up; the backend arguments are ignored
+                self.warm_up()
+        return self
+
+    def warm_up(self, inputs=None, batch_sizes=(1, 8, 32), max_rounds: int = 5,
+                tolerance: float = 0.1) -> dict:
+        """
+        Run synthetic lines through the model until latency settles.
+
+        The first calls pay for lazy allocation, graph setup and first-touch
+        tokenizer costs. Each round classifies every input at every batch
+        size; rounds repeat until one is within ``tolerance`` of the previous
+        one, or ``max_rounds`` is reached. The database and rule tables are
+        touched as well. Nothing is written to the inference cache.
+
+        Args:
+            inputs (list, optional): Lines covering the lengths you expect,
+                defaults to ``WARMUP_INPUTS``
+            batch_sizes (tuple): Batch sizes to run each input at
+            max_rounds (int): Most rounds to run
+            tolerance (float): Relative change between rounds counted as steady
+
+        Returns:
+            dict: The recorded timings, also available from ``get_warmup_stats``
+        """
+        inputs = list(inputs or WARMUP_INPUTS)
+        warming, self._warming = self._warming, True
+        try:
+            if self._model is None:
+                self.initialize()
+            start = time.perf_counter()
+            self._build_result("neutral", 1.0)
+            # Same route as real requests: through the inference pool and into the profile
+            instrumentation = self._instrumentation if not self._model_instrumented else None
+            rounds, shapes = [], {}
+            for _ in range(max_rounds):
+                round_start = time.perf_counter()
+                for text in inputs:
+                    for size in batch_sizes:
+                        call_start = time.perf_counter()
+                        self._call_model(self._model, [text] * size, batch_size=size)
+                        elapsed = time.perf_counter() - call_start
+                        if instrumentation is not None:
+                            instrumentation.record("infer", elapsed)
+                        shapes[f"{size}x{len(text.split())}w"] = elapsed * 1000
+                rounds.append((time.perf_counter() - round_start) * 1000)
+                if len(rounds) > 1 and abs(rounds[-1] - rounds[-2]) <= tolerance * rounds[-2]:
+                    break
+            self._warmup_stats = {
+                "rounds_ms": rounds,
+                "first_round_ms": rounds[0],
+                "last_round_ms": rounds[-1],
+                "steady": len(rounds) > 1 and abs(rounds[-1] - rounds[-2]) <= tolerance * rounds[-2],
+                "shapes_ms": shapes,
+                "total_ms": (time.perf_counter() - start) * 1000,
+            }
+        finally:
+            self._warming = warming
+        return self._warmup_stats
+
+    def is_ready(self) -> bool:
+        """Whether the model is loaded and not warming up, so requests get steady-state latency."""
+        return self._model is not None and not self._warming
+
+    def get_warmup_stats(self) -> dict:
+        """
+        Get the timings recorded by the last warm-up.
+
+        Returns:
+            dict: Per-round and per-shape milliseconds, or an empty dict if
+            the engine was never warmed up
+        """
+        return self._warmup_stats
+
+    def enable_instrumentation(self, instrumentation=None):
+        """
+        Start recording per-stage timings, error counters and cache hit rates.
+
+        Args:
+            instrumentation (Instrumentation, optional): Where to record,
+                a new one is created if omitted
+
+        Returns:
+            Instrumentation: Call ``snapshot()`` or ``export()`` on it to read the numbers
+        """
+        from .instrumentation import Instrumentation
+
+        self._instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        if self._model is not None:
+            self._instrument_model()
+        return self._instrumentation
+
+    def disable_instrumentation(self) -> None:
+        """Stop recording and remove the timing hooks from the model."""
+        from .instrumentation import uninstrument_model
+
+        if self._model is not None:
+            uninstrument_model(self._model)
+        self._instrumentation = None
+        self._model_instrumented = False
+
+    @property
+    def instrumentation(self):
+        """The attached Instrumentation, or None when disabled."""
+        return self._instrumentation
+
+    def _instrument_model(self) -> None:
+        from .instrumentation import instrument_model, uninstrument_model
+
+        uninstrument_model(self._model)
+        self._model_instrumented = instrument_model(self._model, self._instrumentation)
+
+    def detect_emotion(self, text: str, context: str = None, scene: str = None) -> dict:
+        """
+        Detect emotion in the given text, with optional context and scene.
+        Always returns a valid dictionary, even if input is empty or an error occurs.
+        """
+        if not self._is_valid_text(text):
+            return self._neutral_result()
+        try:
+            if self.long_input is not None and \
+                    self.long_input.is_long(text, getattr(self._model, "tokenizer", None)):
+                return self._detect_long(text, context, scene)
+            if self.semantic_cache is not None:
+                return self._detect_semantic(text, context, scene)
+            if self.scene_weight > 0:
+                return self._detect_from_distribution([text], [context], [scene], 1, self.scene_weight)[0]
+            # Get base emotion from the cache or the model
+            base_emotion, confidence = self._predict([text], batch_size=1)[0]
+            return self._build_result(base_emotion, confidence, context, scene)
+        except Exception as e:
+            # Fallback to neutral if anything goes wrong
+            self._count_error(e)
+            return self._neutral_result(error=str(e))
+
+    def _detect_long(self, text: str, context: str = None, scene: str = None) -> dict:
+        """
+        Classify a long passage chunk by chunk, following ``self.long_input``.
+
+        The result gets a ``chunks`` entry with the number of chunks ``used``
+        and the ``total`` the passage was split into; ``used`` is lower when
+        ``max_chunks`` or ``max_latency_ms`` cut the passage short, and 0 when
+        the answer came from the cache.
+        """
+        labels, distribution, chunks = self._long_distribution(text)
+        base_emotion, confidence = self._top_emotion(labels, distribution, scene)
+        result = self._build_result(base_emotion, confidence, context, scene)
+        result["chunks"] = chunks
+        return result
+
+    def _long_distribution(self, text: str) -> tuple:
+        """
+        Get the unblended distribution of a long passage, see ``_detect_long``.
+
+        Returns:
+            tuple: (labels, np.ndarray distribution, {"used": ..., "total": ...})
+        """
+        import numpy as np
+
+        policy = self.long_input
+        chunks = policy.split(text)
+        cached = self._cache.get_distribution(text) if self._cache is not None else None
+        if cached is not None:
+            return self._labels or list(DEFAULT_LABELS), np.array(cached), {"used": 0, "total": len(chunks)}
+
+        if self._model is None:
+            self.initialize()
+        selected = policy.select(chunks)
+        deadline = None
+        if policy.max_latency_ms is not None:
+            deadline = time.perf_counter() + policy.max_latency_ms / 1000.0
+        batches = []
+        for start in range(0, len(selected), policy.batch_size):
+            if batches and deadline is not None and time.perf_counter() > deadline:
+                break
+            batches.append(self._predict_proba(selected[start:start + policy.batch_size], policy.batch_size))
+        probabilities = np.vstack(batches)
+        used = len(probabilities)
+        weights = np.array([len(chunk.split()) for chunk in selected[:used]], dtype=float)
+        distribution = policy.combine(probabilities, weights)
+
+        if self._cache is not None and used == len(selected):
+            best = int(distribution.argmax())
+            self._cache.put_distributions([(text, self._labels[best], float(distribution[best]), distribution)])
+        return self._labels, distribution, {"used": used, "total": len(chunks)}
+
+    def _long_lines(self, texts: list) -> set:
+        """Indices of the lines ``self.long_input`` classifies chunk by chunk."""
+        policy = self.long_input
+        if policy is None:
+            return set()
+        tokenizer = getattr(self._model, "tokenizer", None)
+        return {i for i, text in enumerate(texts) if self._is_valid_text(text) and policy.is_long(text, tokenizer)}
+
+    def _detect_semantic(self, text: str, context: str = None, scene: str = None) -> dict:
+        """
+        Classify a line through ``self.semantic_cache``.
+
+        Exact repeats still come from the regular cache first. Otherwise the
+        distribution of the closest cached line is reused when it is similar
+        enough, and the model only runs on a miss or when the hit is picked
+        for a drift audit. Exact repeats only skip the semantic cache when
+        no scene blending needs the full distribution.
+        """
+        cached = self._cache.get(text) if self._cache is not None and self.scene_weight <= 0 else None
+        if cached is not None:
+            return self._build_result(cached[0], cached[1], context, scene)
+
+        semantic_cache = self.semantic_cache
+        vector = semantic_cache.embed(text)
+        hit = semantic_cache.lookup(text, vector)
+        if hit is None:
+            labels, probabilities = self.predict_distribution([text], scene_weight=0.0)
+            distribution = probabilities[0]
+            semantic_cache.add(text, labels, distribution, vector)
+        else:
+            labels, distribution = semantic_cache.labels, hit[0]
+            if semantic_cache.should_audit():
+                _, fresh = self.predict_distribution([text], scene_weight=0.0)
+                semantic_cache.record_audit(distribution, fresh[0])
+
+        if self._cache is not None and hit is None:
+            best = int(distribution.argmax())
+            self._cache.put(text, labels[best], float(distribution[best]))
+        base_emotion, confidence = self._top_emotion(labels, distribution, scene)
+        return self._build_result(base_emotion, confidence, context, scene)
+
+    def detect_emotions(self, texts: list, contexts=None, scenes=None, batch_size: int = None,
+                        return_distribution: bool = False, scene_weight: float = None) -> list:
+        """
+        Detect emotions for many lines at once, batching the model calls.
+
+        Args:
+            texts (list): The dialogue lines
+            contexts (list or str, optional): One context per line, or a single
+                context applied to every line
+            scenes (list or str, optional): One scene per line, or a single
+                scene applied to every line
+            batch_size (int, optional): Lines per forward pass, defaults to
+                the engine's ``batch_size``
+            return_distribution (bool): Add each line's full emotion
+                probability vector under "distribution", as a
+                ``{label: probability}`` dict
+            scene_weight (float, optional): Share of the scene prior blended
+                into the distribution, defaults to the engine's ``scene_weight``.
+                When non-zero the emotion is picked from the blended distribution.
+
+        Lines over the engine's ``long_input`` limit are classified chunk by
+        chunk, as in ``detect_emotion``, and get a ``chunks`` entry.
+
+        Returns:
+            list: One result dict per line, in input order, shaped like
+            ``detect_emotion`` results
+        """
+        texts = list(texts)
+        contexts = self._per_line(contexts, len(texts), "contexts")
+        scenes = self._per_line(scenes, len(texts), "scenes")
+        batch_size = batch_size or self.batch_size
+        scene_weight = self.scene_weight if scene_weight is None else scene_weight
+        if return_distribution or scene_weight > 0:
+            return self._detect_from_distribution(texts, contexts, scenes, batch_size, scene_weight,
+                                                  return_distribution)
+
+        results = [None] * len(texts)
+        long_lines = self._long_lines(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if i in long_lines:
+                try:
+                    results[i] = self._detect_long(text, contexts[i], scenes[i])
+                except Exception as e:
+                    self._count_error(e)
+                    results[i] = self._neutral_result(error=str(e))
+            elif self._is_valid_text(text):
+                pending.append(i)
+            else:
+                results[i] = self._neutral_result()
+
+        # Sort by length so each batch holds similarly sized lines and pads little
+        pending.sort(key=lambda i: len(texts[i]), reverse=True)
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            try:
+                predictions = self._predict([texts[i] for i in chunk], batch_size)
+                for i, (base_emotion, confidence) in zip(chunk, predictions):
+                    results[i] = self._build_result(base_emotion, confidence, contexts[i], scenes[i])
+            except Exception as e:
+                self._count_error(e)
+                for i in chunk:
+                    if results[i] is None:
+                        results[i] = self._neutral_result(error=str(e))
+        return results
+
+    def predict_distribution(self, texts: list, scenes=None, scene_weight: float = None,
+                             batch_size: int = None) -> tuple:
+        """
+        Get the full emotion probability vector for every line.
+
+        Empty lines get a one-hot "neutral" vector. When ``scene_weight`` is
+        non-zero, each vector is mixed with its scene's prior (built from the
+        scene's ``default_emotions``) in a single vectorized step.
+
+        Args:
+            texts (list): The dialogue lines
+            scenes (list or str, optional): One scene per line, or a single scene
+            scene_weight (float, optional): Share of the scene prior, defaults
+                to the engine's ``scene_weight``
+            batch_size (int, optional): Lines per forward pass
+
+        Returns:
+            tuple: (labels, np.ndarray of shape (len(texts), len(labels)))
+        """
+        import numpy as np
+
+        texts = list(texts)
+        scenes = self._per_line(scenes, len(texts), "scenes")
+        batch_size = batch_size or self.batch_size
+        scene_weight = self.scene_weight if scene_weight is None else scene_weight
+
+        valid = [i for i, text in enumerate(texts) if self._is_valid_text(text)]
+        # Sort by length so each batch holds similarly sized lines and pads little
+        valid.sort(key=lambda i: len(texts[i]), reverse=True)
+        model_probabilities = None
+        if valid:
+            if self._model is None:
+                self.initialize()
+            model_probabilities = self._predict_proba([texts[i] for i in valid], batch_size)
+        labels = self._labels or list(DEFAULT_LABELS)
+
+        probabilities = np.zeros((len(texts), len(labels)))
+        if "neutral" in labels:
+            probabilities[:, labels.index("neutral")] = 1.0
+        if valid:
+            probabilities[valid] = model_probabilities
+        return labels, self._blend_scenes(labels, probabilities, scenes, scene_weight)
+
+    def _blend_scenes(self, labels: list, probabilities, scenes: list, scene_weight: float):
+        """Mix each row with its scene's prior, see predict_distribution."""
+        import numpy as np
+        from . import blending
+
+        if scene_weight <= 0:
+            return probabilities
+        scene_rows, priors = self._get_scene_priors(labels)
+        resolve = self._scene_manager.resolve_scene
+        rows = np.array([scene_rows[resolve(scene)] for scene in scenes], dtype=np.intp)
+        return blending.blend(probabilities, priors, rows, scene_weight)
+
+    def _top_emotion(self, labels: list, distribution, scene: str = None) -> tuple:
+        """Pick ``(label, score)`` from one line's distribution, blended with its scene's prior."""
+        distribution = self._blend_scenes(labels, distribution[None, :], [scene], self.scene_weight)[0]
+        best = int(distribution.argmax())
+        return labels[best], float(distribution[best])
+
+    def tokenize(self, texts: list):
+        """
+        Tokenize lines ahead of inference, for ``detect_tokenized``.
+
+        Safe to call from several threads while another thread runs the
+        model, so bulk jobs can tokenize the next chunks in parallel and keep
+        the inference thread on forward passes. Lines go through the token
+        cache when one is configured. Backends without a tokenizer (such as
+        the stub) get a batch holding only the texts.
+
+        Args:
+            texts (list): The dialogue lines
+
+        Returns:
+            tokenization.TokenizedBatch: Padded model inputs for every line
+        """
+        from .tokenization import CachedTokenizer, TokenizedBatch, pad
+
+        if self._model is None:
+            self.initialize()
+        texts = list(texts)
+        tokenizer = getattr(self._model, "tokenizer", None)
+        if tokenizer is None or not texts:
+            return TokenizedBatch(texts)
+        if not isinstance(tokenizer, CachedTokenizer):
+            tokenizer = CachedTokenizer(tokenizer, self.token_cache)
+        instrumentation = self._instrumentation
+        start = time.perf_counter() if instrumentation is not None else 0.0
+        # Same settings as the backend's own calls, so both share cache entries
+        encodings = tokenizer.encode([text if self._is_valid_text(text) else "" for text in texts],
+                                     truncation=True, max_length=getattr(self._model, "max_length", None))
+        padding_side = getattr(tokenizer, "padding_side", "right")
+        inputs = pad(encodings, tokenizer.pad_token_id or 0, padding_side)
+        if instrumentation is not None:
+            instrumentation.record("tokenize", time.perf_counter() - start)
+        return TokenizedBatch(texts, inputs, padding_side)
+
+    def predict_tokenized(self, batch, scenes=None, scene_weight: float = None,
+                          batch_size: int = None) -> tuple:
+        """
+        Get the full emotion probability vector for every line of a tokenized batch.
+
+        Same as ``predict_distribution``, but the model runs straight on the
+        inputs from ``tokenize`` without tokenizing again.
+
+        Returns:
+            tuple: (labels, np.ndarray of shape (len(batch), len(labels)))
+        """
+        import numpy as np
+        from .tokenization import forward_tokenized
+
+        if self._model is None:
+            self.initialize()
+        scenes = self._per_line(scenes, len(batch), "scenes")
+        batch_size = batch_size or self.batch_size
+        scene_weight = self.scene_weight if scene_weight is None else scene_weight
+        if self._labels is None:
+            self._labels = self._model_labels()
+
+        valid = [i for i, text in enumerate(batch.texts) if self._is_valid_text(text)]
+        if valid and batch.inputs is None:
+            model_probabilities = self._predict_proba([batch.texts[i] for i in valid], batch_size)
+        elif valid:
+            parts = []
+            instrumentation = self._instrumentation
+            for start in range(0, len(valid), batch_size):
+                inputs = batch.take(valid[start:start + batch_size])
+                forward_start = time.perf_counter()
+                parts.append(self._call_model(forward_tokenized, self._model, inputs))
+                if instrumentation is not None:
+                    instrumentation.record("infer", time.perf_counter() - forward_start)
+            model_probabilities = np.vstack(parts)
+        labels = self._labels or list(DEFAULT_LABELS)
+
+        probabilities = np.zeros((len(batch), len(labels)))
+        if "neutral" in labels:
+            probabilities[:, labels.index("neutral")] = 1.0
+        if valid:
+            probabilities[valid] = model_probabilities
+        return labels, self._blend_scenes(labels, probabilities, scenes, scene_weight)
+
+    def detect_tokenized(self, batch, contexts=None, scenes=None, batch_size: int = None,
+                         scene_weight: float = None) -> list:
+        """
+        Detect emotions for a batch from ``tokenize``, like ``detect_emotions``.
+
+        Args:
+            batch (tokenization.TokenizedBatch): Lines from ``tokenize``
+            contexts (list or str, optional): One context per line, or a single
+                context for all of them
+            scenes (list or str, optional): One scene per line, or a single scene
+            batch_size (int, optional): Lines per forward pass
+            scene_weight (float, optional): Share of the scene prior, defaults
+                to the engine's ``scene_weight``
+
+        Returns:
+            list: One result dict per line, in input order
+        """
+        contexts = self._per_line(contexts, len(batch), "contexts")
+        scenes = self._per_line(scenes, len(batch), "scenes")
+        try:
+            labels, probabilities = self.predict_tokenized(batch, scenes, scene_weight, batch_size)
+        except Exception as e:
+            self._count_error(e)
+            return [self._neutral_result(error=str(e)) for _ in batch.texts]
+        best = probabilities.argmax(axis=1)
+        results = []
+        for i, text in enumerate(batch.texts):
+            if self._is_valid_text(text):
+                results.append(self._build_result(
+                    labels[best[i]], float(probabilities[i, best[i]]), contexts[i], scenes[i]
+                ))
+            else:
+                results.append(self._neutral_result())
+        return results
+
+    def _predict_proba(self, texts: list, batch_size: int):
+        """Run the model with every label returned and stack the scores into a matrix."""
+        instrumentation = self._instrumentation
+        if instrumentation is not None and not self._model_instrumented:
+            start = time.perf_counter()
+            try:
+                return self._call_model(self._predict_proba_untimed, texts, batch_size)
+            finally:
+                instrumentation.record("infer", time.perf_counter() - start)
+        return self._call_model(self._predict_proba_untimed, texts, batch_size)
+
+    def _call_model(self, function, *args, **kwargs):
+        """Run a model call, on the inference pool when one is configured."""
+        pool = self.inference_pool
+        if pool is None:
+            return function(*args, **kwargs)
+        return pool.run(function, *args, **kwargs)
+
+    def _predict_proba_untimed(self, texts: list, batch_size: int):
+        import numpy as np
+        from .blending import outputs_to_matrix
+
+        if self._labels is None:
+            self._labels = self._model_labels()
+        if self._labels is not None and hasattr(self._model, "predict_proba"):
+            # Backends that expose probabilities directly skip the dict round trip
+            return np.vstack([self._model.predict_proba(texts[start:start + batch_size])
+                              for start in range(0, len(texts), batch_size)])
+        outputs = self._model(texts, batch_size=batch_size, top_k=None)
+        if self._labels is None:
+            self._labels = sorted(prediction["label"].lower() for prediction in outputs[0])
+        return outputs_to_matrix(outputs, self._labels)
+
+    def _model_labels(self):
+        """Get the model's labels in output order, if the backend exposes them."""
+        labels = getattr(self._model, "labels", None)
+        if labels is None and hasattr(self._model, "model"):
+            id2label = self._model.model.config.id2label
+            labels = [id2label[i] for i in sorted(id2label)]
+        return [label.lower() for label in labels] if labels else None
+
+    def _get_scene_priors(self, labels: list) -> tuple:
+        """Get the (scene rows, prior matrix) pair, rebuilding it when scenes change."""
+        from .blending import build_scene_priors
+
+        key = (self._scene_manager.version, tuple(labels))
+        # Read once: another thread may swap in a rebuilt pair at any time
+        priors = self._scene_priors
+        if priors is None or priors[0] != key:
+            priors = (key, build_scene_priors(self._scene_manager.scene_definitions, labels))
+            self._scene_priors = priors
+        return priors[1]
+
+    def _blended_distribution(self, texts: list, scenes: list, batch_size: int, scene_weight: float) -> tuple:
+        """
+        Get each line's distribution the way ``detect_emotion`` sees it.
+
+        Lines go through the inference cache, long passages are classified
+        chunk by chunk following ``self.long_input``, and every row is then
+        blended with its scene's prior.
+
+        Returns:
+            tuple: (labels, np.ndarray of shape (len(texts), len(labels)),
+            {line index: chunk counts} for the long passages)
+        """
+        long_lines = self._long_lines(texts)
+        chunks = {}
+        # Long passages first, so the labels are known before any all-cached call
+        long_rows = {}
+        for i in long_lines:
+            _, long_rows[i], chunks[i] = self._long_distribution(texts[i])
+        labels, probabilities = self._cached_distribution(
+            [None if i in long_lines else text for i, text in enumerate(texts)], batch_size
+        )
+        for i, distribution in long_rows.items():
+            probabilities[i] = distribution
+        return labels, self._blend_scenes(labels, probabilities, scenes, scene_weight), chunks
+
+    def _detect_from_distribution(self, texts: list, contexts: list, scenes: list, batch_size: int,
+                                  scene_weight: float, return_distribution: bool = False) -> list:
+        try:
+            labels, probabilities, chunks = self._blended_distribution(texts, scenes, batch_size, scene_weight)
+        except Exception as e:
+            self._count_error(e)
+            return [self._neutral_result(error=str(e)) for _ in texts]
+        best = probabilities.argmax(axis=1)
+        results = []
+        for i, text in enumerate(texts):
+            if self._is_valid_text(text):
+                result = self._build_result(
+                    labels[best[i]], float(probabilities[i, best[i]]), contexts[i], scenes[i]
+                )
+            else:
+                result = self._neutral_result()
+            if i in chunks:
+                result["chunks"] = chunks[i]
+            if return_distribution:
+                result["distribution"] = dict(zip(labels, probabilities[i].tolist()))
+            results.append(result)
+        return results
+
+    def _cached_distribution(self, texts: list, batch_size: int) -> tuple:
+        """
+        Get unblended distributions like ``predict_distribution``, through the cache.
+
+        Cached lines skip the model, repeated lines within the call are only
+        sent to it once, and fresh distributions are cached for next time.
+        """
+        import numpy as np
+
+        cache = self._cache
+        if cache is None:
+            return self.predict_distribution(texts, scene_weight=0.0, batch_size=batch_size)
+        cached = {}
+        missing = {}
+        for i, text in enumerate(texts):
+            if not self._is_valid_text(text):
+                continue
+            distribution = cache.get_distribution(text)
+            if distribution is not None:
+                cached[i] = distribution
+            else:
+                missing.setdefault(InferenceCache.normalize(text), []).append(i)
+        if self._instrumentation is not None:
+            misses = sum(len(group) for group in missing.values())
+            self._instrumentation.increment("cache_hits", len(cached))
+            self._instrumentation.increment("cache_misses", misses)
+
+        groups = list(missing.values())
+        fresh = None
+        if groups:
+            _, fresh = self.predict_distribution([texts[group[0]] for group in groups],
+                                                 scene_weight=0.0, batch_size=batch_size)
+        labels = self._labels or list(DEFAULT_LABELS)
+        probabilities = np.zeros((len(texts), len(labels)))
+        if "neutral" in labels:
+            probabilities[:, labels.index("neutral")] = 1.0
+        for i, distribution in cached.items():
+            probabilities[i] = distribution
+        if groups:
+            best = fresh.argmax(axis=1)
+            for group, row in zip(groups, fresh):
+                probabilities[group] = row
+            cache.put_distributions((texts[group[0]], labels[b], float(row[b]), row)
+                                    for group, b, row in zip(groups, best, fresh))
+        return labels, probabilities
+
+    def _predict(self, texts: list, batch_size: int) -> list:
+        """
+        Get raw ``(label, score)`` predictions for non-empty lines.
+
+        Cached lines skip the model, and repeated lines within the call are
+        only sent to the model once.
+        """
+        predictions = [None] * len(texts)
+        missing = {}
+        for i, text in enumerate(texts):
+            cached = self._cache.get(text) if self._cache is not None else None
+            if cached is not None:
+                predictions[i] = cached
+            else:
+                key = InferenceCache.normalize(text)
+                missing.setdefault(key, []).append(i)
+        if self._instrumentation is not None and self._cache is not None:
+            misses = sum(len(group) for group in missing.values())
+            self._instrumentation.increment("cache_hits", len(texts) - misses)
+            self._instrumentation.increment("cache_misses", misses)
+        if not missing:
+            return predictions
+
+        indices = list(missing.values())
+        outputs = self._run_model([texts[group[0]] for group in indices], batch_size)
+        for group, prediction in zip(indices, outputs):
+            for i in group:
+                predictions[i] = prediction
+        return predictions
+
+    def _run_model(self, texts: list, batch_size: int) -> list:
+        """Run the model on lines that missed the cache and store the predictions."""
+        if self._model is None:
+            self.initialize()
+        instrumentation = self._instrumentation
+        if instrumentation is not None and not self._model_instrumented:
+            start = time.perf_counter()
+            outputs = self._call_model(self._model, texts, batch_size=batch_size)
+            instrumentation.record("infer", time.perf_counter() - start)
+        else:
+            outputs = self._call_model(self._model, texts, batch_size=batch_size)
+        predictions = []
+        for output in outputs:
+            result = self._top_prediction(output)
+            predictions.append((result['label'].lower(), result['score']))
+        if self._cache is not None:
+            self._cache.put_many(
+                (text,) + prediction for text, prediction in zip(texts, predictions)
+            )
+        return predictions
+
+    def get_cache_stats(self) -> dict:
+        """
+        Get inference cache counters.
+
+        Returns:
+            dict: Hits, misses, hit rate and size, or an empty dict when no
+            cache is configured
+        """
+        return self._cache.stats() if self._cache is not None else {}
+
+    def close(self) -> None:
+        """
+        Flush the inference cache to its persistent store and close the context database.
+
+        The engine reopens the database if it is used again.
+        """
+        if self._cache is not None:
+            self._cache.flush()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _count_error(self, error: Exception) -> None:
+        """Count an error that is being turned into a neutral result."""
+        if self._instrumentation is not None:
+            self._instrumentation.increment(f"errors.{type(error).__name__}")
+
+    @staticmethod
+    def _is_valid_text(text) -> bool:
+        return bool(text) and isinstance(text, str) and bool(text.strip())
+
+    @staticmethod
+    def _per_line(values, count: int, name: str) -> list:
+        """Expand an optional per-line argument into a list of ``count`` values."""
+        if values is None or isinstance(values, str):
+            return [values] * count
+        values = list(values)
+        if len(values) != count:
+            raise ValueError(f"Expected {count} {name}, got {len(values)}")
+        return values
+
+    @staticmethod
+    def _top_prediction(output) -> dict:
+        """Return the best label/score dict from one pipeline output."""
+        return output[0] if isinstance(output, list) else output
+
+    def _neutral_result(self, error: str = None) -> dict:
+        result = {
+            "emotion": "neutral",
+            "confidence": 1.0,
+            "mood_suggestion": self._emotion_to_mood.get("neutral", "Default mood cue"),
+            "original_emotion": "neutral",
+            "scene_mood": "neutral",
+            "intensity": "low"
+        }
+        if error is not None:
+            result["error"] = error
+        return result
+
+    def _build_result(self, base_emotion: str, confidence: float,
+                      context: str = None, scene: str = None) -> dict:
+        """Apply scene and context processing and the mood lookup to a raw model prediction."""
+        return self._attach_mood(self._remap_prediction(base_emotion, confidence, context, scene))
+
+    def _remap_prediction(self, base_emotion: str, confidence: float,
+                          context: str = None, scene: str = None) -> dict:
+        """
+        Apply scene and context processing to a raw model prediction.
+
+        With instrumentation attached, the DB sync, scene lookup and context
+        override are timed separately.
+        """
+        instrumentation = self._instrumentation
+        start = time.perf_counter() if instrumentation is not None else 0.0
+        if self._overrides_version != self._get_db().version:
+            self._sync_overrides()
+        scene_manager = self._scene_manager
+        rules = scene_manager.compiled_rules()
+        synced = time.perf_counter() if instrumentation is not None else 0.0
+        scene_id = scene_manager.resolve_scene_id(rules, scene)
+        looked_up = time.perf_counter() if instrumentation is not None else 0.0
+        emotion, adjustment = rules.resolve_override(context or scene_manager.default_context, base_emotion)
+        if instrumentation is not None:
+            done = time.perf_counter()
+            instrumentation.record("db_sync", synced - start)
+            instrumentation.record("scene_lookup", looked_up - synced)
+            instrumentation.record("context_override", done - looked_up)
+        return {
+            "emotion": emotion,
+            "confidence": confidence * adjustment,
+            "mood_suggestion": None,
+            "original_emotion": base_emotion,
+            "scene_mood": rules.moods[rules.scene_mood[scene_id]],
+            "intensity": rules.intensities[rules.scene_intensity[scene_id]]
+        }
+
+    def _attach_mood(self, result: dict) -> dict:
+        """Fill in the mood suggestion for a remapped result."""
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            result["mood_suggestion"] = self._emotion_to_mood.get(result["emotion"], "Default mood cue")
+            return result
+        start = time.perf_counter()
+        result["mood_suggestion"] = self._emotion_to_mood.get(result["emotion"], "Default mood cue")
+        instrumentation.record("mood_lookup", time.perf_counter() - start)
+        return result
+
+    def process_dialogue_file(self, dialogue_data: dict) -> dict:
+        """
+        Process a complete dialogue entry with scene and context information.
+        
+        Args:
+            dialogue_data (dict): A dictionary containing:
+                - text (str): The dialogue text
+                - scene (str, optional): The scene type
+                - context (str, optional): The context
+                - speaker (str, optional): The speaker's name
+                
+        Returns:
+            dict: Processed emotion and mood information
+        """
+        return self.detect_emotion(
+            text=dialogue_data["text"],
+            scene=dialogue_data.get("scene"),
+            context=dialogue_data.get("context")
+        )
+
+    def get_mood_suggestion(self, emotion: str) -> str:
+        """
+        Get mood suggestion for a specific emotion.
+        
+        Args:
+            emotion (str): The emotion to get mood for
+            
+        Returns:
+            str: The mood suggestion
+        """
+        return self._emotion_to_mood.get(emotion.lower(), "Default mood cue")
+
+    def get_available_contexts(self) -> list:
+        """
+        Get all available contexts and their descriptions.
+        
+        Returns:
+            list: List of tuples containing (context_type, context_name, description)
+        """
+        return self._get_db().get_all_contexts()
+
+    @property
+    def database(self) -> EmotionDatabase:
+        """The context database, opened on first use; changes to it apply to the next detection."""
+        return self._get_db()
+
+    def _sync_overrides(self) -> None:
+        """Merge the database emotion mappings into the scene manager's override table."""
+        db = self._get_db()
+        version = db.version
+        self._scene_manager.load_mappings(db.get_all_mappings())
+        self._overrides_version = version
+
+    def _get_db(self) -> EmotionDatabase:
+        """Open the context database on first use."""
+        if self._db is None:
+            with self._db_lock:
+                if self._db is None:
+                    self._db = EmotionDatabase(self._db_path)
+        return self._db 
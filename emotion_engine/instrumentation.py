@@ -0,0 +1,202 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+# Histogram bucket upper bounds in seconds: 1us doubling up to ~16s
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** i for i in range(25))
+
+STAGES = ("tokenize", "infer", "scene_lookup", "context_override", "mood_lookup", "db_sync")
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; recording is a bucket search and two additions."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        low, high = 0, len(BUCKET_BOUNDS)
+        while low < high:
+            middle = (low + high) // 2
+            if BUCKET_BOUNDS[middle] < seconds:
+                low = middle + 1
+            else:
+                high = middle
+        self.counts[low] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (0 < q <= 1), in seconds."""
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for bound, count in zip(BUCKET_BOUNDS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "min_ms": self.min * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+        }
+
+
+class Instrumentation:
+    """
+    Per-stage timings and counters for EmotionEngine.
+
+    Attach one with ``EmotionEngine(instrumentation=...)`` or
+    ``engine.enable_instrumentation()``. Without one, the engine skips all
+    timing. Exporters are callables taking a snapshot dict; see
+    LoggingExporter and JsonExporter, or pass any function as a callback.
+    """
+
+    def __init__(self, exporters: Optional[Iterable[Callable[[Dict], None]]] = None):
+        self.exporters = list(exporters or [])
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record one duration for a stage."""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as one observation of ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        """Add to a counter such as ``errors.ValueError`` or ``cache_hits``."""
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def snapshot(self) -> Dict:
+        """
+        Get a JSON-serialisable view of every stage and counter.
+
+        Returns:
+            dict: {"stages": {stage: histogram summary}, "counters": {...},
+            "cache_hit_rate": float or None}
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            stages = {name: histogram.snapshot() for name, histogram in self._histograms.items()}
+        lookups = counters.get("cache_hits", 0) + counters.get("cache_misses", 0)
+        return {
+            "stages": stages,
+            "counters": counters,
+            "cache_hit_rate": counters.get("cache_hits", 0) / lookups if lookups else None,
+        }
+
+    def export(self) -> Dict:
+        """Send a snapshot to every exporter and return it."""
+        snapshot = self.snapshot()
+        for exporter in self.exporters:
+            exporter(snapshot)
+        return snapshot
+
+    def reset(self) -> None:
+        """Clear all timings and counters."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+class LoggingExporter:
+    """Log each snapshot as one JSON line."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger("emotion_engine.metrics")
+        self.level = level
+
+    def __call__(self, snapshot: Dict) -> None:
+        self.logger.log(self.level, "emotion engine metrics %s", json.dumps(snapshot, sort_keys=True))
+
+
+class JsonExporter:
+    """Write each snapshot to a JSON file, replacing the previous one."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def __call__(self, snapshot: Dict) -> None:
+        partial = self.path.with_name(self.path.name + ".tmp")
+        partial.write_text(json.dumps(snapshot, indent=2, sort_keys=True))
+        partial.replace(self.path)
+
+
+def instrument_model(model, instrumentation: Instrumentation) -> bool:
+    """
+    Hook tokenization and forward-pass timing into a loaded backend.
+
+    Returns:
+        bool: True if the backend reports those stages itself; otherwise the
+        engine times the whole model call as "infer"
+    """
+    if hasattr(model, "instrumentation"):
+        # Backends such as OnnxBackend time their own stages
+        model.instrumentation = instrumentation
+        return True
+    if hasattr(model, "preprocess") and hasattr(model, "_forward"):
+        # transformers pipelines look these up on the instance for every input
+        preprocess, forward = model.preprocess, model._forward
+
+        def timed_preprocess(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return preprocess(*args, **kwargs)
+            finally:
+                instrumentation.record("tokenize", time.perf_counter() - start)
+
+        def timed_forward(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return forward(*args, **kwargs)
+            finally:
+                instrumentation.record("infer", time.perf_counter() - start)
+
+        model.preprocess = timed_preprocess
+        model._forward = timed_forward
+        return True
+    return False
+
+
+def uninstrument_model(model) -> None:
+    """Remove the hooks added by instrument_model."""
+    if hasattr(model, "instrumentation"):
+        model.instrumentation = None
+    for name in ("preprocess", "_forward"):
+        if name in getattr(model, "__dict__", {}):
+            delattr(model, name)
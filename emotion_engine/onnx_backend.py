@@ -0,0 +1,141 @@
+import inspect
+import os
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from .backends import DEFAULT_MODEL, DEFAULT_ONNX_CACHE
+from .classifiers import EmotionClassifier
+
+
+def export_onnx(model: str = DEFAULT_MODEL, cache_dir: Optional[str] = None,
+                quantize: bool = False) -> Path:
+    """
+    Export a sequence classification model to ONNX, reusing a cached export.
+
+    Args:
+        model (str): Hugging Face model name or local path
+        cache_dir (str, optional): Where exports are kept, defaults to
+            ``~/.cache/emotion_engine/onnx``
+        quantize (bool): Also produce, and return, an int8 dynamically
+            quantized copy
+
+    Returns:
+        Path: The ONNX file to load
+    """
+    export_dir = Path(cache_dir or DEFAULT_ONNX_CACHE) / model.strip("/").replace("/", "--")
+    model_path = export_dir / "model.onnx"
+    if not model_path.exists():
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        export_dir.mkdir(parents=True, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model)
+        torch_model = AutoModelForSequenceClassification.from_pretrained(model).eval()
+        sample = tokenizer(["Export this line."], return_tensors="pt")
+        partial_path = export_dir / f"model.onnx.{os.getpid()}.tmp"
+        export_options = {}
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            # Newer torch defaults to the dynamo exporter; keep the TorchScript one
+            export_options["dynamo"] = False
+        with torch.no_grad():
+            torch.onnx.export(
+                torch_model,
+                (sample["input_ids"], sample["attention_mask"]),
+                str(partial_path),
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"},
+                },
+                opset_version=14,
+                **export_options
+            )
+        # Rename last so a crashed export never leaves a half-written model behind
+        partial_path.replace(model_path)
+        tokenizer.save_pretrained(str(export_dir))
+        torch_model.config.save_pretrained(str(export_dir))
+
+    if not quantize:
+        return model_path
+    quantized_path = export_dir / "model.int8.onnx"
+    if not quantized_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        partial_path = export_dir / f"model.int8.onnx.{os.getpid()}.tmp"
+        quantize_dynamic(str(model_path), str(partial_path), weight_type=QuantType.QInt8)
+        partial_path.replace(quantized_path)
+    return quantized_path
+
+
+class OnnxBackend(EmotionClassifier):
+    """
+    Text classifier running an ONNX export of the model through ONNX Runtime.
+
+    Instances are called like the transformers text-classification pipeline
+    and return the same label/score dicts (see EmotionClassifier), so
+    EmotionEngine can use either.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, quantize: bool = False,
+                 cache_dir: Optional[str] = None, max_length: int = 512,
+                 intra_op_threads: Optional[int] = None, top_k: Optional[int] = 1):
+        import onnxruntime
+        from transformers import AutoConfig, AutoTokenizer
+
+        self.model_path = export_onnx(model, cache_dir, quantize)
+        export_dir = str(self.model_path.parent)
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        config = AutoConfig.from_pretrained(export_dir)
+        self.labels = [config.id2label[i] for i in range(len(config.id2label))]
+        self.max_length = max_length
+        self.top_k = top_k
+        # Set by EmotionEngine.enable_instrumentation to time tokenize/infer
+        self.instrumentation = None
+
+        session_options = onnxruntime.SessionOptions()
+        if intra_op_threads:
+            session_options.intra_op_num_threads = intra_op_threads
+        self.session = onnxruntime.InferenceSession(
+            str(self.model_path), session_options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = [node.name for node in self.session.get_inputs()]
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """
+        Get softmax probabilities for a batch of texts.
+
+        Returns:
+            np.ndarray: Shape (len(texts), len(self.labels)), in ``self.labels`` order
+        """
+        instrumentation = self.instrumentation
+        start = time.perf_counter() if instrumentation is not None else 0.0
+        encoded = self.tokenizer(texts, padding=True, truncation=True,
+                                 max_length=self.max_length, return_tensors="np")
+        if instrumentation is not None:
+            instrumentation.record("tokenize", time.perf_counter() - start)
+        return self.predict_proba_tokenized(encoded)
+
+    def predict_proba_tokenized(self, encoded) -> np.ndarray:
+        """
+        Get softmax probabilities for an already tokenized, padded batch.
+
+        Args:
+            encoded (dict): ``input_ids`` and ``attention_mask`` arrays
+
+        Returns:
+            np.ndarray: Shape (rows, len(self.labels)), in ``self.labels`` order
+        """
+        instrumentation = self.instrumentation
+        start = time.perf_counter() if instrumentation is not None else 0.0
+        feeds = {name: np.asarray(encoded[name], dtype=np.int64) for name in self._input_names}
+        logits = self.session.run(None, feeds)[0]
+        if instrumentation is not None:
+            instrumentation.record("infer", time.perf_counter() - start)
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
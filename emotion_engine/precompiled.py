@@ -0,0 +1,358 @@
+"""
+Ahead-of-time emotion annotations for scripted dialogue.
+
+A build step runs every line of a script through EmotionEngine once and
+writes a compact binary file; at runtime PrecompiledEmotionSource
+memory-maps it and answers lookups without loading a model.
+
+Lines are classified the way ``EmotionEngine.detect_emotion`` would with
+the compiling engine's ``scene_weight`` and ``long_input`` settings.
+
+File layout (little-endian):
+    header        32 bytes: magic, format version, record size, line count,
+                  distinct text count, string table length, label count
+    keys          u64 per line, sorted: hash of (text, context, scene)
+    records       16 bytes per line, in key order: final confidence, blended
+                  model confidence, final emotion id, blended model emotion
+                  id, scene mood id, intensity id
+    text keys     u64 per distinct text, sorted: hash of the text alone
+    chunks        2 x u32 per distinct text, in text key order: chunks used
+                  and total for long passages, 0 and 0 otherwise
+    distributions f32 per label per distinct text, in text key order: the
+                  model distribution before scene blending
+    strings       UTF-8 JSON with the label, emotion, mood-suggestion, scene
+                  mood and intensity tables the ids point into, and the
+                  scene weight the records were blended with
+
+Usage:
+    python -m emotion_engine.precompiled script.jsonl script.emoa
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Union
+
+from .cache import InferenceCache
+from .engine import EmotionEngine
+
+MAGIC = b"EMOA"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHIIIH10x")
+RECORD = struct.Struct("<ffHHBB2x")
+CHUNKS = struct.Struct("<II")
+_NO_FIELD = "\x1f"
+UNKNOWN_LINE = "Line is not in the annotation file"
+
+
+def annotation_key(text: str, context: str = None, scene: str = None) -> int:
+    """Hash a line with its context and scene into the 64-bit key used by annotation files."""
+    joined = _NO_FIELD.join((InferenceCache.normalize(text), context or "", scene or ""))
+    return int.from_bytes(hashlib.blake2b(joined.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def text_key(text: str) -> int:
+    """Hash a line alone, ignoring context and scene."""
+    return annotation_key(text)
+
+
+class _Table:
+    """Assigns consecutive ids to strings in first-seen order."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def __call__(self, value: str) -> int:
+        return self.ids.setdefault(value, len(self.ids))
+
+    def values(self) -> List[str]:
+        return list(self.ids)
+
+
+def compile_annotations(lines: Iterable[Union[str, Dict]], output_path: str,
+                        engine: EmotionEngine = None, batch_size: int = 32) -> int:
+    """
+    Classify every line of a script and write the results as an annotation file.
+
+    Args:
+        lines (iterable): Dialogue lines, either strings or dicts with
+            ``text`` and optional ``context`` and ``scene`` (as yielded by
+            ``bulk.read_dialogue``); empty lines are skipped
+        output_path (str): Destination file, replaced atomically
+        engine (EmotionEngine, optional): Engine to classify with, defaults to
+            a freshly initialized one
+        batch_size (int): Lines per forward pass
+
+    Returns:
+        int: Number of distinct (text, context, scene) entries written
+    """
+    entries = {}
+    for line in lines:
+        if isinstance(line, str):
+            line = {"text": line}
+        text = line.get("text")
+        if EmotionEngine._is_valid_text(text):
+            entries.setdefault(annotation_key(text, line.get("context"), line.get("scene")),
+                               (text, line.get("context"), line.get("scene")))
+    if engine is None:
+        engine = EmotionEngine(batch_size=batch_size).initialize()
+
+    keys = sorted(entries)
+    texts = [entries[key][0] for key in keys]
+    scenes = [entries[key][2] for key in keys]
+    # One unblended distribution per distinct text, through the engine's cache and long-input policy
+    distinct = {}
+    for text in texts:
+        distinct.setdefault(text_key(text), text)
+    sorted_text_keys = sorted(distinct)
+    labels, distributions, blended, chunks = [], None, None, {}
+    if texts:
+        labels, distributions, chunks = engine._blended_distribution(
+            [distinct[k] for k in sorted_text_keys], [None] * len(sorted_text_keys), batch_size, 0.0
+        )
+        # ...then blended per line with its scene, as detect_emotion does
+        rows = {k: i for i, k in enumerate(sorted_text_keys)}
+        blended = engine._blend_scenes(labels, distributions[[rows[text_key(text)] for text in texts]],
+                                       scenes, engine.scene_weight)
+
+    emotions, suggestions, moods, intensities = _Table(), {}, _Table(), _Table()
+    records = bytearray()
+    for position, key in enumerate(keys):
+        _, context, scene = entries[key]
+        best = int(blended[position].argmax())
+        base_emotion, confidence = labels[best], float(blended[position, best])
+        result = engine._build_result(base_emotion, confidence, context, scene)
+        emotion_id = emotions(result["emotion"])
+        suggestions[emotion_id] = result["mood_suggestion"]
+        records += RECORD.pack(result["confidence"], confidence, emotion_id, emotions(base_emotion),
+                               moods(result["scene_mood"]), intensities(result["intensity"]))
+
+    emotion_names = emotions.values()
+    strings = json.dumps({
+        "labels": list(labels),
+        "scene_weight": engine.scene_weight,
+        "emotions": emotion_names,
+        "mood_suggestions": [suggestions.get(i) or engine.get_mood_suggestion(name)
+                             for i, name in enumerate(emotion_names)],
+        "moods": moods.values(),
+        "intensities": intensities.values(),
+    }).encode("utf-8")
+
+    partial = f"{output_path}.tmp"
+    with open(partial, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size, len(keys), len(sorted_text_keys),
+                            len(strings), len(labels)))
+        f.write(struct.pack(f"<{len(keys)}Q", *keys))
+        f.write(records)
+        f.write(struct.pack(f"<{len(sorted_text_keys)}Q", *sorted_text_keys))
+        for row in range(len(sorted_text_keys)):
+            used = chunks.get(row, {"used": 0, "total": 0})
+            f.write(CHUNKS.pack(used["used"], used["total"]))
+        if distributions is not None:
+            f.write(distributions.astype("<f4").tobytes())
+        f.write(strings)
+    os.replace(partial, output_path)
+    return len(keys)
+
+
+class PrecompiledEmotionSource:
+    """
+    Answer emotion lookups from a compiled annotation file.
+
+    The file is memory-mapped and searched in place, so opening it costs a
+    header read and lookups run no inference. A line compiled with the same
+    context and scene returns the stored result as it was at build time. A
+    known line in a new context or scene is remapped from its stored model
+    distribution, blended with the scene prior at the compile-time
+    ``scene_weight``, with the engine's current scene and context rules,
+    still without inference. Only unknown lines fall back to the live engine,
+    which then loads its model on first use.
+
+    Args:
+        path (str): Annotation file written by ``compile_annotations``
+        engine (EmotionEngine, optional): Engine for remapping and fallback,
+            created on first need when omitted
+        fallback (bool): Classify unknown lines with the engine; when False
+            they get a neutral result instead
+    """
+
+    def __init__(self, path: str, engine: EmotionEngine = None, fallback: bool = True):
+        if sys.byteorder != "little":
+            raise ValueError("Annotation files can only be memory-mapped on little-endian hosts")
+        self.path = path
+        self.fallback = fallback
+        self._engine = engine
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, count, text_count, strings_length, label_count = \
+            HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} annotation file")
+        self._view = view = memoryview(self._mmap)
+        offset = HEADER.size
+        self._keys = view[offset:offset + 8 * count].cast("Q")
+        offset += 8 * count
+        self._records_offset = offset
+        offset += RECORD.size * count
+        self._text_keys = view[offset:offset + 8 * text_count].cast("Q")
+        offset += 8 * text_count
+        self._chunks_offset = offset
+        offset += CHUNKS.size * text_count
+        self._distributions = view[offset:offset + 4 * label_count * text_count].cast("f")
+        offset += 4 * label_count * text_count
+        tables = json.loads(bytes(view[offset:offset + strings_length]))
+        self._labels = tables["labels"]
+        self._scene_weight = tables["scene_weight"]
+        self._emotions = tables["emotions"]
+        self._mood_suggestions = tables["mood_suggestions"]
+        self._moods = tables["moods"]
+        self._intensities = tables["intensities"]
+        self.hits = 0
+        self.remapped = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory map."""
+        if self._mmap.closed:
+            return
+        for view in (self._keys, self._text_keys, self._distributions, self._view):
+            view.release()
+        self._mmap.close()
+
+    @property
+    def engine(self) -> EmotionEngine:
+        if self._engine is None:
+            self._engine = EmotionEngine()
+        return self._engine
+
+    def lookup(self, text: str, context: str = None, scene: str = None) -> Optional[dict]:
+        """
+        Get the compiled result for exactly this line, context and scene.
+
+        Returns:
+            dict: The result as built at compile time, or None if absent
+        """
+        position = self._find(self._keys, annotation_key(text, context, scene))
+        return None if position is None else self._result(position)
+
+    def detect_emotion(self, text: str, context: str = None, scene: str = None) -> dict:
+        """Same contract as ``EmotionEngine.detect_emotion``, answered from the file where possible."""
+        result = self._known(text, context, scene)
+        if result is not None:
+            return result
+        self.misses += 1
+        if not self.fallback:
+            return self.engine._neutral_result(error=UNKNOWN_LINE)
+        return self.engine.detect_emotion(text, context, scene)
+
+    def detect_emotions(self, texts: list, contexts=None, scenes=None) -> list:
+        """Same contract as ``EmotionEngine.detect_emotions``; unknown lines go to the engine in one batch."""
+        texts = list(texts)
+        contexts = EmotionEngine._per_line(contexts, len(texts), "contexts")
+        scenes = EmotionEngine._per_line(scenes, len(texts), "scenes")
+        results = [self._known(text, context, scene) for text, context, scene in zip(texts, contexts, scenes)]
+        unknown = [i for i, result in enumerate(results) if result is None]
+        if unknown:
+            self.misses += len(unknown)
+            if self.fallback:
+                fresh = self.engine.detect_emotions([texts[i] for i in unknown],
+                                                    [contexts[i] for i in unknown],
+                                                    [scenes[i] for i in unknown])
+            else:
+                fresh = [self.engine._neutral_result(error=UNKNOWN_LINE) for _ in unknown]
+            for i, result in zip(unknown, fresh):
+                results[i] = result
+        return results
+
+    def stats(self) -> dict:
+        """
+        Get lookup counters.
+
+        Returns:
+            dict: Compiled lines, exact hits, known lines remapped to a new
+            context or scene, and misses sent to the fallback
+        """
+        return {"lines": len(self), "hits": self.hits, "remapped": self.remapped, "misses": self.misses}
+
+    @staticmethod
+    def _find(keys, key: int) -> Optional[int]:
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return position
+        return None
+
+    def _result(self, position: int) -> dict:
+        confidence, _, emotion, original, mood, intensity = RECORD.unpack_from(
+            self._mmap, self._records_offset + position * RECORD.size
+        )
+        return {
+            "emotion": self._emotions[emotion],
+            "confidence": confidence,
+            "mood_suggestion": self._mood_suggestions[emotion],
+            "original_emotion": self._emotions[original],
+            "scene_mood": self._moods[mood],
+            "intensity": self._intensities[intensity]
+        }
+
+    def _known(self, text: str, context: str, scene: str) -> Optional[dict]:
+        """Answer a line without inference, or return None when it is unknown."""
+        if not EmotionEngine._is_valid_text(text):
+            return self.engine._neutral_result()
+        result = self.lookup(text, context, scene)
+        if result is not None:
+            self.hits += 1
+            return self._with_chunks(result, self._find(self._text_keys, text_key(text)))
+        position = self._find(self._text_keys, text_key(text))
+        if position is None:
+            return None
+        self.remapped += 1
+        return self._with_chunks(self._remap(position, context, scene), position)
+
+    def _remap(self, position: int, context: str, scene: str) -> dict:
+        """Blend a known text's stored distribution with a new scene and remap it, as at compile time."""
+        import numpy as np
+
+        width = len(self._labels)
+        distribution = np.array(self._distributions[position * width:(position + 1) * width], dtype=float)
+        engine = self.engine
+        blended = engine._blend_scenes(self._labels, distribution[None, :], [scene], self._scene_weight)[0]
+        best = int(blended.argmax())
+        return engine._build_result(self._labels[best], float(blended[best]), context, scene)
+
+    def _with_chunks(self, result: dict, position: int) -> dict:
+        """Add the chunk counts of a text compiled as a long passage."""
+        used, total = CHUNKS.unpack_from(self._mmap, self._chunks_offset + position * CHUNKS.size)
+        if total:
+            result["chunks"] = {"used": used, "total": total}
+        return result
+
+
+def main():
+    from .bulk import read_dialogue
+
+    parser = argparse.ArgumentParser(description="Compile emotion annotations for a dialogue script.")
+    parser.add_argument("input", help="JSONL or CSV file with text/scene/context/speaker")
+    parser.add_argument("output", help="Destination annotation file")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    count = compile_annotations(read_dialogue(args.input), args.output, batch_size=args.batch_size)
+    print(f"Compiled {count} lines into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import sys
+import threading
+import weakref
+from typing import Dict, Iterable, Optional, Tuple
+
+from .backends import DEFAULT_LABELS
+
+
+class CompiledRules:
+    """
+    Frozen, integer-indexed form of a SceneManager's scenes and context overrides.
+
+    Scenes, moods, intensities, contexts and emotions are interned to small
+    integer IDs. Each scene's mood and intensity are stored in flat tuples,
+    and the context overrides in two flat ``(context, emotion)`` tables, so
+    resolving a line is a dict lookup per name plus a couple of tuple indexes.
+    Context ID 0 means "no context" and maps every emotion to itself.
+
+    Build these with ``compile_rules``, which returns the same instance for
+    equal inputs so every engine with the same rules shares one copy.
+    """
+
+    __slots__ = ("scenes", "moods", "intensities", "contexts", "emotions", "default_scene_id",
+                 "scene_mood", "scene_intensity", "override_emotion", "override_adjustment",
+                 "_scene_ids", "_context_ids", "_emotion_ids", "_width", "__weakref__")
+
+    def __init__(self, scene_definitions: Dict[str, Dict],
+                 overrides: Dict[Tuple[str, str], Tuple[str, float]], default_scene: str,
+                 extra_emotions: Iterable[str] = DEFAULT_LABELS):
+        scenes = tuple(sys.intern(name) for name in scene_definitions)
+        moods = _Interner()
+        intensities = _Interner()
+        scene_ids = {}
+        for i, name in enumerate(scenes):
+            scene_ids[name] = i
+        # Aliases shared by several scenes belong to the one defined first
+        for i, definition in enumerate(scene_definitions.values()):
+            for alias in definition.get("aliases", []):
+                scene_ids.setdefault(alias, i)
+        scene_mood = tuple(moods.add(definition["mood"]) for definition in scene_definitions.values())
+        scene_intensity = tuple(intensities.add(definition["intensity"])
+                                for definition in scene_definitions.values())
+
+        emotions = _Interner()
+        contexts = _Interner()
+        contexts.add(None)
+        for emotion in extra_emotions:
+            emotions.add(emotion)
+        for (context, original), (adjusted, _) in overrides.items():
+            contexts.add(context)
+            emotions.add(original)
+            emotions.add(adjusted)
+
+        width = len(emotions.values)
+        override_emotion = list(range(width)) * len(contexts.values)
+        override_adjustment = [1.0] * len(override_emotion)
+        for (context, original), (adjusted, adjustment) in overrides.items():
+            slot = contexts.ids[context] * width + emotions.ids[original]
+            override_emotion[slot] = emotions.ids[adjusted]
+            override_adjustment[slot] = float(adjustment)
+
+        assign = super().__setattr__
+        assign("scenes", scenes)
+        assign("moods", tuple(moods.values))
+        assign("intensities", tuple(intensities.values))
+        assign("contexts", tuple(contexts.values))
+        assign("emotions", tuple(emotions.values))
+        assign("default_scene_id", scene_ids[default_scene])
+        assign("scene_mood", scene_mood)
+        assign("scene_intensity", scene_intensity)
+        assign("override_emotion", tuple(override_emotion))
+        assign("override_adjustment", tuple(override_adjustment))
+        assign("_scene_ids", scene_ids)
+        assign("_context_ids", contexts.ids)
+        assign("_emotion_ids", emotions.ids)
+        assign("_width", width)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledRules is immutable")
+
+    def scene_id(self, name: Optional[str]) -> Optional[int]:
+        """Get the ID of an exact scene name or alias, None if it needs fuzzy matching."""
+        if not name or not isinstance(name, str):
+            return self.default_scene_id
+        return self._scene_ids.get(name)
+
+    def context_id(self, name: Optional[str]) -> int:
+        """Get a context's ID, 0 for no context or a context without overrides."""
+        return self._context_ids.get(name, 0) if name else 0
+
+    def emotion_id(self, name: str) -> Optional[int]:
+        return self._emotion_ids.get(name)
+
+    def resolve(self, scene_id: int, context_id: int, emotion_id: int) -> Tuple[int, float, int, int]:
+        """
+        Resolve an ID triple.
+
+        Returns:
+            tuple: (emotion ID, confidence adjustment, mood ID, intensity ID)
+        """
+        slot = context_id * self._width + emotion_id
+        return (self.override_emotion[slot], self.override_adjustment[slot],
+                self.scene_mood[scene_id], self.scene_intensity[scene_id])
+
+    def resolve_override(self, context: Optional[str], emotion: str) -> Tuple[str, float]:
+        """Get the overridden emotion name and confidence adjustment for a context."""
+        emotion_id = self._emotion_ids.get(emotion)
+        if emotion_id is None or not context:
+            return emotion, 1.0
+        slot = self._context_ids.get(context, 0) * self._width + emotion_id
+        return self.emotions[self.override_emotion[slot]], self.override_adjustment[slot]
+
+
+class _Interner:
+    """Assigns consecutive IDs to values and interns strings."""
+
+    __slots__ = ("ids", "values")
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def add(self, value) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            if isinstance(value, str):
+                value = sys.intern(value)
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+_shared = weakref.WeakValueDictionary()
+_shared_lock = threading.Lock()
+
+
+def compile_rules(scene_definitions: Dict[str, Dict],
+                  overrides: Dict[Tuple[str, str], Tuple[str, float]],
+                  default_scene: str) -> CompiledRules:
+    """
+    Compile scenes and a merged context override table, sharing equal rule sets.
+
+    Args:
+        scene_definitions (dict): SceneManager.scene_definitions
+        overrides (dict): {(context, original_emotion): (adjusted_emotion,
+            confidence_adjustment)}, as built by SceneManager
+        default_scene (str): Scene used for missing or unmatched names
+
+    Returns:
+        CompiledRules: An existing instance if one was compiled from equal
+        inputs and is still in use
+    """
+    key = (
+        tuple((name, definition["mood"], definition["intensity"], tuple(definition.get("aliases", [])))
+              for name, definition in scene_definitions.items()),
+        tuple(sorted(overrides.items(), key=lambda item: (item[0][0], item[0][1]))),
+        default_scene,
+    )
+    with _shared_lock:
+        rules = _shared.get(key)
+        if rules is None:
+            rules = _shared[key] = CompiledRules(scene_definitions, overrides, default_scene)
+        return rules
@@ -1,7 +1,20 @@
-from difflib import get_close_matches
-from typing import Dict, List, Optional, Union
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple, Union
+
+from .rules import CompiledRules, compile_rules
 
 class SceneManager:
+    """
+    Scene and context rules, safe to share between threads.
+
+    Updates are copy-on-write: ``add_scene``, ``add_context`` and
+    ``load_mappings`` build new tables and swap them in with a single
+    assignment, so readers keep iterating the tables they started with and
+    never see a half-applied change. Writers are serialized.
+    """
+
     def __init__(self):
         # Scene definitions with their properties
         self.scene_definitions = {
@@ -209,63 +222,190 @@ class SceneManager:
         self.default_scene = "casual_conversation"
         self.default_context = None
 
+        # Bumped whenever scenes, contexts or mappings change, so callers can
+        # tell when anything they derived from them is stale
+        self.version = 0
+        self._write_lock = threading.Lock()
+
+        # Emotion mappings loaded from EmotionDatabase, merged into the override table
+        self._db_overrides = {}
+        self._override_table = {}
+        self._rebuild_overrides()
+
+        # Scene name/alias -> scene index, plus a bounded memo of fuzzy lookups
+        self.fuzzy_cutoff = 0.8
+        self.fuzzy_cache_size = 1024
+        self._alias_index = {}
+        self._fuzzy_cache = OrderedDict()
+        self._fuzzy_lock = threading.Lock()
+        self._rebuild_alias_index()
+
+        # (version, default scene, CompiledRules) for the current definitions
+        self._compiled = None
+
     def get_scene_context(self, scene_name: str) -> Dict:
         """Get scene context with fuzzy matching for scene names"""
-        # Try exact match first
-        if scene_name in self.scene_definitions:
-            return self.scene_definitions[scene_name]
-        
-        # Try fuzzy matching
-        for scene, definition in self.scene_definitions.items():
-            aliases = definition.get("aliases", [])
-            if not aliases:
+        return self.scene_definitions[self.resolve_scene(scene_name)]
+
+    def resolve_scene(self, scene_name: Optional[str]) -> str:
+        """
+        Resolve a scene name, alias or near-miss spelling to a scene key.
+
+        Exact scene names win over aliases, and an alias shared by several
+        scenes ("battle", "ceremony", "unveiling") belongs to the scene defined
+        first. Anything else is fuzzy matched against every name and alias:
+        the closest one at or above ``fuzzy_cutoff`` wins, ties going to the
+        earlier definition. Unmatched names fall back to the default scene.
+        """
+        if not scene_name or not isinstance(scene_name, str):
+            return self.default_scene
+        scene = self._alias_index.get(scene_name)
+        if scene is not None:
+            return scene
+
+        with self._fuzzy_lock:
+            fuzzy_cache = self._fuzzy_cache
+            scene = fuzzy_cache.get(scene_name)
+            if scene is not None:
+                fuzzy_cache.move_to_end(scene_name)
+                return scene
+        scene = self._fuzzy_match(scene_name) or self.default_scene
+        with self._fuzzy_lock:
+            fuzzy_cache[scene_name] = scene
+            if len(fuzzy_cache) > self.fuzzy_cache_size:
+                fuzzy_cache.popitem(last=False)
+        return scene
+
+    def _fuzzy_match(self, scene_name: str) -> Optional[str]:
+        matcher = SequenceMatcher()
+        matcher.set_seq2(scene_name)
+        best_scene, best_score = None, self.fuzzy_cutoff
+        for alias, scene in self._alias_index.items():
+            matcher.set_seq1(alias)
+            # Cheap upper bounds first, as difflib.get_close_matches does
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
                 continue
-                
-            if scene_name in aliases:
-                return definition
-            
-            # Check if scene_name is similar to any alias
-            matches = get_close_matches(scene_name, aliases, n=1, cutoff=0.8)
-            if matches:
-                return definition
-        
-        # Return default scene if no match found
-        return self.scene_definitions[self.default_scene]
+            score = matcher.ratio()
+            if score > best_score or (best_scene is None and score >= best_score):
+                best_scene, best_score = scene, score
+        return best_scene
+
+    def _rebuild_alias_index(self) -> None:
+        index = {scene: scene for scene in self.scene_definitions}
+        for scene, definition in self.scene_definitions.items():
+            for alias in definition.get("aliases", []):
+                index.setdefault(alias, scene)
+        self._alias_index = index
+        # A fresh memo rather than clear(): lookups still running keep the old one
+        self._fuzzy_cache = OrderedDict()
 
     def get_context_override(self, context: Optional[str], base_emotion: str) -> str:
         """Get emotion override based on context"""
-        if not context or context not in self.context_definitions:
-            return base_emotion
-        
-        context_def = self.context_definitions[context]
-        return context_def["emotion_override"].get(base_emotion, base_emotion)
+        return self.resolve_context_override(context, base_emotion)[0]
+
+    def resolve_context_override(self, context: Optional[str], base_emotion: str) -> Tuple[str, float]:
+        """Get the overridden emotion and its confidence multiplier for a context"""
+        if not context:
+            return base_emotion, 1.0
+        return self._override_table.get((context, base_emotion), (base_emotion, 1.0))
+
+    def load_mappings(self, mappings: Dict[Tuple[str, str], Tuple[str, float]]) -> None:
+        """
+        Merge database emotion mappings into the override table.
+
+        Args:
+            mappings (dict): {(context_name, original_emotion): (adjusted_emotion,
+                confidence_adjustment)}, as returned by EmotionDatabase.get_all_mappings
+        """
+        with self._write_lock:
+            self._db_overrides = dict(mappings)
+            self._rebuild_overrides()
+            self.version += 1
+
+    def _rebuild_overrides(self) -> None:
+        """
+        Precompile context overrides into one (context, emotion) lookup table.
+
+        Priority, highest first:
+        1. ``emotion_override`` entries from ``context_definitions``
+        2. Database emotion mappings
+
+        A database ``confidence_adjustment`` is kept when the in-code override
+        agrees on the adjusted emotion; otherwise in-code overrides use 1.0.
+        """
+        table = dict(self._db_overrides)
+        for context, definition in self.context_definitions.items():
+            for original, adjusted in definition.get("emotion_override", {}).items():
+                db_entry = table.get((context, original))
+                adjustment = db_entry[1] if db_entry and db_entry[0] == adjusted else 1.0
+                table[(context, original)] = (adjusted, adjustment)
+        self._override_table = table
+
+    def compiled_rules(self) -> CompiledRules:
+        """
+        Get the frozen, integer-indexed form of the current scenes and overrides.
+
+        Recompiled only after scenes, contexts, mappings or the default scene
+        change; managers with equal rules share one instance.
+        """
+        compiled = self._compiled
+        version, default_scene = self.version, self.default_scene
+        if compiled is None or compiled[0] != version or compiled[1] != default_scene:
+            # Tagged with the version read before compiling: if a writer slips
+            # in meanwhile, the next call sees a newer version and recompiles
+            rules = compile_rules(self.scene_definitions, self._override_table, default_scene)
+            compiled = self._compiled = (version, default_scene, rules)
+        return compiled[2]
+
+    def resolve_scene_id(self, rules: CompiledRules, scene_name: Optional[str]) -> int:
+        """
+        Get the compiled scene ID for a scene name, alias or near-miss spelling.
+
+        Names that only resolve to a scene added after ``rules`` was compiled
+        get the default scene of ``rules``, so the ID is always valid for it.
+        """
+        scene_id = rules.scene_id(scene_name)
+        if scene_id is None:
+            # The alias index may already be newer than this snapshot
+            scene_id = rules.scene_id(self.resolve_scene(scene_name))
+            if scene_id is None:
+                scene_id = rules.default_scene_id
+        return scene_id
 
     def process_dialogue(self, dialogue: Dict) -> Dict:
         """Process dialogue with scene and context"""
-        # Get scene context
-        scene = dialogue.get("scene", self.default_scene)
-        scene_context = self.get_scene_context(scene)
-        
-        # Get context override
-        context = dialogue.get("context", self.default_context)
-        
+        rules = self.compiled_rules()
+        scene_id = self.resolve_scene_id(rules, dialogue.get("scene"))
+
         # Get base emotion (this will come from the emotion detection model)
         base_emotion = dialogue.get("detected_emotion", "neutral")
-        
+
         # Apply context override
-        final_emotion = self.get_context_override(context, base_emotion)
-        
+        context = dialogue.get("context") or self.default_context
+        final_emotion, confidence_adjustment = rules.resolve_override(context, base_emotion)
+
         return {
             "emotion": final_emotion,
-            "scene_mood": scene_context["mood"],
-            "intensity": scene_context["intensity"],
-            "original_emotion": base_emotion
+            "scene_mood": rules.moods[rules.scene_mood[scene_id]],
+            "intensity": rules.intensities[rules.scene_intensity[scene_id]],
+            "original_emotion": base_emotion,
+            "confidence_adjustment": confidence_adjustment
         }
 
     def add_scene(self, scene_name: str, properties: Dict) -> None:
         """Add a new scene definition"""
-        self.scene_definitions[scene_name] = properties
+        with self._write_lock:
+            definitions = dict(self.scene_definitions)
+            definitions[scene_name] = properties
+            self.scene_definitions = definitions
+            self._rebuild_alias_index()
+            self.version += 1
 
     def add_context(self, context_name: str, properties: Dict) -> None:
         """Add a new context definition"""
-        self.context_definitions[context_name] = properties 
\ No newline at end of file
+        with self._write_lock:
+            definitions = dict(self.context_definitions)
+            definitions[context_name] = properties
+            self.context_definitions = definitions
+            self._rebuild_overrides()
+            self.version += 1 
\ No newline at end of file
@@ -0,0 +1,353 @@
+import re
+import threading
+import zlib
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+class HashedNgramEncoder:
+    """
+    Cheap sentence encoder: hashed word unigrams, word bigrams and character
+    trigrams, L2 normalised, so paraphrases that share most of their words
+    land close together. Deterministic across processes and needs no model.
+
+    Args:
+        dim (int): Embedding width
+        trigram_weight (float): Weight of character trigrams relative to words
+    """
+
+    def __init__(self, dim: int = 256, trigram_weight: float = 0.5):
+        self.dim = dim
+        self.trigram_weight = trigram_weight
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in zip(vectors, texts):
+            words = _WORD.findall(text.lower())
+            for word in words:
+                self._add(row, word, 1.0)
+                padded = f"<{word}>"
+                for i in range(len(padded) - 2):
+                    self._add(row, padded[i:i + 3], self.trigram_weight)
+            for first, second in zip(words, words[1:]):
+                self._add(row, f"{first} {second}", 1.0)
+            norm = np.linalg.norm(row)
+            if norm:
+                row /= norm
+        return vectors
+
+    def _add(self, row: np.ndarray, feature: str, weight: float) -> None:
+        digest = zlib.crc32(feature.encode("utf-8"))
+        # The top bit picks the sign, so colliding features tend to cancel out
+        row[digest % self.dim] += weight if digest & 0x80000000 else -weight
+
+
+class VectorIndex:
+    """
+    Fixed-capacity nearest-neighbour index over unit vectors (cosine similarity).
+
+    Searches are NumPy brute force until ``ivf_threshold`` vectors are stored,
+    then an inverted-file index: vectors are clustered with spherical k-means
+    and copied into one block ordered by cluster, so a query only scans the
+    ``nprobe`` clusters closest to it as contiguous slices. Vectors added
+    after training are scanned brute force until the pending set reaches a
+    quarter of the trained size, which triggers retraining. Once full, the
+    oldest vector is overwritten.
+
+    Training can also be split up so it runs without the caller's lock:
+    ``add(vector, train=False)``, then when ``needs_training()`` take a
+    ``training_snapshot()``, ``fit`` it, and ``install`` the result. Vectors
+    added in between stay searchable brute force.
+    """
+
+    def __init__(self, dim: int, capacity: int, ivf_threshold: int = 4096, nprobe: int = 8,
+                 seed: int = 0):
+        self.dim = dim
+        self.capacity = capacity
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._rng = np.random.default_rng(seed)
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._size = 0
+        self._next = 0
+        # Vectors ever added, so install() can tell which arrived during training
+        self._adds = 0
+        self._centroids = None
+        # Trained vectors ordered by cluster; cluster c is _packed[_offsets[c]:_offsets[c + 1]]
+        self._packed = None
+        self._packed_slots = None
+        self._offsets = None
+        # Vectors written since training, kept contiguous; their packed copies are stale
+        self._tail = None
+        self._tail_slots = None
+        self._pending = 0
+        self._retrain_at = 0
+        self._stale = np.zeros(capacity, dtype=bool)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, vector: np.ndarray, train: bool = True) -> int:
+        """
+        Store a vector and return its slot.
+
+        Args:
+            vector (np.ndarray): Unit vector to store
+            train (bool): Retrain right away when ``needs_training()``;
+                pass False to train from a snapshot later instead
+        """
+        slot = self._next
+        self._vectors[slot] = vector
+        self._next = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self._adds += 1
+        if self._centroids is not None:
+            self._stale[slot] = True
+            if self._pending == len(self._tail):
+                # Only reached while a deferred retrain is running
+                self._tail = np.concatenate([self._tail, np.zeros_like(self._tail)])
+                self._tail_slots = np.concatenate([self._tail_slots, np.zeros_like(self._tail_slots)])
+            self._tail[self._pending] = vector
+            self._tail_slots[self._pending] = slot
+            self._pending += 1
+        if train and self.needs_training():
+            self.install(self.fit(self.training_snapshot()))
+        return slot
+
+    def needs_training(self) -> bool:
+        """Whether enough vectors arrived since the last training to (re)train."""
+        if self._centroids is None:
+            return self._size >= self.ivf_threshold
+        return self._pending >= self._retrain_at
+
+    def search(self, vector: np.ndarray) -> Tuple[int, float]:
+        """
+        Find the most similar stored vector.
+
+        Returns:
+            tuple: (slot, cosine similarity), or (-1, -1.0) when empty
+        """
+        if self._centroids is None:
+            if not self._size:
+                return -1, -1.0
+            similarities = self._vectors[:self._size] @ vector
+            slot = int(np.argmax(similarities))
+            return slot, float(similarities[slot])
+
+        best_slot, best = -1, -1.0
+        nprobe = min(self.nprobe, len(self._centroids))
+        for cluster in np.argpartition(-(self._centroids @ vector), nprobe - 1)[:nprobe]:
+            start, end = self._offsets[cluster], self._offsets[cluster + 1]
+            if start == end:
+                continue
+            similarities = self._packed[start:end] @ vector
+            if self._pending:
+                similarities[self._stale[self._packed_slots[start:end]]] = -np.inf
+            i = int(np.argmax(similarities))
+            if similarities[i] > best:
+                best_slot, best = int(self._packed_slots[start + i]), float(similarities[i])
+        if self._pending:
+            similarities = self._tail[:self._pending] @ vector
+            i = int(np.argmax(similarities))
+            if similarities[i] > best:
+                best_slot, best = int(self._tail_slots[i]), float(similarities[i])
+        return best_slot, best
+
+    def clear(self) -> None:
+        self._size = 0
+        self._next = 0
+        self._adds = 0
+        self._centroids = self._packed = self._packed_slots = self._offsets = None
+        self._tail = self._tail_slots = None
+        self._pending = 0
+        self._stale[:] = False
+
+    def training_snapshot(self) -> tuple:
+        """Copy the stored vectors for ``fit``, which then needs no lock."""
+        return self._vectors[:self._size].copy(), self._adds, int(self._rng.integers(1 << 32))
+
+    @staticmethod
+    def fit(snapshot: tuple, iterations: int = 8) -> tuple:
+        """
+        Cluster a ``training_snapshot()`` with spherical k-means.
+
+        Returns:
+            tuple: The trained clusters, for ``install``
+        """
+        vectors, adds, seed = snapshot
+        size = len(vectors)
+        clusters = max(1, int(np.sqrt(size)))
+        centroids = vectors[np.random.default_rng(seed).choice(size, clusters, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for cluster in range(clusters):
+                members = vectors[assignment == cluster]
+                if len(members):
+                    mean = members.sum(axis=0)
+                    norm = np.linalg.norm(mean)
+                    if norm:
+                        centroids[cluster] = mean / norm
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.searchsorted(assignment[order], np.arange(clusters + 1))
+        return centroids, vectors[order], order, offsets, adds
+
+    def install(self, trained: tuple) -> None:
+        """Swap in clusters from ``fit``; vectors added since the snapshot go to the brute-force tail."""
+        self._centroids, self._packed, self._packed_slots, self._offsets, adds = trained
+        late = min(self._adds - adds, self._size)
+        recent = (self._next - np.arange(late, 0, -1)) % self.capacity
+        self._retrain_at = max(1, len(self._packed) // 4)
+        tail_size = max(self._retrain_at, late)
+        self._tail = np.zeros((tail_size, self.dim), dtype=np.float32)
+        self._tail_slots = np.zeros(tail_size, dtype=np.intp)
+        self._tail[:late] = self._vectors[recent]
+        self._tail_slots[:late] = recent
+        self._pending = late
+        self._stale[:] = False
+        self._stale[recent] = True
+
+
+class SemanticCache:
+    """
+    Near-duplicate cache of emotion distributions for ``EmotionEngine.detect_emotion``.
+
+    Each line is embedded and looked up in a VectorIndex; when the closest
+    cached line has cosine similarity of at least ``threshold``, its stored
+    distribution is returned and the classifier is skipped, so paraphrases
+    such as "Get down!" and "Get down now!" share one model call.
+
+    Index retraining runs on a snapshot, outside the lock, in the ``add``
+    call that crosses the retraining point; other threads only wait for the
+    snapshot copy and the final swap.
+
+    To see what the threshold costs in accuracy, every ``audit_every``-th hit
+    is also run through the classifier and compared with the cached answer;
+    ``stats()`` reports the label agreement and mean total-variation distance
+    of those audits next to the hit rate.
+
+    Args:
+        threshold (float): Minimum cosine similarity for a hit
+        max_size (int): Lines kept; the oldest is replaced once full
+        encoder (callable, optional): ``encoder(texts)`` returning unit
+            vectors of shape (len(texts), dim), defaults to HashedNgramEncoder
+        audit_every (int): Audit one hit in this many, 0 to disable
+        ivf_threshold (int): Index size at which brute force gives way to IVF
+    """
+
+    def __init__(self, threshold: float = 0.85, max_size: int = 20000,
+                 encoder: Optional[Callable] = None, audit_every: int = 0,
+                 ivf_threshold: int = 4096):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.threshold = threshold
+        self.max_size = max_size
+        self.encoder = encoder or HashedNgramEncoder()
+        self.audit_every = audit_every
+        self.ivf_threshold = ivf_threshold
+        self.labels = None
+        self.hits = 0
+        self.misses = 0
+        self.audits = 0
+        self.audit_agreements = 0
+        self.audit_drift = 0.0
+        self._hit_similarity = 0.0
+        self._index = None
+        self._distributions = None
+        self._lock = threading.Lock()
+        # Set while one add() retrains the index outside the lock
+        self._training = False
+
+    def embed(self, text: str) -> np.ndarray:
+        return np.asarray(self.encoder([text])[0], dtype=np.float32)
+
+    def lookup(self, text: str, vector: np.ndarray = None) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Find a cached distribution for a line or a close paraphrase.
+
+        Returns:
+            tuple: (distribution, similarity), or None on a miss
+        """
+        vector = self.embed(text) if vector is None else vector
+        with self._lock:
+            if self._index is not None:
+                slot, similarity = self._index.search(vector)
+                if slot >= 0 and similarity >= self.threshold:
+                    self.hits += 1
+                    self._hit_similarity += similarity
+                    return self._distributions[slot].copy(), similarity
+            self.misses += 1
+            return None
+
+    def add(self, text: str, labels: Sequence[str], distribution: np.ndarray,
+            vector: np.ndarray = None) -> None:
+        """Cache the distribution the classifier gave for a line."""
+        vector = self.embed(text) if vector is None else vector
+        with self._lock:
+            if self.labels != list(labels):
+                # New label set, e.g. a different model: start over
+                self.labels = list(labels)
+                self._index = VectorIndex(len(vector), self.max_size, self.ivf_threshold)
+                self._distributions = np.zeros((self.max_size, len(labels)), dtype=np.float32)
+            index = self._index
+            slot = index.add(vector, train=False)
+            self._distributions[slot] = distribution
+            if self._training or not index.needs_training():
+                return
+            self._training = True
+            snapshot = index.training_snapshot()
+        # Lookups and adds carry on against the current clusters while new ones are trained
+        trained = None
+        try:
+            trained = VectorIndex.fit(snapshot)
+        finally:
+            with self._lock:
+                self._training = False
+                if trained is not None and self._index is index:
+                    index.install(trained)
+
+    def should_audit(self) -> bool:
+        """Whether the latest hit should also be checked against the classifier."""
+        return bool(self.audit_every) and self.hits % self.audit_every == 0
+
+    def record_audit(self, cached: np.ndarray, fresh: np.ndarray) -> None:
+        """Compare a cached distribution with the classifier's answer for the same line."""
+        with self._lock:
+            self.audits += 1
+            self.audit_agreements += int(np.argmax(cached) == np.argmax(fresh))
+            self.audit_drift += 0.5 * float(np.abs(np.asarray(cached) - np.asarray(fresh)).sum())
+
+    def stats(self) -> dict:
+        """
+        Get hit-rate and accuracy-drift counters for tuning ``threshold``.
+
+        Returns:
+            dict: Hits, misses, hit rate, mean hit similarity, audits, the share
+            of audits whose label matched, their mean total-variation drift,
+            and the cache size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "mean_hit_similarity": self._hit_similarity / self.hits if self.hits else 0.0,
+                "audits": self.audits,
+                "audit_agreement": self.audit_agreements / self.audits if self.audits else None,
+                "mean_drift": self.audit_drift / self.audits if self.audits else None,
+                "size": len(self._index) if self._index is not None else 0,
+                "threshold": self.threshold,
+            }
+
+    def clear(self) -> None:
+        """Drop every cached line and reset the counters."""
+        with self._lock:
+            self.labels = None
+            self._index = None
+            self._distributions = None
+            self.hits = self.misses = self.audits = self.audit_agreements = 0
+            self.audit_drift = self._hit_similarity = 0.0
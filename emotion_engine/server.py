@@ -0,0 +1,285 @@
+"""
+Local HTTP/JSON inference server sharing one warm EmotionEngine between clients.
+
+Endpoints:
+    POST /v1/detect        {"text": ..., "context": ..., "scene": ...}
+    POST /v1/detect/batch  {"lines": [{"text": ..., "context": ..., "scene": ...}, ...]}
+    GET  /v1/contexts      Contexts from EmotionDatabase.get_all_contexts
+    GET  /healthz          200 while the process is serving
+    GET  /readyz           200 once the model is loaded and warmed up, 503 before
+    GET  /metrics          Prometheus text format
+
+Usage:
+    python -m emotion_engine.server --port 8080 --max-batch-size 32 --max-wait-ms 5
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from .batching import MicroBatcher
+from .engine import EmotionEngine
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+GET_ROUTES = ("/healthz", "/readyz", "/metrics", "/v1/contexts")
+POST_ROUTES = ("/v1/detect", "/v1/detect/batch")
+
+
+class _TooLarge(ValueError):
+    """A request body or batch over the server's limits, answered with 413."""
+
+
+class ServerMetrics:
+    """Request counters and a latency histogram, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.errors = {}
+        self.lines = 0
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+    def observe(self, endpoint: str, seconds: float, status: int, lines: int = 0) -> None:
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            if status >= 400:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            self.lines += lines
+            self.latency_sum += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.latency_counts[i] += 1
+                    break
+            else:
+                self.latency_counts[-1] += 1
+
+    def render(self, batcher: MicroBatcher, ready: bool, cache_stats: Dict) -> str:
+        with self._lock:
+            lines = [
+                "# TYPE emotion_requests_total counter",
+                *(f'emotion_requests_total{{endpoint="{e}"}} {n}' for e, n in sorted(self.requests.items())),
+                "# TYPE emotion_request_errors_total counter",
+                *(f'emotion_request_errors_total{{endpoint="{e}"}} {n}' for e, n in sorted(self.errors.items())),
+                "# TYPE emotion_lines_total counter",
+                f"emotion_lines_total {self.lines}",
+                "# TYPE emotion_request_seconds histogram",
+            ]
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, self.latency_counts):
+                cumulative += count
+                lines.append(f'emotion_request_seconds_bucket{{le="{bound}"}} {cumulative}')
+            cumulative += self.latency_counts[-1]
+            lines += [
+                f'emotion_request_seconds_bucket{{le="+Inf"}} {cumulative}',
+                f"emotion_request_seconds_sum {self.latency_sum}",
+                f"emotion_request_seconds_count {cumulative}",
+            ]
+        stats = batcher.stats()
+        lines += [
+            "# TYPE emotion_batches_total counter",
+            f"emotion_batches_total {stats['batches']}",
+            "# TYPE emotion_batched_lines_total counter",
+            f"emotion_batched_lines_total {stats['requests']}",
+            "# TYPE emotion_model_ready gauge",
+            f"emotion_model_ready {int(ready)}",
+        ]
+        if cache_stats:
+            lines += [
+                "# TYPE emotion_cache_hits_total counter",
+                f"emotion_cache_hits_total {cache_stats['hits']}",
+                "# TYPE emotion_cache_misses_total counter",
+                f"emotion_cache_misses_total {cache_stats['misses']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class EmotionServer(ThreadingHTTPServer):
+    """HTTP server owning one EmotionEngine and the batcher in front of it."""
+
+    daemon_threads = True
+
+    def __init__(self, address, engine: EmotionEngine = None, max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, initialize_options: Optional[Dict] = None,
+                 max_body_bytes: int = 1 << 20, max_lines: int = 1024):
+        super().__init__(address, EmotionRequestHandler)
+        self.engine = engine if engine is not None else EmotionEngine(batch_size=max_batch_size)
+        # Larger bodies and batches are refused with 413 before any work is queued
+        self.max_body_bytes = max_body_bytes
+        self.max_lines = max_lines
+        self.batcher = MicroBatcher(self.engine, max_batch_size, max_wait_ms).start()
+        self.metrics = ServerMetrics()
+        self.load_error = None
+        self._initialize_options = initialize_options or {}
+        # Load the model in the background so /healthz answers straight away
+        self._loader = threading.Thread(target=self._load_model, name="emotion-model-loader", daemon=True)
+        self._loader.start()
+
+    def _load_model(self) -> None:
+        try:
+            self.engine.initialize(**self._initialize_options)
+        except Exception as e:
+            self.load_error = str(e)
+
+    def is_ready(self) -> bool:
+        """Whether the model is loaded and warmed up, so requests will not wait for it."""
+        return self.engine.is_ready()
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.batcher.close()
+
+
+class EmotionRequestHandler(BaseHTTPRequestHandler):
+    server: EmotionServer
+
+    def do_GET(self):
+        start = time.perf_counter()
+        if self.path == "/healthz":
+            status, body = 200, {"status": "ok"}
+        elif self.path == "/readyz":
+            ready = self.server.is_ready()
+            status = 200 if ready else 503
+            body = {"ready": ready}
+            if self.server.load_error:
+                body["error"] = self.server.load_error
+        elif self.path == "/metrics":
+            text = self.server.metrics.render(
+                self.server.batcher, self.server.is_ready(), self.server.engine.get_cache_stats()
+            )
+            self._send(200, text.encode("utf-8"), "text/plain; version=0.0.4")
+            return
+        elif self.path == "/v1/contexts":
+            status, body = 200, {"contexts": [
+                {"type": context_type, "name": name, "description": description}
+                for context_type, name, description in self.server.engine.get_available_contexts()
+            ]}
+        else:
+            status, body = 404, {"error": f"Unknown path {self.path}"}
+        self._send_json(status, body, start)
+
+    def do_POST(self):
+        start = time.perf_counter()
+        if self.path not in POST_ROUTES:
+            self._send_json(404, {"error": f"Unknown path {self.path}"}, start)
+            return
+        try:
+            lines = self._read_lines()
+        except _TooLarge as e:
+            # The body may be left unread, so the connection can't be reused
+            self.close_connection = True
+            self._send_json(413, {"error": f"Request too large: {e}"}, start)
+            return
+        except ValueError as e:
+            self.close_connection = True
+            self._send_json(400, {"error": f"Bad request: {e}"}, start)
+            return
+        try:
+            if self.path == "/v1/detect":
+                body = self.server.batcher.detect(*lines[0])
+            else:
+                futures = [self.server.batcher.submit(*line) for line in lines]
+                body = {"results": [future.result() for future in futures]}
+            payload = json.dumps(body).encode("utf-8")
+        except Exception as e:
+            self._send_json(500, {"error": f"Internal error: {e}"}, start)
+            return
+        self._send(200, payload, "application/json")
+        self._observe(200, start, len(lines))
+
+    def _read_lines(self) -> List[Tuple]:
+        """
+        Parse and check a detect request body.
+
+        Returns:
+            list: One ``(text, context, scene)`` tuple per line
+
+        Raises:
+            ValueError: If the body is not valid JSON of the expected shape,
+                or is over the server's ``max_body_bytes`` or ``max_lines``
+        """
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            raise ValueError("invalid Content-Length") from None
+        if length < 0:
+            raise ValueError("invalid Content-Length")
+        if length > self.server.max_body_bytes:
+            raise _TooLarge(f"body over {self.server.max_body_bytes} bytes")
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/v1/detect":
+            items = [payload]
+        elif isinstance(payload, dict) and isinstance(payload.get("lines"), list):
+            items = payload["lines"]
+        else:
+            raise ValueError('expected {"lines": [...]}')
+        if len(items) > self.server.max_lines:
+            raise _TooLarge(f"more than {self.server.max_lines} lines")
+        lines = []
+        for item in items:
+            if not isinstance(item, dict):
+                raise ValueError("each line must be a JSON object")
+            if not isinstance(item.get("text"), str):
+                raise ValueError('"text" must be a string')
+            for field in ("context", "scene"):
+                if item.get(field) is not None and not isinstance(item[field], str):
+                    raise ValueError(f'"{field}" must be a string')
+            lines.append((item["text"], item.get("context"), item.get("scene")))
+        return lines
+
+    def _send_json(self, status: int, body: Dict, start: float, lines: int = 0) -> None:
+        self._send(status, json.dumps(body).encode("utf-8"), "application/json")
+        self._observe(status, start, lines)
+
+    def _observe(self, status: int, start: float, lines: int = 0) -> None:
+        # Unknown paths share one label, so random 404s can't create new series
+        endpoint = self.path if self.path in GET_ROUTES + POST_ROUTES else "other"
+        self.server.metrics.observe(endpoint, time.perf_counter() - start, status, lines)
+
+    def _send(self, status: int, payload: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate a busy server's output
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve emotion detection over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--backend", default=None,
+                        help="transformers, onnx or stub; defaults to EMOTION_ENGINE_BACKEND, else transformers")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-body-bytes", type=int, default=1 << 20,
+                        help="Larger request bodies are refused with 413")
+    parser.add_argument("--max-lines", type=int, default=1024,
+                        help="Lines accepted in one /v1/detect/batch request")
+    parser.add_argument("--no-warmup", action="store_true",
+                        help="Report ready as soon as the model is loaded")
+    args = parser.parse_args()
+
+    server = EmotionServer((args.host, args.port), max_batch_size=args.max_batch_size,
+                           max_wait_ms=args.max_wait_ms,
+                           initialize_options={"backend": args.backend, "warmup": not args.no_warmup},
+                           max_body_bytes=args.max_body_bytes, max_lines=args.max_lines)
+    print(f"Serving emotion detection on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from .engine import EmotionEngine
+
+
+class _StateTable:
+    """Exponentially smoothed emotion vectors, one row per key, in a growable array."""
+
+    def __init__(self, width: int, capacity: int = 16):
+        self.rows: Dict[str, int] = {}
+        self.values = np.zeros((capacity, width))
+
+    def row(self, key: str) -> Optional[int]:
+        return self.rows.get(key)
+
+    def update(self, key: str, vector: np.ndarray, alpha: float) -> int:
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.rows)
+            if row == len(self.values):
+                self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+            self.rows[key] = row
+            self.values[row] = vector
+        else:
+            state = self.values[row]
+            state *= 1.0 - alpha
+            state += alpha * vector
+        return row
+
+
+class NarrativeSession:
+    """
+    Stateful wrapper around EmotionEngine for long scenes.
+
+    Keeps an exponentially smoothed emotion distribution per speaker and per
+    scene, updated in O(1) per line. A scene only gets a new
+    ``mood_suggestion`` when its smoothed leading emotion overtakes the
+    current one by at least ``hysteresis``, so a single outlier line does not
+    trigger lighting and music changes.
+    """
+
+    def __init__(self, engine: EmotionEngine = None, alpha: float = 0.3, hysteresis: float = 0.15,
+                 scene_weight: float = None):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.engine = engine if engine is not None else EmotionEngine()
+        self.alpha = alpha
+        self.hysteresis = hysteresis
+        self.scene_weight = scene_weight
+        self.labels = None
+        self._speakers = None
+        self._scenes = None
+        # Index of the emotion whose mood cue each scene row currently shows, -1 for none
+        self._scene_moods = np.full(16, -1, dtype=np.intp)
+
+    def process(self, text: str, speaker: Optional[str] = None, scene: Optional[str] = None,
+                context: Optional[str] = None) -> Dict:
+        """
+        Detect the emotion of one line and fold it into the session state.
+
+        Returns:
+            dict: The ``detect_emotion`` result for the line, where
+            ``mood_suggestion`` is only set when the scene's mood changes (None
+            otherwise), plus ``mood_changed``, ``scene_emotion`` and
+            ``speaker_emotion`` from the smoothed state
+        """
+        engine = self.engine
+        scene_key = engine._scene_manager.resolve_scene(scene)
+        if not engine._is_valid_text(text):
+            result = engine._neutral_result()
+            result.update(mood_suggestion=None, mood_changed=False,
+                          scene_emotion=self._scene_emotion(scene_key),
+                          speaker_emotion=self._leading(self._speakers, speaker))
+            return result
+
+        # Same cached, chunked and blended distribution detect_emotion uses
+        scene_weight = engine.scene_weight if self.scene_weight is None else self.scene_weight
+        labels, distribution, chunks = engine._blended_distribution([text], [scene], 1, scene_weight)
+        if self.labels is None:
+            self.labels = labels
+            self._speakers = _StateTable(len(labels))
+            self._scenes = _StateTable(len(labels))
+        vector = distribution[0]
+        best = int(vector.argmax())
+        result = engine._build_result(labels[best], float(vector[best]), context, scene)
+        if 0 in chunks:
+            result["chunks"] = chunks[0]
+
+        if speaker is not None:
+            self._speakers.update(speaker, vector, self.alpha)
+        row = self._scenes.update(scene_key, vector, self.alpha)
+        mood_changed = self._update_scene_mood(row)
+        scene_emotion = labels[self._scene_moods[row]]
+        result.update(
+            mood_suggestion=engine.get_mood_suggestion(scene_emotion) if mood_changed else None,
+            mood_changed=mood_changed,
+            scene_emotion=scene_emotion,
+            speaker_emotion=self._leading(self._speakers, speaker)
+        )
+        return result
+
+    def _update_scene_mood(self, row: int) -> bool:
+        if row >= len(self._scene_moods):
+            grown = np.full(2 * len(self._scene_moods), -1, dtype=np.intp)
+            grown[:len(self._scene_moods)] = self._scene_moods
+            self._scene_moods = grown
+        state = self._scenes.values[row]
+        leader = int(state.argmax())
+        current = self._scene_moods[row]
+        if current == leader:
+            return False
+        if current >= 0 and state[leader] - state[current] < self.hysteresis:
+            return False
+        self._scene_moods[row] = leader
+        return True
+
+    def _scene_emotion(self, scene_key: str) -> Optional[str]:
+        """The emotion whose mood cue the scene currently shows, if any."""
+        row = self._scenes.row(scene_key) if self._scenes is not None else None
+        if row is None or self._scene_moods[row] < 0:
+            return None
+        return self.labels[self._scene_moods[row]]
+
+    def _leading(self, table: Optional[_StateTable], key: Optional[str]) -> Optional[str]:
+        row = table.row(key) if table is not None and key is not None else None
+        if row is None:
+            return None
+        return self.labels[int(table.values[row].argmax())]
+
+    def get_state(self, speaker: Optional[str] = None, scene: Optional[str] = None) -> Dict[str, float]:
+        """
+        Get the smoothed emotion distribution for a speaker or a scene.
+
+        Returns:
+            dict: {emotion: probability}, empty if nothing was seen yet
+        """
+        if speaker is not None:
+            table, key = self._speakers, speaker
+        else:
+            table, key = self._scenes, self.engine._scene_manager.resolve_scene(scene)
+        row = table.row(key) if table is not None else None
+        if row is None:
+            return {}
+        return dict(zip(self.labels, table.values[row].tolist()))
+
+    def reset(self) -> None:
+        """Forget every speaker and scene state."""
+        self.labels = None
+        self._speakers = None
+        self._scenes = None
+        self._scene_moods = np.full(16, -1, dtype=np.intp)
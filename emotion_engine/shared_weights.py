@@ -0,0 +1,126 @@
+"""
+Share model weights between worker processes instead of copying them into each.
+
+Two ways to keep one physical copy of the weights per host:
+
+- ``mmap_weights=True`` for the transformers backend maps the checkpoint's
+  ``model.safetensors`` into memory and points the model's parameters at it.
+  Every process that maps the same file shares the page cache, whatever the
+  multiprocessing start method.
+- ``process_dialogue_stream(..., share_model=True)`` loads the engine once in
+  the parent and forks the workers, which then share its pages copy-on-write.
+  ``prepare_for_fork`` moves the parent's objects out of the garbage
+  collector's reach, so collections in the children do not dirty those pages.
+"""
+import gc
+import json
+import mmap
+import struct
+import sys
+from itertools import chain
+from pathlib import Path
+from typing import Dict
+
+# safetensors dtype names -> torch dtype attribute names
+_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+def find_safetensors(model: str) -> Path:
+    """Locate ``model.safetensors`` for a local model directory or a Hugging Face model name."""
+    local = Path(model) / "model.safetensors"
+    if local.is_file():
+        return local
+    from transformers.utils import cached_file
+    return Path(cached_file(model, "model.safetensors"))
+
+
+def mmap_safetensors(path: str) -> Dict:
+    """
+    Open a safetensors file as tensors backed directly by a memory map.
+
+    The mapping is private copy-on-write: pages are read from the shared page
+    cache and only copied if a process writes to them, which inference never
+    does.
+
+    Returns:
+        dict: {tensor name: torch.Tensor}
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _DTYPES[info["dtype"]])
+        start, end = info["data_offsets"]
+        if start == end:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        count = (end - start) // torch.empty((), dtype=dtype).element_size()
+        tensor = torch.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + start)
+        tensors[name] = tensor.reshape(info["shape"])
+    return tensors
+
+
+def attach_mmap_weights(model, path: str) -> int:
+    """
+    Point a loaded torch model's parameters at a memory-mapped checkpoint.
+
+    Only tensors whose name, shape and dtype match the model are swapped; the
+    model's private copies of those are then freed. Recent transformers
+    releases already map safetensors checkpoints when no dtype conversion is
+    needed, in which case this mainly guarantees the sharing.
+
+    Args:
+        model (torch.nn.Module): The loaded model
+        path (str): Its ``model.safetensors`` file
+
+    Returns:
+        int: Number of tensors now backed by the file
+    """
+    mapped = mmap_safetensors(path)
+    attached = 0
+    # Tied weights are one Parameter object, so swapping it once covers every use
+    for name, tensor in chain(model.named_parameters(), model.named_buffers()):
+        source = mapped.get(name)
+        if source is not None and source.shape == tensor.shape and source.dtype == tensor.dtype:
+            tensor.data = source
+            attached += 1
+    return attached
+
+
+def prepare_for_fork() -> None:
+    """Collect garbage, then freeze surviving objects so forked children leave their pages shared."""
+    gc.collect()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+
+
+def memory_usage() -> Dict[str, int]:
+    """
+    Get this process's resident and proportional set size in bytes.
+
+    PSS splits each shared page between the processes mapping it, so summing
+    PSS over workers gives their true combined footprint. PSS is only
+    available on Linux; elsewhere both are the peak RSS from getrusage.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        rss = int(fields["Rss"].split()[0]) * 1024
+        pss = int(fields["Pss"].split()[0]) * 1024
+        return {"rss": rss, "pss": pss}
+    except (OSError, KeyError, ValueError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        rss = rss if sys.platform == "darwin" else rss * 1024
+        return {"rss": rss, "pss": rss}
@@ -0,0 +1,221 @@
+"""
+Lazy, constant-memory processing of unbounded dialogue streams.
+
+Each stage is a generator that takes an iterator of work items and yields
+them again, so stages can be chained, replaced or extended:
+
+    normalize -> cache_lookup -> batched_inference -> remap -> mood_lookup
+
+``stream_dialogue`` chains them for any iterable of dialogue dicts and
+``astream_dialogue`` does the same for async iterables. Output items are
+the input dicts extended with a ``result`` dict, in input order, equal to
+what ``detect_emotion`` returns for the line.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, Iterator
+
+from .engine import EmotionEngine
+
+
+def normalize(dialogues: Iterable[Dict], engine: EmotionEngine) -> Iterator[Dict]:
+    """Wrap each dialogue dict in a work item, answering empty lines right away."""
+    for dialogue in dialogues:
+        text = dialogue.get("text")
+        valid = engine._is_valid_text(text)
+        yield {
+            "dialogue": dialogue,
+            "text": text if valid else None,
+            "prediction": None,
+            "result": None if valid else engine._neutral_result()
+        }
+
+
+def cache_lookup(items: Iterable[Dict], engine: EmotionEngine) -> Iterator[Dict]:
+    """
+    Fill in predictions for lines the engine's inference cache already knows.
+
+    Only engines that classify every line whole and unblended are looked up
+    here; with ``scene_weight``, ``long_input`` or a semantic cache set the
+    lookup happens inside ``detect_emotions`` instead, so results match
+    ``detect_emotion``.
+    """
+    cache = engine._cache
+    if cache is not None and (engine.scene_weight > 0 or engine.long_input is not None
+                              or engine.semantic_cache is not None):
+        cache = None
+    for item in items:
+        if cache is not None and item["result"] is None:
+            item["prediction"] = cache.get(item["text"])
+        yield item
+
+
+def _detect(engine: EmotionEngine, items: list, batch_size: int) -> list:
+    """Classify work items the way ``detect_emotion`` would."""
+    texts = [item["text"] for item in items]
+    contexts = [item["dialogue"].get("context") for item in items]
+    scenes = [item["dialogue"].get("scene") for item in items]
+    if engine.semantic_cache is not None:
+        # Near-duplicate lookups are made line by line
+        return [engine.detect_emotion(*line) for line in zip(texts, contexts, scenes)]
+    return engine.detect_emotions(texts, contexts, scenes, batch_size)
+
+
+def batched_inference(items: Iterable[Dict], engine: EmotionEngine, batch_size: int = 32,
+                      max_buffer: int = None) -> Iterator[Dict]:
+    """
+    Classify lines without a prediction, ``batch_size`` distinct lines at a time.
+
+    Batches go through ``detect_emotions``, so scene blending, long-input
+    chunking and the inference cache apply as in ``detect_emotion``. Lines that already have an answer but are queued behind a line waiting for
+    the model are held back to preserve order; the buffer is flushed early once
+    it holds ``max_buffer`` lines (default ``4 * batch_size``).
+    """
+    max_buffer = max_buffer or 4 * batch_size
+    buffer, waiting = [], {}
+
+    def flush():
+        pending = [item for group in waiting.values() for item in group]
+        if pending:
+            for item, result in zip(pending, _detect(engine, pending, batch_size)):
+                item["result"] = result
+        flushed = list(buffer)
+        buffer.clear()
+        waiting.clear()
+        return flushed
+
+    for item in items:
+        if item["result"] is None and item["prediction"] is None:
+            waiting.setdefault(item["text"], []).append(item)
+        if not waiting:
+            # Nothing ahead of this line is waiting, so it can go straight through
+            yield item
+            continue
+        buffer.append(item)
+        if len(waiting) >= batch_size or len(buffer) >= max_buffer:
+            yield from flush()
+    yield from flush()
+
+
+def remap(items: Iterable[Dict], engine: EmotionEngine) -> Iterator[Dict]:
+    """Apply the scene and context remapping to predictions from the cache lookup."""
+    for item in items:
+        if item["result"] is None:
+            label, score = item["prediction"]
+            dialogue = item["dialogue"]
+            item["result"] = engine._remap_prediction(label, score, dialogue.get("context"), dialogue.get("scene"))
+        yield item
+
+
+def mood_lookup(items: Iterable[Dict], engine: EmotionEngine) -> Iterator[Dict]:
+    """Attach the mood suggestion and emit the finished dialogue dicts."""
+    for item in items:
+        result = item["result"]
+        if result["mood_suggestion"] is None:
+            engine._attach_mood(result)
+        yield dict(item["dialogue"], result=result)
+
+
+def stream_dialogue(engine: EmotionEngine, dialogues: Iterable[Dict], batch_size: int = 32,
+                    max_buffer: int = None) -> Iterator[Dict]:
+    """
+    Lazily detect emotions for an iterable of dialogue dicts.
+
+    Lines are pulled from ``dialogues`` only as results are consumed, and
+    at most ``max_buffer`` lines are held back, so memory stays constant for
+    unbounded sources. Use a small ``batch_size`` for live playback, where a
+    line should not wait for later ones.
+
+    Args:
+        engine (EmotionEngine): The engine to run
+        dialogues (iterable): Dicts with text and optional scene/context/speaker
+        batch_size (int): Lines per forward pass
+        max_buffer (int, optional): Lines held back while a batch fills,
+            defaults to ``4 * batch_size``
+
+    Yields:
+        dict: Each input dict extended with a ``result`` dict
+    """
+    items = normalize(dialogues, engine)
+    items = cache_lookup(items, engine)
+    items = batched_inference(items, engine, batch_size, max_buffer)
+    items = remap(items, engine)
+    return mood_lookup(items, engine)
+
+
+async def _iterate(source) -> AsyncIterator[Dict]:
+    if hasattr(source, "__aiter__"):
+        async for dialogue in source:
+            yield dialogue
+    else:
+        for dialogue in source:
+            yield dialogue
+
+
+async def astream_dialogue(engine: EmotionEngine, dialogues, batch_size: int = 32,
+                           max_wait_ms: float = 20.0, max_buffer: int = 256) -> AsyncIterator[Dict]:
+    """
+    Async version of ``stream_dialogue`` for sockets, log tails and other async sources.
+
+    A reader task pulls from ``dialogues`` into a queue of at most
+    ``max_buffer`` lines and blocks when it is full, so a slow consumer
+    slows the source down instead of growing memory. A batch is processed
+    on a worker thread once ``batch_size`` lines are queued, or once the
+    first of them has waited ``max_wait_ms``.
+
+    Args:
+        engine (EmotionEngine): The engine to run
+        dialogues: Async iterable or plain iterable of dialogue dicts
+        batch_size (int): Lines per forward pass
+        max_wait_ms (float): Longest a line waits for its batch to fill
+        max_buffer (int): Lines read ahead of the consumer
+
+    Yields:
+        dict: Each input dict extended with a ``result`` dict
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max_buffer)
+    done = object()
+
+    async def read():
+        try:
+            async for dialogue in _iterate(dialogues):
+                await queue.put(dialogue)
+        except Exception:
+            # Wake the consumer; the error is re-raised when the reader is awaited
+            await queue.put(done)
+            raise
+        await queue.put(done)
+
+    reader = asyncio.ensure_future(read())
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emotion-stream")
+    try:
+        finished = False
+        while not finished:
+            dialogue = await queue.get()
+            if dialogue is done:
+                break
+            batch = [dialogue]
+            deadline = loop.time() + max_wait_ms / 1000.0
+            while len(batch) < batch_size:
+                timeout = deadline - loop.time()
+                if queue.empty() and timeout <= 0:
+                    break
+                try:
+                    dialogue = queue.get_nowait() if not queue.empty() else \
+                        await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if dialogue is done:
+                    finished = True
+                    break
+                batch.append(dialogue)
+            results = await loop.run_in_executor(
+                executor, lambda: list(stream_dialogue(engine, batch, len(batch)))
+            )
+            for result in results:
+                yield result
+        await reader
+    finally:
+        reader.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,246 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Tokenizer calls CachedTokenizer can serve; anything else goes straight to the tokenizer
+_UNPADDED = (False, None, "do_not_pad")
+_PADDED = (True, "longest")
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of tokenized lines, shared by every tokenizer call.
+
+    Each entry is the unpadded encoding of one line, ``{field: tuple of ints}``
+    (input_ids, attention_mask and any other per-token field), keyed on the
+    text and the truncation settings it was tokenized with. Safe to share
+    between threads.
+
+    Args:
+        max_size (int): Lines kept before the least recently used is dropped
+    """
+
+    def __init__(self, max_size: int = 10000):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple) -> Optional[Dict[str, tuple]]:
+        with self._lock:
+            encoding = self._entries.get(key)
+            if encoding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return encoding
+
+    def put(self, key: Tuple, encoding: Dict[str, tuple]) -> None:
+        with self._lock:
+            self._entries[key] = encoding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Get token cache counters.
+
+        Returns:
+            dict: Hits, misses, hit rate and size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+class CachedTokenizer:
+    """
+    Tokenizer proxy that serves lines it has seen before from a TokenCache.
+
+    Installed in place of a backend's ``tokenizer`` (see attach_token_cache),
+    it handles the calls the transformers pipeline and OnnxBackend make, one
+    line or a batch padded to the longest line, as NumPy or PyTorch tensors.
+    Lines missing from the cache are tokenized together in one call. Any
+    other call, and every other attribute, goes to the wrapped tokenizer.
+
+    Args:
+        tokenizer: A transformers tokenizer
+        cache (TokenCache, optional): Where encodings are kept; without one
+            every line is tokenized
+    """
+
+    def __init__(self, tokenizer, cache: TokenCache = None):
+        self.wrapped = tokenizer
+        self.cache = cache
+
+    def __getattr__(self, name):
+        if name == "wrapped":
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+
+    def __call__(self, text=None, text_pair=None, return_tensors=None, padding=False,
+                 truncation=None, max_length=None, **kwargs):
+        single = isinstance(text, str)
+        cacheable = (
+            text_pair is None and not kwargs
+            and (single or (isinstance(text, (list, tuple)) and all(isinstance(t, str) for t in text)))
+            and ((return_tensors in ("np", "pt") and padding in _UNPADDED + _PADDED)
+                 or (return_tensors is None and single and padding in _UNPADDED))
+        )
+        if not cacheable:
+            return self.wrapped(text, text_pair=text_pair, return_tensors=return_tensors, padding=padding,
+                                truncation=truncation, max_length=max_length, **kwargs)
+        encodings = self.encode([text] if single else list(text), truncation, max_length)
+        if return_tensors is None:
+            return {name: list(values) for name, values in encodings[0].items()}
+        if not single and padding in _UNPADDED and len({len(e["input_ids"]) for e in encodings}) > 1:
+            # Unpadded lines of different lengths cannot be stacked; let the tokenizer raise its error
+            return self.wrapped(text, return_tensors=return_tensors, padding=padding,
+                                truncation=truncation, max_length=max_length)
+        batch = pad(encodings, self.wrapped.pad_token_id or 0, getattr(self.wrapped, "padding_side", "right"))
+        if return_tensors == "pt":
+            import torch
+            return {name: torch.from_numpy(values) for name, values in batch.items()}
+        return batch
+
+    def encode(self, texts: Sequence[str], truncation=True, max_length: Optional[int] = None) -> List[Dict]:
+        """
+        Tokenize lines without padding, serving repeated ones from the cache.
+
+        Returns:
+            list: One ``{field: tuple of ints}`` encoding per line
+        """
+        cache = self.cache
+        encodings = [None] * len(texts)
+        missing = {}
+        for i, text in enumerate(texts):
+            cached = cache.get((text, truncation, max_length)) if cache is not None else None
+            if cached is None:
+                missing.setdefault(text, []).append(i)
+            else:
+                encodings[i] = cached
+        if missing:
+            fresh = self.wrapped(list(missing), truncation=truncation, max_length=max_length)
+            fields = list(fresh.keys())
+            for row, (text, positions) in enumerate(missing.items()):
+                encoding = {field: tuple(fresh[field][row]) for field in fields}
+                if cache is not None:
+                    cache.put((text, truncation, max_length), encoding)
+                for i in positions:
+                    encodings[i] = encoding
+        return encodings
+
+
+def pad(encodings: Sequence[Dict], pad_token_id: int = 0, padding_side: str = "right") -> Dict:
+    """
+    Pad unpadded encodings to the longest one.
+
+    Returns:
+        dict: ``{field: np.ndarray of int64, shape (len(encodings), longest)}``
+    """
+    import numpy as np
+
+    width = max(len(encoding["input_ids"]) for encoding in encodings)
+    batch = {}
+    for field in encodings[0]:
+        values = np.full((len(encodings), width), pad_token_id if field == "input_ids" else 0, dtype=np.int64)
+        for row, encoding in zip(values, encodings):
+            tokens = encoding[field]
+            if padding_side == "left":
+                row[width - len(tokens):] = tokens
+            else:
+                row[:len(tokens)] = tokens
+        batch[field] = values
+    return batch
+
+
+class TokenizedBatch:
+    """
+    Lines tokenized ahead of inference by ``EmotionEngine.tokenize``.
+
+    Args:
+        texts (list): The original lines
+        inputs (dict, optional): Padded model inputs, ``{field: np.ndarray}``,
+            None for backends without a tokenizer
+        padding_side (str): Side the padding was added on
+    """
+
+    def __init__(self, texts: List[str], inputs: Optional[Dict] = None, padding_side: str = "right"):
+        self.texts = texts
+        self.inputs = inputs
+        self.padding_side = padding_side
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def take(self, rows) -> Dict:
+        """Get the model inputs for some rows, without padding columns none of them need."""
+        inputs = {field: values[rows] for field, values in self.inputs.items()}
+        mask = inputs.get("attention_mask")
+        if mask is not None and len(mask) and self.padding_side == "right":
+            width = int(mask.sum(axis=1).max())
+            inputs = {field: values[:, :width] for field, values in inputs.items()}
+        return inputs
+
+
+def attach_token_cache(model, cache: TokenCache) -> bool:
+    """
+    Route a backend's tokenizer calls through ``cache``.
+
+    Returns:
+        bool: False if the backend has no tokenizer to cache
+    """
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return False
+    if isinstance(tokenizer, CachedTokenizer):
+        tokenizer.cache = cache
+    else:
+        model.tokenizer = CachedTokenizer(tokenizer, cache)
+    return True
+
+
+def forward_tokenized(model, inputs: Dict):
+    """
+    Run padded model inputs through a backend and get label probabilities.
+
+    Backends with a ``predict_proba_tokenized`` method (OnnxBackend) are
+    used directly; transformers pipelines run their model the way the
+    pipeline would, minus tokenization.
+
+    Returns:
+        np.ndarray: Shape (rows, labels), in the model's label order
+    """
+    if hasattr(model, "predict_proba_tokenized"):
+        return model.predict_proba_tokenized(inputs)
+    import torch
+
+    network = model.model
+    device = next(network.parameters()).device
+    with torch.inference_mode():
+        logits = network(**{field: torch.from_numpy(values).to(device)
+                            for field, values in inputs.items()}).logits.float()
+    config = network.config
+    if config.problem_type == "multi_label_classification" or config.num_labels == 1:
+        scores = torch.sigmoid(logits)
+    else:
+        scores = torch.softmax(logits, dim=-1)
+    return scores.cpu().numpy()
@@ -9,6 +9,9 @@ setup(
         "torch>=2.0.0",
         "numpy>=1.21.0",
     ],
+    extras_require={
+        "onnx": ["onnxruntime>=1.15.0", "onnx>=1.14.0"],
+    },
     author="Sanjana Robbi",
     author_email="sanjanarobbi123@gmail.com",
     description="An AI-powered emotion detection system for game narrative enhancement",
@@ -1,6 +1,47 @@
 import pytest
 from emotion_engine import EmotionEngine
 
+
+class FakePipeline:
+    """Keyword-driven stand-in for the transformers pipeline, for offline tests."""
+
+    keywords = {
+        "happy": "joy",
+        "angry": "anger",
+        "scared": "fear",
+        "sad": "sadness",
+    }
+
+    labels = ("anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise")
+
+    def __init__(self):
+        self.calls = []
+
+    def _predict(self, text, top_k=1):
+        label, score = "neutral", 0.6
+        for word, keyword_label in self.keywords.items():
+            if word in text.lower():
+                label, score = keyword_label, 0.9
+                break
+        if top_k is not None:
+            return [{"label": label, "score": score}]
+        rest = (1.0 - score) / (len(self.labels) - 1)
+        return [{"label": other, "score": score if other == label else rest} for other in self.labels]
+
+    def __call__(self, inputs, top_k=1, **kwargs):
+        self.calls.append((inputs, kwargs))
+        if isinstance(inputs, str):
+            return [self._predict(inputs, top_k)]
+        return [self._predict(text, top_k) for text in inputs]
+
+
 @pytest.fixture
 def engine():
     return EmotionEngine().initialize()
+
+
+@pytest.fixture
+def fake_engine(tmp_path):
+    engine = EmotionEngine(db_path=str(tmp_path / "emotion_contexts.db"))
+    engine._model = FakePipeline()
+    return engine
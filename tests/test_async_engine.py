@@ -0,0 +1,17 @@
+import asyncio
+
+from emotion_engine import AsyncEmotionEngine
+
+
+def test_concurrent_requests_are_coalesced(fake_engine):
+    texts = ["I am happy", "so angry", "", "I feel sad", "hello there"] * 4
+
+    async def run():
+        async with AsyncEmotionEngine(fake_engine, max_batch_size=8, max_wait_ms=50) as async_engine:
+            results = await asyncio.gather(*(async_engine.detect(t, context="flirty") for t in texts))
+            return results, async_engine.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [fake_engine.detect_emotion(t, context="flirty") for t in texts]
+    assert stats["requests"] == len(texts)
+    assert stats["batches"] < len(texts)
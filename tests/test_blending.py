@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+
+from emotion_engine import EmotionEngine, InferenceCache
+from emotion_engine.blending import blend, build_scene_priors
+
+
+def test_scene_priors_follow_default_emotions():
+    labels = ["anger", "fear", "joy", "neutral"]
+    scenes = {
+        "battle_scene": {"default_emotions": ["anger", "fear", "excitement"]},
+        "dream": {"default_emotions": ["wonder"]},
+    }
+    rows, priors = build_scene_priors(scenes, labels)
+    assert priors[rows["battle_scene"]].tolist() == [0.5, 0.5, 0.0, 0.0]
+    assert priors[rows["dream"]].tolist() == [0.25] * 4
+    blended = blend(np.array([[0.0, 0.0, 1.0, 0.0]] * 2), priors, np.array([0, 1]), 0.5)
+    assert np.allclose(blended.sum(axis=1), 1.0)
+    assert blended[0].tolist() == [0.25, 0.25, 0.5, 0.0]
+
+def test_distribution_mode_blends_scene_priors(fake_engine):
+    texts = ["hello there", "", "I am scared"]
+    labels, plain = fake_engine.predict_distribution(texts)
+    assert plain.shape == (3, len(labels))
+    assert plain[1, labels.index("neutral")] == 1.0
+
+    results = fake_engine.detect_emotions(texts, scenes="battle_scene", scene_weight=0.6)
+    assert results[0]["original_emotion"] in ("anger", "fear")
+    assert results[2]["original_emotion"] == "fear"
+    assert "distribution" not in results[0]
+    blended = fake_engine.detect_emotions(texts, scenes="battle_scene", scene_weight=0.6, return_distribution=True)
+    assert np.isclose(sum(blended[0]["distribution"].values()), 1.0)
+    unblended = fake_engine.detect_emotions(texts, return_distribution=True)
+    assert unblended[0]["emotion"] == "neutral"
+    assert unblended[2]["distribution"] == dict(zip(labels, plain[2].tolist()))
+    json.dumps(unblended)
+
+
+def test_engine_scene_weight_applies_to_both_apis_through_the_cache(tmp_path):
+    cache = InferenceCache()
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db"), scene_weight=0.6, cache=cache)
+    engine.initialize(backend="stub")
+    lines = ["hello there", "The ship docks at noon", "hello  there"]
+
+    batch = engine.detect_emotions(lines, scenes="battle_scene")
+    assert cache.stats()["misses"] == 3 and len(cache) == 2
+    single = [engine.detect_emotion(line, scene="battle_scene") for line in lines]
+    assert single == batch
+    assert cache.stats()["hits"] == 3
+    assert all("distribution" not in result for result in batch)
+    # The blend moves a neutral line onto the battle scene's emotions
+    plain = EmotionEngine(db_path=str(tmp_path / "contexts.db")).initialize(backend="stub")
+    assert plain.detect_emotion(lines[1], scene="battle_scene")["original_emotion"] == "neutral"
+    assert batch[1]["original_emotion"] in ("anger", "fear")
@@ -0,0 +1,55 @@
+import json
+from functools import partial
+
+import pytest
+
+from emotion_engine import EmotionEngine, process_dialogue_stream
+from conftest import FakePipeline
+
+
+def fake_engine_factory(batch_size, db_path):
+    engine = EmotionEngine(batch_size=batch_size, db_path=db_path)
+    engine._model = FakePipeline()
+    return engine
+
+
+def test_results_are_written_in_input_order(tmp_path):
+    source = tmp_path / "script.csv"
+    lines = ["text,scene,context,speaker"]
+    lines += [f"line {i} I am {'happy' if i % 2 else 'scared'},battle_scene,,npc{i}" for i in range(50)]
+    source.write_text("\n".join(lines) + "\n")
+    output = tmp_path / "results.jsonl"
+
+    count = process_dialogue_stream(str(source), str(output), workers=2, chunk_size=7,
+                                    engine_factory=partial(fake_engine_factory, db_path=str(tmp_path / "contexts.db")),
+                                    start_method="fork")
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert count == len(rows) == 50
+    assert [row["speaker"] for row in rows] == [f"npc{i}" for i in range(50)]
+    assert rows[1]["result"]["emotion"] == "joy"
+    assert rows[2]["result"]["emotion"] == "fear"
+    assert "context" not in rows[0]
+
+
+def test_shared_model_is_built_once_in_the_parent(tmp_path):
+    built = []
+
+    def counting_factory(batch_size):
+        built.append(batch_size)
+        return fake_engine_factory(batch_size, str(tmp_path / "contexts.db"))
+
+    source = tmp_path / "script.jsonl"
+    source.write_text("".join(json.dumps({"text": f"I am happy {i}"}) + "\n" for i in range(20)))
+    output = tmp_path / "results.jsonl"
+
+    count = process_dialogue_stream(str(source), str(output), workers=2, chunk_size=3,
+                                    engine_factory=counting_factory, start_method="fork",
+                                    share_model=True)
+
+    assert count == 20
+    assert built == [32]
+    assert all(json.loads(line)["result"]["emotion"] == "joy" for line in output.read_text().splitlines())
+    with pytest.raises(ValueError):
+        process_dialogue_stream(str(source), str(output), engine_factory=counting_factory,
+                                start_method="spawn", share_model=True)
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from emotion_engine import EmotionEngine, InferenceCache
+from conftest import FakePipeline
+
+
+def test_lru_eviction_and_counters():
+    cache = InferenceCache(max_size=2)
+    cache.put("one", "joy", 0.9)
+    cache.put("two", "fear", 0.8)
+    assert cache.get("  one ") == ("joy", 0.9)
+    cache.put("three", "anger", 0.7)
+    assert cache.get("two") is None
+    assert cache.get("one") is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 1, 2)
+
+def test_cache_hit_still_applies_context(tmp_path):
+    engine = EmotionEngine(cache=InferenceCache(), db_path=str(tmp_path / "contexts.db"))
+    engine._model = FakePipeline()
+    plain = engine.detect_emotion("Get down now", scene="battle_scene")
+    flirty = engine.detect_emotion("Get down  now", context="flirty")
+    assert len(engine._model.calls) == 1
+    assert plain["original_emotion"] == flirty["original_emotion"] == "neutral"
+    assert flirty["emotion"] == "excitement"
+    assert engine.get_cache_stats()["hits"] == 1
+
+def test_persistent_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "emotion_cache.db")
+    cache = InferenceCache(db_path=path)
+    cache.put_many([("hello", "joy", 0.5), ("bye", "sadness", 0.4)])
+    cache.close()
+    warm = InferenceCache(db_path=path)
+    assert warm.get("bye") == ("sadness", 0.4)
+    warm.close()
+
+def test_persistent_writes_are_buffered_and_capped(tmp_path):
+    path = str(tmp_path / "emotion_cache.db")
+    cache = InferenceCache(max_size=10, db_path=path, max_persisted=4, flush_every=3, flush_interval=60)
+
+    def stored():
+        conn = sqlite3.connect(path)
+        keys = {row[0] for row in conn.execute("SELECT text_key FROM inference_cache")}
+        conn.close()
+        return keys
+
+    cache.put("one", "joy", 0.9)
+    cache.put("two", "fear", 0.8)
+    assert stored() == set()
+    assert cache.get("one") == ("joy", 0.9)
+    cache.put("three", "anger", 0.7)
+    assert stored() == {"one", "two", "three"}
+
+    cache.get("one")
+    cache.put_many([("four", "joy", 0.5), ("five", "sadness", 0.4), ("six", "fear", 0.3)])
+    # "two" and "three" were used least recently
+    assert stored() == {"one", "four", "five", "six"}
+    cache.put("seven", "surprise", 0.6)
+    cache.close()
+    assert "seven" in stored()
+
+def test_buffered_writes_are_flushed_at_exit(tmp_path):
+    path = str(tmp_path / "emotion_cache.db")
+    script = (
+        "from emotion_engine import InferenceCache\n"
+        f"cache = InferenceCache(db_path={path!r}, flush_interval=60)\n"
+        "cache.put('hello', 'joy', 0.5)\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+    warm = InferenceCache(db_path=path)
+    assert warm.get("hello") == ("joy", 0.5)
+    warm.close()
+
+def test_engine_close_flushes_the_cache(tmp_path):
+    path = str(tmp_path / "emotion_cache.db")
+    cache = InferenceCache(db_path=path, flush_interval=60)
+    engine = EmotionEngine(cache=cache, db_path=str(tmp_path / "contexts.db"))
+    engine._model = FakePipeline()
+    engine.detect_emotion("Get down now")
+    engine.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT text_key FROM inference_cache").fetchall() == [("Get down now",)]
+    conn.close()
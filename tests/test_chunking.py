@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+from conftest import FakePipeline
+from emotion_engine import EmotionEngine, InferenceCache
+from emotion_engine.chunking import LongInputPolicy, split_sentences, split_windows
+
+PASSAGE = ("The rain had not stopped for three days and the village was quiet. "
+           "Nobody went out after dark anymore. "
+           "I was so scared when the door finally opened! "
+           "But then I saw her face and I was happy again.")
+
+
+def long_engine(tmp_path, **policy):
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db"),
+                           long_input=LongInputPolicy(max_tokens=16, **policy))
+    engine._model = FakePipeline()
+    return engine
+
+
+def test_split_sentences_and_windows():
+    assert split_sentences('He said "Stop!" Then he left. Really?') == ['He said "Stop!"', "Then he left.", "Really?"]
+    words = [str(i) for i in range(10)]
+    assert split_windows(words, 4, 3) == ["0 1 2 3", "3 4 5 6", "6 7 8 9"]
+    assert split_windows(words[:3], 4, 3) == ["0 1 2"]
+
+
+def test_policy_validation_and_selection():
+    with pytest.raises(ValueError):
+        LongInputPolicy(mode="paragraph")
+    with pytest.raises(ValueError):
+        LongInputPolicy(aggregate="median")
+    chunks = [str(i) for i in range(10)]
+    assert LongInputPolicy(max_chunks=4).select(chunks) == ["0", "3", "6", "9"]
+    assert LongInputPolicy(aggregate="last").select(chunks) == ["9"]
+
+
+def test_short_lines_skip_chunking(tmp_path):
+    engine = long_engine(tmp_path)
+    result = engine.detect_emotion("I am so happy")
+    assert result["emotion"] == "joy"
+    assert "chunks" not in result
+
+
+def test_sentence_mode_aggregates(tmp_path):
+    mean = long_engine(tmp_path).detect_emotion(PASSAGE)
+    assert mean["chunks"] == {"used": 4, "total": 4}
+    # Two neutral narration sentences outweigh one scared and one happy line
+    assert mean["emotion"] == "neutral"
+
+    strongest = long_engine(tmp_path, aggregate="max").detect_emotion(PASSAGE)
+    assert strongest["emotion"] in ("fear", "joy")
+
+    last = long_engine(tmp_path, aggregate="last").detect_emotion(PASSAGE, scene="battle")
+    assert last["emotion"] == "joy"
+    assert last["chunks"] == {"used": 1, "total": 4}
+    assert last["scene_mood"] == "tense"
+
+
+def test_chunks_are_batched(tmp_path):
+    engine = long_engine(tmp_path, mode="window", window_words=8, batch_size=3)
+    result = engine.detect_emotion(PASSAGE)
+    assert result["chunks"]["used"] == result["chunks"]["total"] > 3
+    assert [len(inputs) for inputs, _ in engine._model.calls] == [3] * (result["chunks"]["total"] // 3) + \
+        ([result["chunks"]["total"] % 3] if result["chunks"]["total"] % 3 else [])
+
+
+def test_latency_cap_stops_early(tmp_path):
+    class SlowPipeline(FakePipeline):
+        def __call__(self, inputs, top_k=1, **kwargs):
+            time.sleep(0.05)
+            return super().__call__(inputs, top_k, **kwargs)
+
+    engine = long_engine(tmp_path, mode="window", window_words=4, batch_size=2, max_latency_ms=10)
+    engine._model = SlowPipeline()
+    result = engine.detect_emotion(PASSAGE)
+    assert "error" not in result
+    assert result["chunks"]["used"] == 2
+    assert result["chunks"]["total"] > 2
+
+
+def test_long_results_are_cached(tmp_path):
+    engine = long_engine(tmp_path)
+    engine._cache = InferenceCache()
+    first = engine.detect_emotion(PASSAGE)
+    calls = len(engine._model.calls)
+    second = engine.detect_emotion(PASSAGE)
+    assert len(engine._model.calls) == calls
+    assert second["emotion"] == first["emotion"]
+    assert second["chunks"] == {"used": 0, "total": 4}
+
+
+def test_is_long_only_tokenizes_lines_near_the_limit():
+    calls = []
+
+    def tokenizer(text, truncation=True):
+        calls.append(text)
+        return {"input_ids": [0] * (len(text.split()) * 3 + 2)}
+
+    policy = LongInputPolicy(max_tokens=32)
+    assert not policy.is_long("a fairly ordinary line of dialogue here", tokenizer)
+    assert policy.is_long(" ".join(["word"] * 40), tokenizer)
+    assert calls == []
+    # 16 words: between the cheap bounds, so the tokenizer decides
+    assert policy.is_long(" ".join(["word"] * 16), tokenizer)
+    assert len(calls) == 1
+
+
+def test_batch_detection_applies_the_policy(tmp_path):
+    engine = long_engine(tmp_path)
+    expected = [engine.detect_emotion(PASSAGE, scene="battle"), engine.detect_emotion("I am so happy")]
+    for options in ({}, {"scene_weight": 0.3}, {"return_distribution": True}):
+        results = engine.detect_emotions([PASSAGE, "I am so happy"], scenes=["battle", None], **options)
+        assert results[0]["chunks"] == {"used": 4, "total": 4}
+        assert "chunks" not in results[1]
+        if not options:
+            assert results == expected
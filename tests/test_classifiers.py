@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import FakePipeline
+from emotion_engine import EmotionEngine
+from emotion_engine import backends
+from emotion_engine.backends import DEFAULT_LABELS
+from emotion_engine.classifiers import EmotionClassifier, StubClassifier
+
+
+def test_stub_is_deterministic_and_pipeline_shaped():
+    stub = StubClassifier()
+    lines = ["I am so happy to see you", "Help me!", "The ship is falling apart", "The ship is falling apart"]
+    first = stub(lines, batch_size=2)
+    assert first == StubClassifier()(lines)
+    assert [output[0]["label"] for output in first[:2]] == ["joy", "fear"]
+    assert first[0][0]["score"] == 0.9
+    assert first[2] == first[3]
+    assert 0.35 <= first[2][0]["score"] < 0.65
+
+    everything = stub("I hate this", top_k=None)[0]
+    assert [p["label"] for p in everything][0] == "anger"
+    assert sorted(p["label"] for p in everything) == sorted(DEFAULT_LABELS)
+    assert sum(p["score"] for p in everything) == pytest.approx(1.0)
+
+
+def test_custom_classifier_only_needs_predict_proba():
+    class Constant(EmotionClassifier):
+        labels = ("calm", "tense")
+
+        def predict_proba(self, texts):
+            return [[0.25, 0.75] for _ in texts]
+
+    assert Constant()(["a", "b"]) == [[{"label": "tense", "score": 0.75}]] * 2
+    with pytest.raises(NotImplementedError):
+        EmotionClassifier()(["a"])
+
+
+def test_engine_runs_on_the_stub_backend(tmp_path):
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db")).initialize(backend="stub")
+    assert isinstance(engine._model, StubClassifier)
+    result = engine.detect_emotion("I am so angry", context="flirty", scene="battle")
+    assert result["original_emotion"] == "anger"
+    assert result["emotion"] == "joy"
+    labels, distribution = engine.predict_distribution(["I am so angry", "wow"])
+    assert labels == list(DEFAULT_LABELS)
+    assert distribution.sum(axis=1) == pytest.approx([1.0, 1.0])
+
+
+def test_initialize_accepts_instances_and_registered_backends(tmp_path, monkeypatch):
+    fake = FakePipeline()
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db")).initialize(backend=fake)
+    assert engine._model is fake
+
+    monkeypatch.setitem(backends._registered, "lexicon-test",
+                        lambda model, **options: StubClassifier(confidence=options["confidence"]))
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db")).initialize(backend="lexicon-test",
+                                                                            confidence=0.7)
+    assert engine.detect_emotion("so sad")["confidence"] == pytest.approx(0.7)
+
+    with pytest.raises(ValueError, match="lexicon-test"):
+        EmotionEngine(db_path=str(tmp_path / "contexts.db")).initialize(backend="nope")
+
+
+def test_default_backend_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMOTION_ENGINE_BACKEND", "stub")
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db")).initialize()
+    assert isinstance(engine._model, StubClassifier)
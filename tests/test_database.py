@@ -0,0 +1,31 @@
+import pytest
+
+from emotion_engine import EmotionDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = EmotionDatabase(str(tmp_path / "contexts.db"))
+    yield database
+    database.close()
+
+
+def test_mapping_lookups_are_served_from_the_index(db):
+    assert db.get_emotion_mapping("flirty", "fear") == {
+        "adjusted_emotion": "excitement", "confidence_adjustment": 0.8
+    }
+    assert db.get_emotion_mapping("flirty", "disgust") is None
+    conn = db.conn
+    db.get_all_contexts()
+    db.get_emotion_mapping("battle", "joy")
+    assert db.conn is conn
+
+def test_writes_invalidate_the_index(db):
+    version = db.version
+    db.add_context("personality", "grumpy", "Character is irritable")
+    db.add_emotion_mapping("grumpy", "joy", "neutral", 0.5)
+    assert db.version > version
+    assert ("personality", "grumpy", "Character is irritable") in db.get_all_contexts()
+    assert db.get_emotion_mapping("grumpy", "joy")["adjusted_emotion"] == "neutral"
+    with pytest.raises(ValueError):
+        db.add_emotion_mapping("missing", "joy", "anger")
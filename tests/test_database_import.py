@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+
+import pytest
+
+from emotion_engine import EmotionDatabase, EmotionEngine
+from emotion_engine.database import DEFAULT_CONTEXTS, SCHEMA_VERSION
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = EmotionDatabase(str(tmp_path / "contexts.db"))
+    yield database
+    database.close()
+
+
+def test_defaults_are_seeded_once(tmp_path):
+    path = str(tmp_path / "contexts.db")
+    EmotionDatabase(path).close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.execute("DELETE FROM contexts WHERE context_name = 'tired'")
+    conn.commit()
+    conn.close()
+
+    db = EmotionDatabase(path)
+    names = {name for _, name, _ in db.get_all_contexts()}
+    assert "tired" not in names
+    assert len(names) == len({name for _, name, _ in DEFAULT_CONTEXTS}) - 1
+    db.close()
+
+
+def test_import_rows_writes_contexts_and_mappings(db):
+    version = db.version
+    counts = db.import_rows(
+        contexts=[("personality", f"npc_{i}", f"Generated {i}") for i in range(500)]
+        + [{"context_type": "relationship", "context_name": "romantic", "description": "Updated"}],
+        mappings=[(f"npc_{i}", "joy", "sadness", 0.5) for i in range(500)]
+        + [{"context_type": "relationship", "context_name": "romantic",
+            "original_emotion": "anger", "adjusted_emotion": "joy", "confidence_adjustment": "0.7"}],
+    )
+    assert counts == {"contexts": 501, "mappings": 501}
+    assert db.version > version
+    assert db.get_emotion_mapping("npc_499", "joy") == {"adjusted_emotion": "sadness", "confidence_adjustment": 0.5}
+    assert ("relationship", "romantic", "Updated") in db.get_all_contexts()
+    # The mapping went to the relationship context, not the situation one sharing its name
+    exported = db.export_rows()["mappings"]
+    assert {"context_type": "relationship", "context_name": "romantic", "original_emotion": "anger",
+            "adjusted_emotion": "joy", "confidence_adjustment": 0.7} in exported
+
+
+def test_failed_import_changes_nothing(db):
+    before = db.export_rows()
+    with pytest.raises(ValueError, match="Unknown context: nowhere"):
+        db.import_rows(contexts=[("personality", "grumpy", None)],
+                       mappings=[("grumpy", "joy", "neutral"), ("nowhere", "joy", "anger")])
+    assert db.export_rows() == before
+
+
+@pytest.mark.parametrize("suffix", [".json", ".csv"])
+def test_export_and_import_round_trip(tmp_path, db, suffix):
+    db.import_rows(contexts=[("role", "smuggler", "Shady, with a heart of gold"), ("role", "ghost", None)],
+                   mappings=[("smuggler", "fear", "joy", 0.6)])
+    path = tmp_path / f"contexts{suffix}"
+    db.export_file(path)
+
+    copy = EmotionDatabase(str(tmp_path / "copy.db"))
+    copy.import_file(path)
+    assert copy.export_rows() == db.export_rows()
+    copy.close()
+
+
+def test_readers_are_not_blocked_by_an_import(tmp_path, db):
+    path = str(tmp_path / "contexts.db")
+    writer = sqlite3.connect(path)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.executemany("INSERT INTO contexts (context_type, context_name) VALUES (?, ?)",
+                       [("bulk", f"row_{i}") for i in range(1000)])
+
+    reader = EmotionDatabase(path)
+    contexts = []
+    thread = threading.Thread(target=lambda: contexts.extend(reader.get_all_contexts()))
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert len(contexts) == len(DEFAULT_CONTEXTS)
+
+    writer.commit()
+    writer.close()
+    reader.invalidate()
+    assert len(reader.get_all_contexts()) == len(DEFAULT_CONTEXTS) + 1000
+    reader.close()
+
+
+def test_engine_sees_imported_mappings(tmp_path):
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db")).initialize(backend="stub")
+    assert engine.detect_emotion("I am so happy", context="smuggler")["emotion"] == "joy"
+    engine.database.import_rows(contexts=[("role", "smuggler", None)], mappings=[("smuggler", "joy", "fear")])
+    assert engine.detect_emotion("I am so happy", context="smuggler")["emotion"] == "fear"
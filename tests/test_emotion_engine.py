@@ -22,3 +22,32 @@ def test_context_override():
     result = engine.detect_emotion("I am so happy today!", context="flirty")
     assert 'emotion' in result
     assert 'mood_suggestion' in result
+
+def test_batch_detection_matches_single_calls(fake_engine):
+    texts = ["I am so happy", "", "I am so angry right now", "hello"]
+    contexts = [None, None, "flirty", "angry"]
+    results = fake_engine.detect_emotions(texts, contexts=contexts, scenes="battle_scene")
+    expected = [fake_engine.detect_emotion(t, context=c, scene="battle_scene")
+                for t, c in zip(texts, contexts)]
+    assert results == expected
+    assert results[2]["emotion"] == "joy"
+
+def test_batch_detection_respects_batch_size(fake_engine):
+    texts = ["a", "ccc", "bb", "dddd", "e"]
+    fake_engine.detect_emotions(texts, batch_size=2)
+    batches = [inputs for inputs, _ in fake_engine._model.calls]
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert batches[0] == ["dddd", "ccc"]
+
+def test_database_mappings_apply_during_detection(fake_engine):
+    nonchalant = fake_engine.detect_emotion("I am so happy", context="nonchalant")
+    assert nonchalant["emotion"] == "neutral"
+    assert nonchalant["confidence"] == pytest.approx(0.9 * 0.8)
+    # In-code context definitions take priority over database mappings
+    flirty = fake_engine.detect_emotion("hello", context="flirty")
+    assert flirty["emotion"] == "excitement"
+    assert flirty["confidence"] == pytest.approx(0.6)
+    fake_engine._get_db().add_emotion_mapping("calm", "anger", "neutral", 0.5)
+    calm = fake_engine.detect_emotion("so angry", context="calm")
+    assert calm["emotion"] == "neutral"
+    assert calm["confidence"] == pytest.approx(0.45)
@@ -0,0 +1,104 @@
+import json
+import logging
+
+from conftest import FakePipeline
+from emotion_engine import EmotionEngine, InferenceCache
+from emotion_engine.instrumentation import Histogram, Instrumentation, JsonExporter, LoggingExporter
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for ms in range(1, 101):
+        histogram.observe(ms / 1000.0)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert abs(snapshot["mean_ms"] - 50.5) < 1e-6
+    assert snapshot["min_ms"] == 1.0 and snapshot["max_ms"] == 100.0
+    # Bucket upper bounds, so within a factor of two above the true value
+    assert 50 <= snapshot["p50_ms"] <= 100
+    assert 95 <= snapshot["p99_ms"] <= 100
+
+
+def test_disabled_engine_records_nothing(fake_engine):
+    assert fake_engine.instrumentation is None
+    result = fake_engine.detect_emotion("I am so happy", scene="forest")
+    assert result["emotion"] == "joy"
+
+
+def test_stage_timings_and_cache_hit_rate(tmp_path):
+    engine = EmotionEngine(cache=InferenceCache(), db_path=str(tmp_path / "contexts.db"))
+    engine._model = FakePipeline()
+    instrumentation = engine.enable_instrumentation()
+
+    engine.detect_emotion("I am so happy", scene="forest")
+    engine.detect_emotion("I am so happy", scene="forest")
+    engine.detect_emotions(["I am angry", "I am scared"], scenes="battle")
+
+    snapshot = instrumentation.snapshot()
+    for stage in ("infer", "db_sync", "scene_lookup", "context_override", "mood_lookup"):
+        assert snapshot["stages"][stage]["count"] > 0, stage
+    assert snapshot["stages"]["mood_lookup"]["count"] == 4
+    assert snapshot["counters"] == {"cache_hits": 1, "cache_misses": 3}
+    assert snapshot["cache_hit_rate"] == 0.25
+
+
+def test_instrumented_results_match_uninstrumented(fake_engine):
+    lines = ["I am so happy", "I am angry", "plain line"]
+    expected = fake_engine.detect_emotions(lines, contexts="sarcastic", scenes="battle")
+    fake_engine.enable_instrumentation()
+    assert fake_engine.detect_emotions(lines, contexts="sarcastic", scenes="battle") == expected
+
+
+def test_swallowed_errors_are_counted(fake_engine):
+    class BrokenPipeline:
+        def __call__(self, inputs, **kwargs):
+            raise RuntimeError("model crashed")
+
+    fake_engine._model = BrokenPipeline()
+    instrumentation = fake_engine.enable_instrumentation()
+    assert fake_engine.detect_emotion("hello")["error"] == "model crashed"
+    fake_engine.detect_emotions(["one", "two"])
+    assert instrumentation.snapshot()["counters"]["errors.RuntimeError"] == 2
+
+
+def test_disable_removes_pipeline_hooks(fake_engine):
+    class HookablePipeline(FakePipeline):
+        def preprocess(self, text):
+            return text
+
+        def _forward(self, inputs):
+            return inputs
+
+        def __call__(self, inputs, top_k=1, **kwargs):
+            texts = [self._forward(self.preprocess(text)) for text in inputs]
+            return super().__call__(texts, top_k, **kwargs)
+
+    fake_engine._model = HookablePipeline()
+    instrumentation = fake_engine.enable_instrumentation()
+    fake_engine.detect_emotions(["I am sad", "I am happy"])
+    stages = instrumentation.snapshot()["stages"]
+    assert stages["tokenize"]["count"] == 2
+    assert stages["infer"]["count"] == 2
+
+    fake_engine.disable_instrumentation()
+    assert "preprocess" not in vars(fake_engine._model)
+    fake_engine.detect_emotions(["I am scared"])
+    assert instrumentation.snapshot()["stages"]["tokenize"]["count"] == 2
+
+
+def test_exporters(tmp_path, caplog):
+    received = []
+    path = tmp_path / "metrics.json"
+    instrumentation = Instrumentation(exporters=[received.append, JsonExporter(str(path)), LoggingExporter()])
+    with instrumentation.stage("infer"):
+        pass
+    instrumentation.increment("errors.ValueError")
+
+    with caplog.at_level(logging.INFO, logger="emotion_engine.metrics"):
+        snapshot = instrumentation.export()
+
+    assert received == [snapshot]
+    assert json.loads(path.read_text()) == json.loads(json.dumps(snapshot))
+    assert "errors.ValueError" in caplog.text
+    instrumentation.reset()
+    assert instrumentation.snapshot()["stages"] == {}
@@ -0,0 +1,38 @@
+import pytest
+
+from emotion_engine.backends import load_backend
+
+pytest.importorskip("onnxruntime")
+np = pytest.importorskip("numpy")
+
+LINES = [
+    "I am so happy today!", "Get down, they're shooting!", "Why would you do this to me?",
+    "That smells disgusting.", "Oh wow, I did not expect that.", "The meeting is at noon.",
+    "I miss her every single day.", "Leave me alone or you'll regret it.",
+]
+
+
+@pytest.fixture(scope="module")
+def torch_backend():
+    try:
+        return load_backend("transformers")
+    except OSError as e:
+        pytest.skip(f"model unavailable: {e}")
+
+
+def _distributions(backend, labels):
+    outputs = backend(LINES, top_k=None)
+    return np.array([[{d["label"]: d["score"] for d in row}[label] for label in labels] for row in outputs])
+
+
+@pytest.mark.parametrize("quantize, max_drift, min_agreement", [(False, 1e-3, 1.0), (True, 0.1, 0.85)])
+def test_onnx_matches_torch_backend(torch_backend, tmp_path_factory, quantize, max_drift, min_agreement):
+    onnx_backend = load_backend("onnx", cache_dir=str(tmp_path_factory.getbasetemp() / "onnx"),
+                                quantize=quantize)
+    labels = onnx_backend.labels
+    expected = _distributions(torch_backend, labels)
+    actual = _distributions(onnx_backend, labels)
+    assert np.abs(expected - actual).max() <= max_drift
+    agreement = (expected.argmax(axis=1) == actual.argmax(axis=1)).mean()
+    assert agreement >= min_agreement
+    assert onnx_backend("I am so happy today!")[0][0].keys() == {"label", "score"}
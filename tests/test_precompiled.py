@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from conftest import FakePipeline
+from emotion_engine import EmotionEngine, InferenceCache, PrecompiledEmotionSource
+from emotion_engine.chunking import LongInputPolicy
+from emotion_engine.precompiled import HEADER, RECORD, compile_annotations, main
+
+SCRIPT = [
+    {"text": "I am so happy to see you", "scene": "battle_scene"},
+    {"text": "I am so happy to see you", "context": "flirty"},
+    {"text": "I'm scared of the dark", "scene": "battle_scene", "context": "serious"},
+    "Stop being angry",
+    {"text": "   "},
+]
+
+
+@pytest.fixture
+def compiled(tmp_path, fake_engine):
+    path = tmp_path / "script.emoa"
+    assert compile_annotations(SCRIPT, str(path), engine=fake_engine) == 4
+    return path
+
+
+def test_file_holds_fixed_width_records_and_sorted_keys(compiled):
+    data = compiled.read_bytes()
+    magic, version, record_size, count, text_count, _, label_count = HEADER.unpack_from(data)
+    assert (magic, record_size, count, text_count, label_count) == (b"EMOA", RECORD.size, 4, 3, 7)
+    keys = memoryview(data)[HEADER.size:HEADER.size + 8 * count].cast("Q").tolist()
+    assert keys == sorted(keys)
+
+
+def test_compiled_lines_match_the_live_engine_without_inference(compiled, fake_engine, tmp_path):
+    fallback = EmotionEngine(db_path=str(tmp_path / "runtime.db"))
+    fallback._model = FakePipeline()
+    with PrecompiledEmotionSource(str(compiled), engine=fallback) as source:
+        for line in SCRIPT[:4]:
+            line = {"text": line} if isinstance(line, str) else line
+            expected = fake_engine.detect_emotion(line["text"], line.get("context"), line.get("scene"))
+            result = source.detect_emotion(line["text"], line.get("context"), line.get("scene"))
+            assert result == dict(expected, confidence=pytest.approx(expected["confidence"]))
+        assert source.detect_emotion("   ")["emotion"] == "neutral"
+        assert source.stats() == {"lines": 4, "hits": 4, "remapped": 0, "misses": 0}
+    assert fallback._model.calls == []
+
+
+def test_known_text_in_a_new_context_is_remapped_and_unknown_text_falls_back(compiled, tmp_path):
+    fallback = EmotionEngine(db_path=str(tmp_path / "runtime.db"))
+    fallback._model = FakePipeline()
+    source = PrecompiledEmotionSource(str(compiled), engine=fallback)
+
+    results = source.detect_emotions(
+        ["Stop being angry", "Stop being angry", "I feel sad today"],
+        contexts=[None, "flirty", None], scenes="battle_scene"
+    )
+
+    assert results[0]["original_emotion"] == results[1]["original_emotion"] == "anger"
+    assert results[1]["emotion"] == fallback.detect_emotion("angry", context="flirty")["emotion"]
+    assert results[2]["emotion"] == "sadness"
+    assert source.stats() == {"lines": 4, "hits": 0, "remapped": 2, "misses": 1}
+    assert [inputs for inputs, _ in fallback._model.calls[:1]] == [["I feel sad today"]]
+    source.close()
+
+
+def test_configured_engine_gives_the_same_results_precompiled(tmp_path):
+    def configured(name, cache=None):
+        engine = EmotionEngine(db_path=str(tmp_path / name), cache=cache, scene_weight=0.6,
+                               long_input=LongInputPolicy(max_tokens=16))
+        engine._model = FakePipeline()
+        return engine
+
+    passage = "The rain had not stopped for three days. Nobody went out after dark. But I was happy again."
+    script = [{"text": "hello", "scene": "battle_scene"}, {"text": passage, "scene": "battle_scene"}]
+    path = str(tmp_path / "script.emoa")
+    compile_annotations(script, path, engine=configured("compile.db", InferenceCache()))
+
+    reference = configured("reference.db")
+    with PrecompiledEmotionSource(path, engine=configured("runtime.db"), fallback=False) as source:
+        # Exact hits, then known texts remapped to another scene and context
+        for text, context, scene in [("hello", None, "battle_scene"), (passage, None, "battle_scene"),
+                                     ("hello", "flirty", "forest"), (passage, "nonchalant", "forest")]:
+            expected = reference.detect_emotion(text, context, scene)
+            result = source.detect_emotion(text, context, scene)
+            assert result == dict(expected, confidence=pytest.approx(expected["confidence"]))
+        assert expected["chunks"]["total"] > 1
+        assert reference.detect_emotion("hello", scene="battle_scene")["original_emotion"] != "neutral"
+        assert source.stats() == {"lines": 2, "hits": 2, "remapped": 2, "misses": 0}
+
+
+def test_without_fallback_unknown_lines_are_neutral(compiled, tmp_path):
+    engine = EmotionEngine(db_path=str(tmp_path / "runtime.db"))
+    source = PrecompiledEmotionSource(str(compiled), engine=engine, fallback=False)
+    result = source.detect_emotion("Never compiled")
+    assert result["emotion"] == "neutral" and "error" in result
+    assert source.lookup("Never compiled") is None
+    assert engine._model is None
+
+
+def test_rejects_files_that_are_not_annotations(tmp_path):
+    path = tmp_path / "bogus.emoa"
+    path.write_bytes(b"\0" * HEADER.size)
+    with pytest.raises(ValueError, match="annotation file"):
+        PrecompiledEmotionSource(str(path))
+
+
+def test_command_line_build(tmp_path, monkeypatch):
+    script = tmp_path / "script.jsonl"
+    script.write_text("\n".join(json.dumps(line) for line in SCRIPT if isinstance(line, dict)) + "\n")
+    output = tmp_path / "script.emoa"
+    monkeypatch.setenv("EMOTION_ENGINE_BACKEND", "stub")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("sys.argv", ["precompiled", str(script), str(output)])
+    main()
+    with PrecompiledEmotionSource(str(output), fallback=False) as source:
+        assert len(source) == 3
+        assert source.lookup("I am so happy to see you", scene="battle_scene")["original_emotion"] == "joy"
@@ -0,0 +1,75 @@
+import pytest
+
+from emotion_engine.rules import CompiledRules, compile_rules
+from emotion_engine.scene_manager import SceneManager
+
+
+def test_resolve_matches_scene_definitions():
+    manager = SceneManager()
+    rules = manager.compiled_rules()
+    for name, definition in manager.scene_definitions.items():
+        scene_id = rules.scene_id(name)
+        assert rules.moods[rules.scene_mood[scene_id]] == definition["mood"]
+        assert rules.intensities[rules.scene_intensity[scene_id]] == definition["intensity"]
+    # Shared alias goes to the first scene that defines it
+    assert rules.scenes[rules.scene_id("battle")] == "battle_scene"
+    assert rules.scene_id(None) == rules.scene_id("casual_conversation")
+    assert rules.scene_id("no_such_scene") is None
+
+
+def test_resolve_id_triple():
+    rules = SceneManager().compiled_rules()
+    emotion_id, adjustment, mood_id, intensity_id = rules.resolve(
+        rules.scene_id("party"), rules.context_id("flirty"), rules.emotion_id("anger")
+    )
+    assert rules.emotions[emotion_id] == "joy"
+    assert adjustment == 1.0
+    assert rules.moods[mood_id] == "celebratory"
+    assert rules.intensities[intensity_id] == "high"
+    # No context and unknown contexts leave the emotion alone
+    for context in (None, "", "unknown"):
+        assert rules.resolve_override(context, "anger") == ("anger", 1.0)
+    assert rules.resolve_override("flirty", "not_an_emotion") == ("not_an_emotion", 1.0)
+
+
+def test_rules_are_immutable_and_shared():
+    first, second = SceneManager(), SceneManager()
+    rules = first.compiled_rules()
+    assert rules is second.compiled_rules()
+    with pytest.raises(AttributeError):
+        rules.scenes = ()
+
+    second.add_context("calm", {"emotion_override": {"anger": "neutral"}})
+    changed = second.compiled_rules()
+    assert changed is not rules
+    assert changed.resolve_override("calm", "anger") == ("neutral", 1.0)
+    assert first.compiled_rules() is rules
+
+
+def test_database_mappings_are_compiled():
+    manager = SceneManager()
+    manager.load_mappings({("sarcastic", "joy"): ("anger", 0.8), ("flirty", "fear"): ("excitement", 0.9)})
+    rules = manager.compiled_rules()
+    assert rules.resolve_override("sarcastic", "joy") == ("anger", 0.8)
+    # In-code override agrees on the emotion, so the database adjustment is kept
+    assert rules.resolve_override("flirty", "fear") == ("excitement", 0.9)
+
+
+def test_process_dialogue_uses_compiled_rules():
+    manager = SceneManager()
+    result = manager.process_dialogue({"scene": "battel_scene", "context": "angry", "detected_emotion": "joy"})
+    assert result == {
+        "emotion": "anger",
+        "scene_mood": "tense",
+        "intensity": "high",
+        "original_emotion": "joy",
+        "confidence_adjustment": 1.0,
+    }
+
+
+def test_compile_rules_direct():
+    scenes = {"hall": {"mood": "calm", "intensity": "low", "aliases": ["lobby"]}}
+    rules = compile_rules(scenes, {("tense", "joy"): ("fear", 0.5)}, "hall")
+    assert isinstance(rules, CompiledRules)
+    assert rules.scene_id("lobby") == 0
+    assert rules.resolve_override("tense", "joy") == ("fear", 0.5)
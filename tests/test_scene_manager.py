@@ -0,0 +1,29 @@
+from emotion_engine import SceneManager
+
+
+def test_ambiguous_aliases_resolve_to_first_defined_scene():
+    manager = SceneManager()
+    assert manager.resolve_scene("battle") == "battle_scene"
+    assert manager.resolve_scene("ceremony") == "wedding"
+    assert manager.resolve_scene("unveiling") == "discovery"
+    # Scene names win over another scene's alias
+    assert manager.resolve_scene("interview") == "interview"
+
+def test_fuzzy_lookups_are_memoized_and_bounded():
+    manager = SceneManager()
+    manager.fuzzy_cache_size = 2
+    assert manager.get_scene_context("spellcastin")["mood"] == "mysterious"
+    assert manager.resolve_scene(None) == manager.default_scene
+    assert manager.resolve_scene("underwater_base") == manager.default_scene
+    manager.resolve_scene("memorail")
+    assert list(manager._fuzzy_cache) == ["underwater_base", "memorail"]
+
+def test_add_scene_updates_alias_index():
+    manager = SceneManager()
+    manager.resolve_scene("heist")
+    manager.add_scene("bank_heist", {
+        "mood": "tense", "intensity": "high",
+        "default_emotions": ["fear"], "aliases": ["heist", "robbery"]
+    })
+    assert manager.resolve_scene("heist") == "bank_heist"
+    assert manager.resolve_scene("robery") == "bank_heist"
@@ -0,0 +1,121 @@
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import FakePipeline
+from emotion_engine import EmotionEngine, InferenceCache, SemanticCache
+from emotion_engine.semantic_cache import HashedNgramEncoder, VectorIndex
+
+
+def test_encoder_places_paraphrases_closer_than_unrelated_lines():
+    encoder = HashedNgramEncoder()
+    vectors = encoder(["Get down, now!", "get down now", "The harvest festival starts tomorrow"])
+    assert np.linalg.norm(vectors, axis=1) == pytest.approx([1.0, 1.0, 1.0])
+    assert vectors[0] @ vectors[1] == pytest.approx(1.0)
+    assert vectors[0] @ vectors[2] < 0.3
+    assert np.array_equal(encoder(["Get down, now!"])[0], vectors[0])
+
+
+def test_ivf_index_finds_the_same_neighbours_as_brute_force():
+    rng = np.random.default_rng(1)
+    data = rng.normal(size=(600, 32)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    brute, ivf = VectorIndex(32, 600, ivf_threshold=10_000), VectorIndex(32, 600, ivf_threshold=100, nprobe=24)
+    for vector in data:
+        brute.add(vector)
+        ivf.add(vector)
+    assert ivf._centroids is not None
+    for vector in data[::7]:
+        (ivf_slot, ivf_similarity), (slot, similarity) = ivf.search(vector), brute.search(vector)
+        assert ivf_slot == slot and ivf_similarity == pytest.approx(similarity)
+
+
+def test_index_overwrites_the_oldest_vector_when_full():
+    index = VectorIndex(2, 2, ivf_threshold=2)
+    index.add(np.array([1.0, 0.0], dtype=np.float32))
+    index.add(np.array([0.0, 1.0], dtype=np.float32))
+    assert index.add(np.array([-1.0, 0.0], dtype=np.float32)) == 0
+    assert len(index) == 2
+    assert index.search(np.array([1.0, 0.0], dtype=np.float32)) == (1, 0.0)
+
+
+def test_engine_reuses_paraphrase_distributions(tmp_path):
+    semantic = SemanticCache(threshold=0.75)
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db"), semantic_cache=semantic)
+    engine._model = FakePipeline()
+
+    first = engine.detect_emotion("Get down!", scene="battle_scene")
+    second = engine.detect_emotion("Get down now!", scene="battle_scene")
+    engine.detect_emotion("What a lovely morning")
+
+    assert len(engine._model.calls) == 2
+    assert second["original_emotion"] == first["original_emotion"]
+    assert second["confidence"] == pytest.approx(first["confidence"])
+    stats = semantic.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+    assert stats["audits"] == 0 and stats["audit_agreement"] is None
+
+
+def test_audits_measure_drift_against_the_model(tmp_path):
+    semantic = SemanticCache(threshold=0.5, audit_every=1)
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db"), semantic_cache=semantic)
+    engine._model = FakePipeline()
+
+    engine.detect_emotion("I am so happy today")
+    engine.detect_emotion("I am so sad today")
+
+    stats = semantic.stats()
+    assert stats["hits"] == 1 and stats["audits"] == 1
+    assert stats["audit_agreement"] == 0.0
+    assert stats["mean_drift"] > 0
+    assert len(engine._model.calls) == 2
+
+
+def test_exact_repeats_still_use_the_inference_cache(tmp_path):
+    semantic = SemanticCache()
+    engine = EmotionEngine(cache=InferenceCache(), db_path=str(tmp_path / "contexts.db"),
+                           semantic_cache=semantic)
+    engine._model = FakePipeline()
+    engine.detect_emotion("Hold the line!")
+    engine.detect_emotion("Hold the line!")
+    assert len(engine._model.calls) == 1
+    assert semantic.stats()["misses"] == 1
+    semantic.clear()
+    assert semantic.stats()["size"] == 0
+
+
+def test_lookups_carry_on_while_the_index_retrains(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    fit = VectorIndex.fit
+
+    def slow_fit(snapshot, *args, **kwargs):
+        started.set()
+        assert release.wait(5)
+        return fit(snapshot, *args, **kwargs)
+
+    monkeypatch.setattr(VectorIndex, "fit", staticmethod(slow_fit))
+    semantic = SemanticCache(threshold=0.99, ivf_threshold=16)
+    labels = ["joy", "neutral"]
+    for i in range(15):
+        semantic.add(f"line number {i}", labels, np.array([1.0, 0.0]))
+    trainer = threading.Thread(target=semantic.add, args=("line number 15", labels, np.array([0.0, 1.0])))
+    trainer.start()
+    try:
+        assert started.wait(5)
+        found = []
+        reader = threading.Thread(target=lambda: found.append(semantic.lookup("line number 3")))
+        reader.start()
+        reader.join(timeout=2)
+        assert not reader.is_alive()
+        assert found[0] is not None
+        # Added mid-training, so it must survive the swap
+        semantic.add("a brand new line", labels, np.array([0.0, 1.0]))
+    finally:
+        release.set()
+        trainer.join()
+
+    assert semantic._index._centroids is not None
+    assert semantic.lookup("a brand new line")[0].tolist() == [0.0, 1.0]
+    assert semantic.lookup("line number 15")[0].tolist() == [0.0, 1.0]
@@ -0,0 +1,112 @@
+import http.client
+import json
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from emotion_engine import server as server_module
+from emotion_engine.server import EmotionServer
+
+
+@pytest.fixture
+def server(fake_engine):
+    server = EmotionServer(("127.0.0.1", 0), fake_engine, max_batch_size=8, max_wait_ms=10)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def request(url, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode()
+
+
+def test_detect_endpoints(server, fake_engine):
+    status, body = request(f"{server}/v1/detect", {"text": "so angry", "context": "flirty"})
+    assert status == 200
+    assert json.loads(body) == fake_engine.detect_emotion("so angry", context="flirty")
+
+    lines = [{"text": "I am happy"}, {"text": "I feel sad", "scene": "funeral"}]
+    status, body = request(f"{server}/v1/detect/batch", {"lines": lines})
+    assert [r["emotion"] for r in json.loads(body)["results"]] == ["joy", "sadness"]
+
+    assert request(f"{server}/v1/detect", {"context": "flirty"})[0] == 400
+
+def test_health_contexts_and_metrics(server):
+    assert request(f"{server}/healthz")[0] == 200
+    assert request(f"{server}/readyz")[0] == 200
+    status, body = request(f"{server}/v1/contexts")
+    assert {"type": "personality", "name": "flirty",
+            "description": "Character is playful and romantic"} in json.loads(body)["contexts"]
+    request(f"{server}/v1/detect", {"text": "hello"})
+    status, body = request(f"{server}/metrics")
+    assert 'emotion_requests_total{endpoint="/v1/detect"} 1' in body
+    assert "emotion_model_ready 1" in body
+
+
+def test_errors_are_classified_and_labelled(server, fake_engine, monkeypatch):
+    assert request(f"{server}/v1/detect", {"text": ["not", "a", "string"]})[0] == 400
+    assert request(f"{server}/v1/detect/batch", {"lines": "hello"})[0] == 400
+    assert request(f"{server}/random/{'x' * 8}")[0] == 404
+    assert request(f"{server}/v1/nothing", {"text": "hello"})[0] == 404
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("model exploded")
+
+    monkeypatch.setattr(fake_engine, "detect_emotions", broken)
+    status, body = request(f"{server}/v1/detect", {"text": "hello"})
+    assert status == 500 and "model exploded" in json.loads(body)["error"]
+
+    body = request(f"{server}/metrics")[1]
+    assert 'emotion_request_errors_total{endpoint="other"} 2' in body
+    assert 'emotion_request_errors_total{endpoint="/v1/detect"} 2' in body
+    assert "/random" not in body
+
+
+def test_request_size_limits(fake_engine):
+    server = EmotionServer(("127.0.0.1", 0), fake_engine, max_wait_ms=1, max_body_bytes=200, max_lines=3)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+        connection.request("POST", "/v1/detect", body=b'{"text": "hi"}', headers={"Content-Length": "-1"})
+        assert connection.getresponse().status == 400
+        connection.close()
+
+        assert request(f"{url}/v1/detect", {"text": "x" * 300})[0] == 413
+        assert request(f"{url}/v1/detect/batch", {"lines": [{"text": "hi"}] * 4})[0] == 413
+        assert request(f"{url}/v1/detect/batch", {"lines": [{"text": "hi"}] * 3})[0] == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_backend_defaults_to_the_environment(monkeypatch):
+    captured = {}
+
+    class _Server:
+        server_port = 0
+
+        def __init__(self, address, **kwargs):
+            captured.update(kwargs["initialize_options"])
+
+        def serve_forever(self):
+            raise KeyboardInterrupt
+
+        def server_close(self):
+            pass
+
+    monkeypatch.setattr(server_module, "EmotionServer", _Server)
+    monkeypatch.setattr(sys, "argv", ["server"])
+    server_module.main()
+    assert captured["backend"] is None
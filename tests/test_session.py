@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import FakePipeline
+from emotion_engine import EmotionEngine, InferenceCache, NarrativeSession
+from emotion_engine.chunking import LongInputPolicy
+
+
+def test_mood_only_changes_past_hysteresis(fake_engine):
+    session = NarrativeSession(fake_engine, alpha=0.3, hysteresis=0.15)
+    lines = ["I am happy", "so happy", "I am scared", "happy again", "scared", "scared", "scared", "scared"]
+    results = [session.process(line, speaker="mira", scene="battle_scene") for line in lines]
+    changes = [(i, r["mood_suggestion"]) for i, r in enumerate(results) if r["mood_changed"]]
+    assert changes == [(0, "Upbeat music, bright lighting"), (5, "Tense music, flickering lights")]
+    assert results[2]["emotion"] == "fear"
+    assert results[2]["scene_emotion"] == "joy"
+    assert results[3]["mood_suggestion"] is None
+
+def test_state_is_tracked_per_speaker_and_scene(fake_engine):
+    session = NarrativeSession(fake_engine, alpha=0.5)
+    session.process("I am happy", speaker="mira", scene="party")
+    session.process("I am so sad", speaker="tomas", scene="celebration")
+    session.process("", speaker="tomas", scene="party")
+    assert session.get_state(speaker="mira")["joy"] == pytest.approx(0.9)
+    assert max(session.get_state(speaker="tomas"), key=session.get_state(speaker="tomas").get) == "sadness"
+    # "celebration" is an alias of the party scene, so both lines share its state
+    party = session.get_state(scene="party")
+    assert party["joy"] == pytest.approx(0.5 * 0.9 + 0.5 * 0.1 / 6)
+    assert session.get_state(speaker="nobody") == {}
+
+def test_empty_line_reports_the_scene_mood_on_display(fake_engine):
+    session = NarrativeSession(fake_engine, alpha=0.3, hysteresis=0.3)
+    for line in ["I am happy", "scared", "scared"]:
+        session.process(line, scene="battle_scene")
+    state = session.get_state(scene="battle_scene")
+    assert max(state, key=state.get) == "fear"
+    assert session.process("", scene="battle_scene")["scene_emotion"] == "joy"
+    assert session.process("", scene="forest")["scene_emotion"] is None
+
+def test_session_lines_match_detect_emotion(tmp_path):
+    options = dict(cache=InferenceCache(), scene_weight=0.6, long_input=LongInputPolicy(max_tokens=16))
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db"), **options)
+    engine._model = FakePipeline()
+    reference = EmotionEngine(db_path=str(tmp_path / "reference.db"), **dict(options, cache=InferenceCache()))
+    reference._model = FakePipeline()
+    session = NarrativeSession(engine)
+    passage = "The rain had not stopped for three days. Nobody went out after dark. But I was happy again."
+    for line in ["hello", passage, "hello"]:
+        result = session.process(line, speaker="mira", scene="battle_scene")
+        expected = reference.detect_emotion(line, scene="battle_scene")
+        # mood_suggestion is held back by the session's hysteresis
+        assert {key: result[key] for key in expected if key != "mood_suggestion"} == \
+            {key: value for key, value in expected.items() if key != "mood_suggestion"}
+    # The repeated line came from the inference cache
+    assert engine.get_cache_stats()["hits"] == 1
@@ -0,0 +1,41 @@
+import pytest
+
+from emotion_engine.shared_weights import attach_mmap_weights, memory_usage, mmap_safetensors
+
+torch = pytest.importorskip("torch")
+safetensors_torch = pytest.importorskip("safetensors.torch")
+
+
+def test_mmap_safetensors_round_trip(tmp_path):
+    path = tmp_path / "model.safetensors"
+    tensors = {
+        "weight": torch.randn(4, 3),
+        "half": torch.randn(5).half(),
+        "ids": torch.arange(6, dtype=torch.int64).reshape(2, 3),
+    }
+    safetensors_torch.save_file(tensors, str(path))
+    loaded = mmap_safetensors(str(path))
+    assert set(loaded) == set(tensors)
+    for name, tensor in tensors.items():
+        assert loaded[name].dtype == tensor.dtype
+        assert torch.equal(loaded[name], tensor)
+
+
+def test_attach_mmap_weights_keeps_outputs(tmp_path):
+    model = torch.nn.Sequential(torch.nn.Linear(8, 4), torch.nn.ReLU(), torch.nn.Linear(4, 2))
+    path = tmp_path / "model.safetensors"
+    safetensors_torch.save_file(model.state_dict(), str(path))
+    inputs = torch.randn(3, 8)
+    with torch.no_grad():
+        expected = model(inputs)
+
+    fresh = torch.nn.Sequential(torch.nn.Linear(8, 4), torch.nn.ReLU(), torch.nn.Linear(4, 2))
+    assert attach_mmap_weights(fresh, str(path)) == 4
+    with torch.no_grad():
+        assert torch.allclose(fresh(inputs), expected)
+
+
+def test_memory_usage_reports_bytes():
+    usage = memory_usage()
+    assert usage["rss"] > 0
+    assert 0 < usage["pss"] <= usage["rss"] * 2
@@ -0,0 +1,22 @@
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_import_and_lookups_skip_heavy_modules(tmp_path):
+    snippet = (
+        "import sys, emotion_engine\n"
+        "engine = emotion_engine.EmotionEngine()\n"
+        "engine.get_mood_suggestion('joy')\n"
+        "engine._scene_manager.get_scene_context('date')\n"
+        "print(','.join(m for m in ('torch', 'transformers') if m in sys.modules))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=tmp_path, capture_output=True, text=True,
+        check=True, env={"PYTHONPATH": str(REPO_ROOT)}
+    ).stdout.strip()
+    assert output == ""
+    # The context database is only opened when contexts are requested
+    assert not (tmp_path / "emotion_contexts.db").exists()
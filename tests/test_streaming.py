@@ -0,0 +1,69 @@
+import asyncio
+import itertools
+
+import pytest
+
+from emotion_engine import EmotionEngine, InferenceCache, astream_dialogue, stream_dialogue
+from emotion_engine.chunking import LongInputPolicy
+from conftest import FakePipeline
+
+LINES = ["I am happy", "", "so angry", "I am happy", "hello", "I feel sad", "scared now",
+         "The rain had not stopped for three days.   Nobody went out after dark. But I was happy again."]
+
+
+def dialogues():
+    return [{"text": text, "scene": "battle_scene", "context": "flirty", "speaker": f"npc{i}"}
+            for i, text in enumerate(LINES)]
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"cache": InferenceCache()},
+    {"cache": InferenceCache(), "scene_weight": 0.6, "long_input": LongInputPolicy(max_tokens=16)},
+])
+def test_stream_matches_detect_emotion(tmp_path, options):
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db"), **options)
+    engine._model = FakePipeline()
+    streamed = list(stream_dialogue(engine, dialogues(), batch_size=2))
+    assert [row["speaker"] for row in streamed] == [f"npc{i}" for i in range(len(LINES))]
+
+    reference = EmotionEngine(db_path=str(tmp_path / "reference.db"),
+                              **dict(options, cache=InferenceCache() if "cache" in options else None))
+    reference._model = FakePipeline()
+    expected = [reference.detect_emotion(t, context="flirty", scene="battle_scene") for t in LINES]
+    assert [row["result"] for row in streamed] == expected
+    if "long_input" in options:
+        assert expected[4]["original_emotion"] != "neutral"
+        assert "chunks" in expected[-1]
+    else:
+        # Lines reach the model as written, not whitespace-collapsed
+        assert LINES[-1] in [text for inputs, _ in engine._model.calls for text in inputs]
+
+def test_stream_is_lazy_and_bounded(tmp_path):
+    engine = EmotionEngine(cache=InferenceCache(), db_path=str(tmp_path / "contexts.db"))
+    engine._model = FakePipeline()
+    pulled = []
+
+    def endless():
+        for i in itertools.count():
+            pulled.append(i)
+            yield {"text": f"line {i % 5}"}
+
+    first = list(itertools.islice(stream_dialogue(engine, endless(), batch_size=4), 20))
+    assert len(first) == 20
+    assert len(pulled) <= 20 + 4 * 4
+    # Only the five distinct lines ever reached the model
+    assert sum(len(inputs) for inputs, _ in engine._model.calls) == 5
+
+def test_async_stream_preserves_order(fake_engine):
+    async def source():
+        for dialogue in dialogues():
+            await asyncio.sleep(0)
+            yield dialogue
+
+    async def collect():
+        return [row async for row in astream_dialogue(fake_engine, source(), batch_size=3, max_buffer=2)]
+
+    streamed = asyncio.run(collect())
+    assert [row["speaker"] for row in streamed] == [f"npc{i}" for i in range(len(LINES))]
+    assert streamed[2]["result"]["emotion"] == "joy"
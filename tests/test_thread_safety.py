@@ -0,0 +1,179 @@
+import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from emotion_engine import EmotionDatabase, EmotionEngine, SceneManager
+from emotion_engine.classifiers import StubClassifier
+from emotion_engine.concurrency import InferencePool
+
+LINES = ["I am so happy", "I hate this", "Run, there's danger", "I miss her", "Whoa, really?",
+         "Eww, gross", "The ship docks at noon", "Thanks, that was great"]
+CASES = [(line, context, scene) for line in LINES
+         for context, scene in [(None, None), ("flirty", None), ("nonchalant", "battle_scene"), (None, "forest")]]
+
+
+class _CountingStub(StubClassifier):
+    """StubClassifier that records how many batches run at once."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def predict_proba(self, texts):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return super().predict_proba(texts)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_shared_engine_matches_single_threaded_results(tmp_path):
+    reference = EmotionEngine(db_path=str(tmp_path / "reference.db")).initialize(backend="stub")
+    expected = [reference.detect_emotion(*case) for case in CASES]
+
+    engine = EmotionEngine(db_path=str(tmp_path / "shared.db"), cache=None).initialize(backend="stub")
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        # Touch only names the readers never use, so their answers must not change
+        i = 0
+        while not stop.is_set():
+            engine._scene_manager.add_scene(f"extra_scene_{i}", {"mood": "calm", "intensity": "low"})
+            engine._scene_manager.add_context(f"extra_context_{i}", {"emotion_override": {"joy": "neutral"}})
+            db = engine.database
+            db.add_context("custom", f"custom_{i}")
+            db.add_emotion_mapping(f"custom_{i}", "joy", "sadness", 0.5)
+            i += 1
+
+    def reader(worker):
+        try:
+            for round_ in range(15):
+                for index in range(len(CASES)):
+                    case = CASES[(index + worker + round_) % len(CASES)]
+                    assert engine.detect_emotion(*case) == expected[CASES.index(case)]
+        except Exception as error:
+            errors.append(error)
+
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    readers = [threading.Thread(target=reader, args=(worker,)) for worker in range(16)]
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    stop.set()
+    writer_thread.join()
+
+    assert errors == []
+    assert engine.detect_emotion("I am so happy", context="custom_0")["emotion"] == "sadness"
+
+
+def test_each_thread_gets_its_own_connection(tmp_path):
+    db = EmotionDatabase(str(tmp_path / "contexts.db"))
+    main = db.conn
+    seen = []
+    # Keep every thread alive until all have connected, so no connection is freed and its id reused
+    barrier = threading.Barrier(8)
+
+    def use():
+        seen.append(id(db.conn))
+        barrier.wait()
+        assert db.conn is db.conn
+        assert db.get_emotion_mapping("battle", "joy")["adjusted_emotion"] == "anger"
+        db.add_context("custom", "threaded")
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    gc.collect()
+
+    assert id(main) not in seen
+    assert len(set(seen)) == 8
+    # Connections of finished threads are closed and forgotten
+    assert list(db._handles) == [db.connect()]
+    db.close()
+
+
+def test_in_memory_database_is_shared_between_threads():
+    db = EmotionDatabase(":memory:")
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda i: db.add_context("custom", f"memory_{i}"), range(4)))
+    names = {name for _, name, _ in db.get_all_contexts()}
+    assert {f"memory_{i}" for i in range(4)} <= names
+    db.close()
+
+
+def test_scene_tables_are_copied_on_write():
+    manager = SceneManager()
+    scenes = manager.scene_definitions
+    contexts = manager.context_definitions
+    manager.add_scene("harbor", {"mood": "calm", "intensity": "low"})
+    manager.add_context("weary", {"emotion_override": {"joy": "neutral"}})
+    assert "harbor" not in scenes and "harbor" in manager.scene_definitions
+    assert "weary" not in contexts and "weary" in manager.context_definitions
+
+    stop = threading.Event()
+
+    def add_scenes():
+        i = 0
+        while not stop.is_set():
+            manager.add_scene(f"scene_{i}", {"mood": "tense", "intensity": "high"})
+            i += 1
+
+    thread = threading.Thread(target=add_scenes)
+    thread.start()
+    try:
+        # Iterating while scenes are added would raise "dictionary changed size" without copy-on-write
+        for _ in range(200):
+            assert sum(1 for _ in manager.scene_definitions.items()) > 0
+            assert manager.resolve_scene("harbor") is not None
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_scene_added_after_a_rules_snapshot_resolves_to_its_default():
+    manager = SceneManager()
+    rules = manager.compiled_rules()
+    # A writer lands between a reader taking the snapshot and resolving its scene
+    manager.add_scene("harbor", {"mood": "calm", "intensity": "low", "aliases": ["docks"]})
+    for name in ("harbor", "docks", "harbour"):
+        assert manager.resolve_scene(name) == "harbor"
+        assert manager.resolve_scene_id(rules, name) == rules.default_scene_id
+    assert manager.resolve_scene_id(manager.compiled_rules(), "docks") != rules.default_scene_id
+
+
+def test_inference_pool_bounds_concurrent_model_calls(tmp_path):
+    texts = [f"line number {i}" for i in range(32)]
+    sequential = EmotionEngine(db_path=str(tmp_path / "sequential.db"), cache=None).initialize(backend="stub")
+    expected = [sequential.detect_emotion(text) for text in texts]
+
+    stub = _CountingStub(call_ms=20)
+    pool = InferencePool(workers=4, intra_op_threads=1)
+    shared = EmotionEngine(db_path=str(tmp_path / "shared.db"), cache=None, inference_pool=pool)
+    shared.initialize(backend=stub)
+    try:
+        with ThreadPoolExecutor(16) as executor:
+            results = list(executor.map(shared.detect_emotion, texts))
+    finally:
+        pool.shutdown()
+
+    assert results == expected
+    assert 1 <= stub.peak <= 4
+
+
+def test_inference_pool_runs_nested_calls_inline():
+    pool = InferencePool(workers=1)
+    try:
+        assert pool.run(pool.run, lambda value: value * 2, 21) == 42
+        assert threading.current_thread().name.startswith("MainThread")
+    finally:
+        pool.shutdown()
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from emotion_engine import EmotionEngine, TokenCache
+from emotion_engine.tokenization import CachedTokenizer
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+LINES = ["i am so happy", "get down now", "the ship is sad", "i am so happy", "", "now now now now now now"]
+WORDS = ["<s>", "<pad>", "</s>", "<unk>"] + "i am so happy sad get down now the ship is".split()
+
+
+@pytest.fixture(scope="module")
+def tiny_pipeline():
+    """A real text-classification pipeline with a random tiny RoBERTa, built offline."""
+    backend = tokenizers.Tokenizer(tokenizers.models.WordLevel({w: i for i, w in enumerate(WORDS)}, unk_token="<unk>"))
+    backend.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    backend.post_processor = tokenizers.processors.TemplateProcessing(
+        single="<s> $A </s>", special_tokens=[("<s>", 0), ("</s>", 2)]
+    )
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=backend, bos_token="<s>", eos_token="</s>", pad_token="<pad>", unk_token="<unk>",
+        model_max_length=32
+    )
+    labels = ["anger", "joy", "neutral", "sadness"]
+    config = transformers.RobertaConfig(
+        vocab_size=len(WORDS), hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+        intermediate_size=32, max_position_embeddings=40, pad_token_id=1,
+        id2label=dict(enumerate(labels)), label2id={label: i for i, label in enumerate(labels)}
+    )
+    torch.manual_seed(0)
+    model = transformers.RobertaForSequenceClassification(config).eval()
+    return transformers.pipeline("text-classification", model=model, tokenizer=tokenizer, top_k=1,
+                                 truncation=True)
+
+
+def _engine(tmp_path, pipeline, token_cache=None):
+    return EmotionEngine(db_path=str(tmp_path / "contexts.db"), token_cache=token_cache).initialize(backend=pipeline)
+
+
+def test_pipeline_tokenization_is_cached(tmp_path, tiny_pipeline):
+    expected = [result["confidence"] for result in _engine(tmp_path, tiny_pipeline).detect_emotions(LINES)]
+    cache = TokenCache()
+    engine = _engine(tmp_path, tiny_pipeline, cache)
+    try:
+        assert isinstance(tiny_pipeline.tokenizer, CachedTokenizer)
+        first = engine.detect_emotions(LINES)
+        second = engine.detect_emotions(LINES[:3], batch_size=1)
+        assert [r["confidence"] for r in first] == pytest.approx(expected, abs=1e-6)
+        assert [r["confidence"] for r in second] == pytest.approx(expected[:3], abs=1e-6)
+        assert cache.stats()["hits"] >= 3
+        assert len(cache) == 4
+    finally:
+        tiny_pipeline.tokenizer = tiny_pipeline.tokenizer.wrapped
+
+
+def test_tokenized_batches_match_detect_emotions(tmp_path, tiny_pipeline):
+    engine = _engine(tmp_path, tiny_pipeline)
+    expected = engine.detect_emotions(LINES, scenes="battle_scene")
+
+    with ThreadPoolExecutor(4) as pool:
+        batches = list(pool.map(engine.tokenize, [LINES] * 4))
+    for batch in batches[1:]:
+        assert np.array_equal(batch.inputs["input_ids"], batches[0].inputs["input_ids"])
+    results = engine.detect_tokenized(batches[0], scenes="battle_scene", batch_size=2)
+
+    assert [r["emotion"] for r in results] == [r["emotion"] for r in expected]
+    assert [r["confidence"] for r in results] == pytest.approx([r["confidence"] for r in expected], abs=1e-5)
+    assert results[4]["emotion"] == "neutral"
+
+
+def test_tokenize_shares_the_token_cache(tmp_path, tiny_pipeline):
+    cache = TokenCache(max_size=2)
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db"), token_cache=cache)
+    engine._model = tiny_pipeline
+    batch = engine.tokenize(["i am so happy", "get down now", "i am so happy"])
+    assert batch.inputs["input_ids"].shape == (3, 6)
+    assert batch.inputs["attention_mask"][1].tolist() == [1, 1, 1, 1, 1, 0]
+    assert cache.stats() == {"hits": 0, "misses": 3, "hit_rate": 0.0, "size": 2}
+    engine.tokenize(["get down now", "the ship"])
+    assert cache.stats()["hits"] == 1 and len(cache) == 2
+
+
+def test_uncacheable_calls_go_to_the_tokenizer(tiny_pipeline):
+    tokenizer = CachedTokenizer(tiny_pipeline.tokenizer, TokenCache())
+    assert tokenizer("i am", "so happy")["input_ids"] == tiny_pipeline.tokenizer("i am", "so happy")["input_ids"]
+    assert tokenizer("i am so", return_tensors="pt")["input_ids"].tolist() == [[0, 4, 5, 6, 2]]
+    assert tokenizer.pad_token_id == 1
+
+
+def test_backends_without_a_tokenizer_still_run_tokenized_batches(tmp_path):
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db")).initialize(backend="stub")
+    batch = engine.tokenize(["I am so angry", None])
+    assert batch.inputs is None
+    results = engine.detect_tokenized(batch, contexts="flirty")
+    assert [r["original_emotion"] for r in results] == ["anger", "neutral"]
@@ -0,0 +1,90 @@
+import threading
+
+from conftest import FakePipeline
+from emotion_engine import EmotionEngine, InferenceCache
+from emotion_engine import engine as engine_module
+from emotion_engine.concurrency import InferencePool
+
+
+class ReadinessProbe(FakePipeline):
+    """Records whether the engine reported ready during each model call."""
+
+    def __init__(self, engine=None):
+        super().__init__()
+        self.engine = engine
+        self.ready_during_calls = []
+
+    def __call__(self, inputs, top_k=1, **kwargs):
+        if self.engine is not None:
+            self.ready_during_calls.append(self.engine.is_ready())
+        return super().__call__(inputs, top_k, **kwargs)
+
+
+def test_warm_up_records_timings_without_caching(tmp_path):
+    engine = EmotionEngine(cache=InferenceCache(), db_path=str(tmp_path / "contexts.db"))
+    engine._model = FakePipeline()
+    assert engine.get_warmup_stats() == {}
+
+    stats = engine.warm_up(inputs=["short line", "a somewhat longer line of text"],
+                           batch_sizes=(1, 4), max_rounds=3)
+
+    assert 2 <= len(stats["rounds_ms"]) <= 3
+    assert set(stats["shapes_ms"]) == {"1x2w", "4x2w", "1x6w", "4x6w"}
+    assert stats["total_ms"] >= sum(stats["rounds_ms"])
+    assert engine.get_warmup_stats() is stats
+    assert [len(inputs) for inputs, _ in engine._model.calls[:4]] == [1, 4, 1, 4]
+    assert len(engine._cache) == 0
+    assert engine.is_ready()
+
+
+def test_initialize_with_warmup_holds_readiness(tmp_path, monkeypatch):
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db"))
+    probe = ReadinessProbe(engine)
+    monkeypatch.setattr(engine_module, "load_backend", lambda backend, model, **options: probe)
+
+    assert not engine.is_ready()
+    engine.initialize(warmup=True)
+
+    assert probe.ready_during_calls and not any(probe.ready_during_calls)
+    assert engine.is_ready()
+    assert engine.get_warmup_stats()["rounds_ms"]
+
+
+def test_initialize_with_warmup_warms_an_already_loaded_model(tmp_path):
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db")).initialize(backend="stub")
+    assert engine.get_warmup_stats() == {}
+    model = engine._model
+
+    engine.initialize(warmup=True)
+    assert engine._model is model
+    assert engine.get_warmup_stats()["rounds_ms"]
+    assert engine.is_ready()
+
+
+def test_initialize_without_warmup_is_ready_immediately(tmp_path, monkeypatch):
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db"))
+    monkeypatch.setattr(engine_module, "load_backend", lambda backend, model, **options: FakePipeline())
+    engine.initialize()
+    assert engine.is_ready()
+    assert engine.get_warmup_stats() == {}
+    assert engine._model.calls == []
+
+
+def test_warm_up_goes_through_the_pool_and_instrumentation(tmp_path):
+    threads = set()
+
+    class ThreadRecorder(FakePipeline):
+        def __call__(self, inputs, top_k=1, **kwargs):
+            threads.add(threading.current_thread().name)
+            return super().__call__(inputs, top_k, **kwargs)
+
+    pool = InferencePool(workers=1)
+    engine = EmotionEngine(db_path=str(tmp_path / "contexts.db"), inference_pool=pool)
+    engine._model = ThreadRecorder()
+    instrumentation = engine.enable_instrumentation()
+    try:
+        engine.warm_up(inputs=["short line"], batch_sizes=(1, 2), max_rounds=2)
+    finally:
+        pool.shutdown()
+    assert len(threads) == 1 and threads.pop().startswith("emotion-inference")
+    assert instrumentation.snapshot()["stages"]["infer"]["count"] == 4